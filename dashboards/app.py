@@ -11,7 +11,14 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import duckdb
 import numpy as np
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from arrow_query import fetch_frame
+from funnel_cube import FUNNEL_CUBE_DIMENSIONS, FUNNEL_CUBE_TABLE, FUNNEL_STEP_COLUMNS, lookup_funnel
+from metric_registry import current_data_version
 
 # Page config
 st.set_page_config(
@@ -21,75 +28,106 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data
-def load_data():
-    """Load data from DuckDB database"""
-    conn = duckdb.connect('bree_case_study.db')
-    
-    # Funnel data
-    funnel_query = """
-    WITH user_funnel AS (
-        SELECT 
-            u.user_id,
-            u.province,
-            u.device_os,
-            u.acquisition_channel,
-            u.signup_month,
-            u.signup_at_utc,
-            u.bank_linked_flag,
-            CASE WHEN l.user_id IS NOT NULL THEN 1 ELSE 0 END AS requested_loan,
-            CASE WHEN l.is_approved = 1 THEN 1 ELSE 0 END AS approved_loan,
-            CASE WHEN l.is_disbursed = 1 THEN 1 ELSE 0 END AS disbursed_loan,
-            CASE WHEN l.is_repaid = 1 THEN 1 ELSE 0 END AS repaid_loan,
-            CASE WHEN l.is_default = 1 THEN 1 ELSE 0 END AS defaulted_loan
-        FROM v_dim_users_clean u
-        LEFT JOIN (
-            SELECT user_id, 
-                   MAX(is_approved) as is_approved,
-                   MAX(is_disbursed) as is_disbursed, 
-                   MAX(is_repaid) as is_repaid,
-                   MAX(is_default) as is_default
-            FROM v_fct_loans_clean 
-            GROUP BY user_id
-        ) l ON u.user_id = l.user_id
-    )
-    SELECT * FROM user_funnel
-    """
-    
-    # Experiment data
-    experiment_query = """
-    SELECT 
-        l.loan_id,
-        l.user_id,
-        l.amount,
-        l.tip_amount,
-        l.revenue,
-        l.is_disbursed,
-        l.status,
-        e.price_test_group,
-        e.tip_test_group,
-        CASE WHEN l.tip_amount > 0 THEN 1 ELSE 0 END as tip_taken,
-        CASE WHEN l.instant_transfer_fee > 0 THEN 1 ELSE 0 END as instant_transfer_used
-    FROM v_fct_loans_clean l
-    JOIN v_user_experiment_assignments e ON l.user_id = e.user_id
-    WHERE l.is_disbursed = 1
-    """
-    
-    funnel_df = conn.execute(funnel_query).fetchdf()
-    experiment_df = conn.execute(experiment_query).fetchdf()
-    
-    conn.close()
-    return funnel_df, experiment_df
+# Distinct filter combinations whose query results are kept per cached function
+FILTER_CACHE_ENTRIES = 256
+
+DATABASE_PATH = 'bree_case_study.db'
+
+EXPERIMENT_SUMMARY_QUERY = """
+SELECT
+    tip_test_group,
+    price_test_group,
+    SUM(loans)::BIGINT       AS loans,
+    SUM(tips_taken)::BIGINT  AS tips_taken,
+    SUM(tip_amount_sum)      AS tip_amount_sum,
+    SUM(tip_amount_count)    AS tip_amount_count,
+    SUM(revenue_sum)         AS revenue_sum,
+    SUM(amount_sum)          AS amount_sum,
+    SUM(amount_count)        AS amount_count
+FROM agg_experiment_segments
+{where_clause}
+GROUP BY tip_test_group, price_test_group
+ORDER BY tip_test_group, price_test_group
+"""
+
+def segment_filters(province, device_os, acquisition_channel, signup_month):
+    """Map sidebar selections to lookup filters ('All' = no filter)."""
+    filters = {
+        "province": province,
+        "device_os": device_os,
+        "acquisition_channel": acquisition_channel,
+        "signup_month": signup_month
+    }
+    return {dimension: value for dimension, value in filters.items() if value != 'All'}
+
+def load_data_version():
+    """Current data version stamped by the loader (read on every rerun, never cached)"""
+    conn = duckdb.connect(DATABASE_PATH, read_only=True)
+    try:
+        return current_data_version(conn)
+    finally:
+        conn.close()
+
+# Every cached loader takes data_version as its first argument, so results stay
+# warm across reruns and are recomputed exactly when the pipeline lands new data
+
+@st.cache_data(max_entries=4)
+def load_filter_options(data_version):
+    """Distinct segment values offered in the sidebar, from the funnel cube's finest grain"""
+    conn = duckdb.connect(DATABASE_PATH, read_only=True)
+    try:
+        return {
+            dimension: [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {dimension} FROM {FUNNEL_CUBE_TABLE} WHERE grouping_id = 0 ORDER BY 1"
+            ).fetchall()]
+            for dimension in FUNNEL_CUBE_DIMENSIONS
+        }
+    finally:
+        conn.close()
 
-def create_funnel_chart(df, title="User Funnel"):
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def load_funnel(data_version, province, device_os, acquisition_channel, signup_month):
+    """Funnel step counts for one filter combination, looked up in the funnel cube"""
+    conn = duckdb.connect(DATABASE_PATH, read_only=True)
+    try:
+        funnel = lookup_funnel(conn, **segment_filters(province, device_os, acquisition_channel, signup_month))
+    finally:
+        conn.close()
+    return {column: int(funnel[column].fillna(0).iloc[0]) if len(funnel) else 0
+            for column in FUNNEL_STEP_COLUMNS}
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def load_experiment_summary(data_version, province, device_os, acquisition_channel, signup_month):
+    """Disbursed-loan sums per (tip, price) variant pair for one filter combination"""
+    filters = segment_filters(province, device_os, acquisition_channel, signup_month)
+    where_clause = ("WHERE " + " AND ".join(f"{dimension} = ?" for dimension in filters)) if filters else ""
+
+    conn = duckdb.connect(DATABASE_PATH, read_only=True)
+    try:
+        return fetch_frame(conn, EXPERIMENT_SUMMARY_QUERY.format(where_clause=where_clause),
+                           list(filters.values()))
+    finally:
+        conn.close()
+
+def summarize_variants(summary, group_column):
+    """Re-aggregate the variant-pair sums to one row per variant of one experiment"""
+    grouped = summary.groupby(group_column)[
+        ['loans', 'tips_taken', 'tip_amount_sum', 'tip_amount_count', 'revenue_sum', 'amount_sum', 'amount_count']
+    ].sum().reset_index()
+    grouped['avg_tip_amount'] = grouped['tip_amount_sum'] / grouped['tip_amount_count'].replace(0, np.nan)
+    grouped['avg_revenue'] = grouped['revenue_sum'] / grouped['loans']
+    grouped['avg_loan_amount'] = grouped['amount_sum'] / grouped['amount_count'].replace(0, np.nan)
+    return grouped
+
+def create_funnel_chart(funnel, title="User Funnel"):
     """Create funnel visualization"""
     funnel_metrics = {
-        'Signups': len(df),
-        'Bank Linked': df['bank_linked_flag'].sum(),
-        'Loan Requested': df['requested_loan'].sum(),
-        'Loan Approved': df['approved_loan'].sum(),
-        'Loan Disbursed': df['disbursed_loan'].sum(),
-        'Loan Repaid': df['repaid_loan'].sum()
+        'Signups': funnel['total_users'],
+        'Bank Linked': funnel['bank_linked_users'],
+        'Loan Requested': funnel['requested_users'],
+        'Loan Approved': funnel['approved_users'],
+        'Loan Disbursed': funnel['disbursed_users'],
+        'Loan Repaid': funnel['repaid_users']
     }
     
     # Calculate conversion rates
@@ -119,47 +157,34 @@ def main():
     st.title("📊 Bree Analytics Dashboard")
     st.markdown("---")
     
-    # Load data
+    # Filter options
     with st.spinner("Loading data..."):
-        funnel_df, experiment_df = load_data()
+        data_version = load_data_version()
+        options = load_filter_options(data_version)
     
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     
     # Province filter
-    provinces = ['All'] + sorted(funnel_df['province'].unique().tolist())
+    provinces = ['All'] + options['province']
     selected_province = st.sidebar.selectbox("Province", provinces)
     
     # Device OS filter
-    devices = ['All'] + sorted(funnel_df['device_os'].unique().tolist())
+    devices = ['All'] + options['device_os']
     selected_device = st.sidebar.selectbox("Device OS", devices)
     
     # Acquisition channel filter
-    channels = ['All'] + sorted(funnel_df['acquisition_channel'].unique().tolist())
+    channels = ['All'] + options['acquisition_channel']
     selected_channel = st.sidebar.selectbox("Acquisition Channel", channels)
     
     # Signup cohort filter
-    cohorts = ['All'] + sorted(funnel_df['signup_month'].unique().tolist())
+    cohorts = ['All'] + options['signup_month']
     selected_cohort = st.sidebar.selectbox("Signup Cohort", cohorts)
     
-    # Apply filters to funnel data
-    filtered_df = funnel_df.copy()
-    
-    if selected_province != 'All':
-        filtered_df = filtered_df[filtered_df['province'] == selected_province]
-    if selected_device != 'All':
-        filtered_df = filtered_df[filtered_df['device_os'] == selected_device]
-    if selected_channel != 'All':
-        filtered_df = filtered_df[filtered_df['acquisition_channel'] == selected_channel]
-    if selected_cohort != 'All':
-        filtered_df = filtered_df[filtered_df['signup_month'] == selected_cohort]
-    
-    # Apply same filters to experiment data
-    filtered_experiment_df = experiment_df.copy()
-    
-    # Get user IDs from filtered funnel data to filter experiments
-    filtered_user_ids = set(filtered_df['user_id'].tolist())
-    filtered_experiment_df = filtered_experiment_df[filtered_experiment_df['user_id'].isin(filtered_user_ids)]
+    # Filters are pushed into the aggregate-table queries; results are cached per filter tuple
+    selected = (selected_province, selected_device, selected_channel, selected_cohort)
+    funnel = load_funnel(data_version, *selected)
+    experiment_summary = load_experiment_summary(data_version, *selected)
     
     # Main dashboard
     col1, col2 = st.columns([2, 1])
@@ -167,8 +192,8 @@ def main():
     with col1:
         st.header("🔄 User Funnel Analysis")
         
-        if len(filtered_df) > 0:
-            funnel_fig, funnel_metrics = create_funnel_chart(filtered_df, "Filtered User Funnel")
+        if funnel['total_users'] > 0:
+            funnel_fig, funnel_metrics = create_funnel_chart(funnel, "Filtered User Funnel")
             st.plotly_chart(funnel_fig, use_container_width=True)
         else:
             st.warning("No data available for selected filters")
@@ -176,12 +201,12 @@ def main():
     with col2:
         st.header("📈 Key Metrics")
         
-        if len(filtered_df) > 0:
+        if funnel['total_users'] > 0:
             # Calculate conversion rates
-            total_users = len(filtered_df)
-            bank_link_rate = (filtered_df['bank_linked_flag'].sum() / total_users * 100) if total_users > 0 else 0
-            request_rate = (filtered_df['requested_loan'].sum() / total_users * 100) if total_users > 0 else 0
-            approval_rate = (filtered_df['approved_loan'].sum() / filtered_df['requested_loan'].sum() * 100) if filtered_df['requested_loan'].sum() > 0 else 0
+            total_users = funnel['total_users']
+            bank_link_rate = (funnel['bank_linked_users'] / total_users * 100) if total_users > 0 else 0
+            request_rate = (funnel['requested_users'] / total_users * 100) if total_users > 0 else 0
+            approval_rate = (funnel['approved_users'] / funnel['requested_users'] * 100) if funnel['requested_users'] > 0 else 0
             
             st.metric("Total Users", f"{total_users:,}")
             st.metric("Bank Link Rate", f"{bank_link_rate:.1f}%")
@@ -198,20 +223,22 @@ def main():
     
     col1, col2, col3, col4 = st.columns(4)
     
+    total_experiments = int(experiment_summary['loans'].sum())
+    
     with col1:
-        total_experiments = len(filtered_experiment_df)
         st.metric("Total Experiment Loans", f"{total_experiments:,}")
     
     with col2:
-        avg_revenue = filtered_experiment_df['revenue'].mean() if len(filtered_experiment_df) > 0 else 0
+        avg_revenue = experiment_summary['revenue_sum'].sum() / total_experiments if total_experiments > 0 else 0
         st.metric("Average Revenue per Loan", f"${avg_revenue:.2f}")
     
     with col3:
-        overall_tip_rate = (filtered_experiment_df['tip_taken'].sum() / len(filtered_experiment_df) * 100) if len(filtered_experiment_df) > 0 else 0
+        overall_tip_rate = (experiment_summary['tips_taken'].sum() / total_experiments * 100) if total_experiments > 0 else 0
         st.metric("Overall Tip Take Rate", f"{overall_tip_rate:.1f}%")
     
     with col4:
-        avg_loan_amount = filtered_experiment_df['amount'].mean() if len(filtered_experiment_df) > 0 else 0
+        amount_count = experiment_summary['amount_count'].sum()
+        avg_loan_amount = experiment_summary['amount_sum'].sum() / amount_count if amount_count > 0 else 0
         st.metric("Average Loan Amount", f"${avg_loan_amount:.2f}")
     
     col1, col2 = st.columns(2)
@@ -220,14 +247,11 @@ def main():
         st.subheader("💰 Tip Test Results")
         
         # Tip take rate by variant
-        tip_analysis = filtered_experiment_df.groupby('tip_test_group').agg({
-            'loan_id': 'count',
-            'tip_taken': 'sum',
-            'tip_amount': 'mean',
-            'revenue': 'mean'
-        }).reset_index()
+        tip_analysis = summarize_variants(experiment_summary, 'tip_test_group')[
+            ['tip_test_group', 'loans', 'tips_taken', 'avg_tip_amount', 'avg_revenue']
+        ]
         
-        tip_analysis['tip_take_rate'] = (tip_analysis['tip_taken'] / tip_analysis['loan_id'] * 100)
+        tip_analysis['tip_take_rate'] = (tip_analysis['tips_taken'] / tip_analysis['loans'] * 100)
         tip_analysis.columns = ['Variant', 'Total Loans', 'Tips Taken', 'Avg Tip Amount', 'Avg Revenue', 'Tip Take Rate %']
         
         st.dataframe(tip_analysis, use_container_width=True)
@@ -246,11 +270,9 @@ def main():
         st.subheader("💵 Price Test Results")
         
         # Revenue analysis by price variant
-        price_analysis = filtered_experiment_df.groupby('price_test_group').agg({
-            'loan_id': 'count',
-            'revenue': ['mean', 'sum'],
-            'amount': 'mean'
-        }).reset_index()
+        price_analysis = summarize_variants(experiment_summary, 'price_test_group')[
+            ['price_test_group', 'loans', 'avg_revenue', 'revenue_sum', 'avg_loan_amount']
+        ]
         
         price_analysis.columns = ['Variant', 'Total Loans', 'Avg Revenue', 'Total Revenue', 'Avg Loan Amount']
         
@@ -270,11 +292,10 @@ def main():
     st.subheader("📊 Combined Experiment Matrix")
     
     # Create matrix of tip variant vs price variant
-    matrix_data = filtered_experiment_df.groupby(['tip_test_group', 'price_test_group']).agg({
-        'loan_id': 'count',
-        'revenue': 'mean',
-        'tip_taken': lambda x: (x.sum() / len(x) * 100)
-    }).reset_index()
+    matrix_data = experiment_summary.assign(
+        revenue=experiment_summary['revenue_sum'] / experiment_summary['loans'],
+        tip_taken=experiment_summary['tips_taken'] / experiment_summary['loans'] * 100
+    )
     
     matrix_pivot = matrix_data.pivot(index='tip_test_group', columns='price_test_group', values='revenue')
     
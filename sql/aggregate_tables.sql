@@ -0,0 +1,140 @@
+-- ========================================================
+-- MATERIALIZED AGGREGATES FOR BREE CASE STUDY
+-- ========================================================
+-- Built by the loader after the canonical views so that
+-- dashboards and notebooks read pre-aggregated tables
+-- instead of re-running the view stack on every query.
+
+-- ========================================================
+-- Funnel Cube
+-- Depends on: v_user_funnel_base
+-- ========================================================
+-- One row per segment combination at every rollup level of
+-- province x device_os x acquisition_channel x signup month.
+-- v_user_funnel_base is one row per user, so step counts are
+-- plain sums and stay additive across any rollup.
+--
+-- grouping_id is a 4-bit mask (province, device_os,
+-- acquisition_channel, signup cohort), 1 = rolled up:
+--   0  = finest grain (same rows as v_funnel_by_segment)
+--   15 = grand total
+CREATE OR REPLACE TABLE agg_funnel_cube AS
+SELECT
+  GROUPING(province, device_os, acquisition_channel, signup_month) AS grouping_id,
+
+  province,
+  device_os,
+  acquisition_channel,
+  signup_year,
+  signup_month,
+
+  -- step counts
+  COUNT(*)                                                               AS total_users,
+  SUM(CASE WHEN first_app_open_ts  IS NOT NULL THEN 1 ELSE 0 END)::BIGINT AS app_open_users,
+  SUM(CASE WHEN did_bank_link      = 1         THEN 1 ELSE 0 END)::BIGINT AS bank_linked_users,
+  SUM(CASE WHEN first_request_ts   IS NOT NULL THEN 1 ELSE 0 END)::BIGINT AS requested_users,
+  SUM(CASE WHEN first_approved_ts  IS NOT NULL THEN 1 ELSE 0 END)::BIGINT AS approved_users,
+  SUM(CASE WHEN first_disbursed_ts IS NOT NULL THEN 1 ELSE 0 END)::BIGINT AS disbursed_users,
+  SUM(did_repay)::BIGINT                                                 AS repaid_users
+
+FROM v_user_funnel_base
+GROUP BY CUBE (province, device_os, acquisition_channel, (signup_year, signup_month))
+ORDER BY grouping_id, province, device_os, acquisition_channel, signup_year, signup_month;
+
+-- ========================================================
+-- Funnel HyperLogLog Sketches
+-- Depends on: fct_sessions, dim_users
+-- ========================================================
+-- One HLL state per funnel step (event_name) per day per
+-- segment, so distinct users for any date range and segment
+-- union are a register-wise MAX merge instead of a rescan.
+--
+-- Precision p = 12 -> m = 4096 registers, standard error
+-- 1.04 / sqrt(4096) ~= 1.6% (about +/-3.3% at 95%).
+-- A 64-bit hash(user_id) is split into a 12-bit register
+-- index and a 52-bit remainder whose leading-zero rank is
+-- kept. States are stored sparse as UINTEGER[] entries of
+-- (register_idx << 8) | rank. Sketches depend on DuckDB's
+-- hash(), so rebuild them (full reload) after upgrading DuckDB.
+
+-- floor(log2(w)) for a UBIGINT, corrected for DOUBLE rounding near powers of two
+CREATE OR REPLACE MACRO hll_floor_log2(w) AS
+  CASE
+    WHEN (1::UBIGINT << floor(log2(w::DOUBLE))::INTEGER) > w THEN floor(log2(w::DOUBLE))::INTEGER - 1
+    WHEN floor(log2(w::DOUBLE))::INTEGER < 63
+     AND (1::UBIGINT << (floor(log2(w::DOUBLE))::INTEGER + 1)) <= w THEN floor(log2(w::DOUBLE))::INTEGER + 1
+    ELSE floor(log2(w::DOUBLE))::INTEGER
+  END;
+
+-- Encoded HLL register for a 64-bit hash: (index << 8) | rank
+CREATE OR REPLACE MACRO hll_register(h) AS
+  ((h >> 52)::UINTEGER << 8)
+  | CASE
+      WHEN (h & 4503599627370495::UBIGINT) = 0 THEN 53
+      ELSE 52 - hll_floor_log2(h & 4503599627370495::UBIGINT)
+    END::UINTEGER;
+
+CREATE OR REPLACE TABLE agg_funnel_hll AS
+WITH registers AS (
+  SELECT
+    CAST(s.ts AS DATE)       AS event_date,
+    s.event_name             AS step,
+    u.province,
+    u.device_os,
+    u.acquisition_channel,
+    hll_register(hash(s.user_id)) AS register
+  FROM fct_sessions s
+  JOIN dim_users u USING (user_id)
+),
+register_max AS (
+  SELECT
+    event_date, step, province, device_os, acquisition_channel,
+    register >> 8                   AS register_idx,
+    MAX(register & 255::UINTEGER)   AS register_rank
+  FROM registers
+  GROUP BY ALL
+)
+SELECT
+  event_date,
+  step,
+  province,
+  device_os,
+  acquisition_channel,
+  LIST((register_idx << 8) | register_rank ORDER BY register_idx) AS hll_registers
+FROM register_max
+GROUP BY event_date, step, province, device_os, acquisition_channel
+ORDER BY event_date, step, province, device_os, acquisition_channel;
+
+-- ========================================================
+-- Experiment Segment Aggregates
+-- Depends on: v_fct_loans_clean, v_user_experiment_assignments, v_dim_users_clean
+-- ========================================================
+-- Disbursed-loan sums per user segment and experiment variant
+-- pair. Every column is additive, so the dashboard filters a
+-- segment with a WHERE clause and re-aggregates by variant
+-- instead of loading loans. Means are stored as sum + count
+-- (NULL amounts are excluded, as in AVG).
+CREATE OR REPLACE TABLE agg_experiment_segments AS
+SELECT
+  u.province,
+  u.device_os,
+  u.acquisition_channel,
+  u.signup_year,
+  u.signup_month,
+  e.tip_test_group,
+  e.price_test_group,
+
+  COUNT(*)                                                  AS loans,
+  SUM(CASE WHEN l.tip_amount > 0 THEN 1 ELSE 0 END)::BIGINT AS tips_taken,
+  SUM(l.tip_amount)                                         AS tip_amount_sum,
+  COUNT(l.tip_amount)                                       AS tip_amount_count,
+  SUM(l.revenue)                                            AS revenue_sum,
+  SUM(l.amount)                                             AS amount_sum,
+  COUNT(l.amount)                                           AS amount_count
+
+FROM v_fct_loans_clean l
+JOIN v_user_experiment_assignments e ON l.user_id = e.user_id
+JOIN v_dim_users_clean u             ON l.user_id = u.user_id
+WHERE l.is_disbursed = 1
+GROUP BY ALL
+ORDER BY ALL;
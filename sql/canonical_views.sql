@@ -147,9 +147,8 @@ SELECT
   CASE WHEN event_name = 'approved'              THEN 1 ELSE 0 END AS is_approved_event,
   CASE WHEN event_name = 'disbursed'             THEN 1 ELSE 0 END AS is_disbursed_event,
   -- event sequencing per user
-  ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY ts) AS event_order,
-  CASE WHEN ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY ts) = 1
-       THEN 1 ELSE 0 END AS is_first_event,
+  ROW_NUMBER() OVER (PARTITION BY s.user_id ORDER BY ts) AS event_order,
+  CASE WHEN event_order = 1 THEN 1 ELSE 0 END AS is_first_event,
   -- screen categorization
   CASE
     WHEN screen ILIKE '%onboarding%' THEN 'onboarding'
@@ -157,22 +156,22 @@ SELECT
     WHEN screen ILIKE '%home%'       THEN 'home'
     ELSE 'other'
   END AS screen_bucket,
-  -- session duration (in seconds)
-  (EXTRACT(EPOCH FROM (MAX(ts) OVER (PARTITION BY session_id)
-                     - MIN(ts) OVER (PARTITION BY session_id)))) AS session_duration_sec,
-  COUNT(*) OVER (PARTITION BY session_id) AS events_per_session
-FROM fct_sessions s;
+  -- session duration (in seconds), precomputed at load time
+  r.session_duration_sec,
+  r.event_count AS events_per_session
+FROM fct_sessions s
+LEFT JOIN fct_session_rollup r ON s.session_id = r.session_id;
 
 -- ========================================================
 -- Canonical View: User-level Funnel Base
 -- ========================================================
 CREATE OR REPLACE VIEW v_user_funnel_base AS
 WITH user_first_app_open AS (
+  -- maintained by the loader, so the funnel never scans raw events
   SELECT
-    s.user_id,
-    MIN(CASE WHEN is_app_open = 1 THEN ts_utc END) AS first_app_open_ts
-  FROM v_fct_sessions_clean s
-  GROUP BY s.user_id
+    f.user_id,
+    f.first_app_open_ts AT TIME ZONE 'UTC' AS first_app_open_ts
+  FROM dim_user_first_events f
 ),
 user_bank_link AS (
   SELECT
@@ -189,7 +188,8 @@ user_loan_steps AS (
     MIN(l.approved_at_utc)    AS first_approved_ts,
     MIN(l.disbursed_at_utc)   AS first_disbursed_ts,
     MAX(l.is_approved)        AS any_approved,
-    MAX(l.is_disbursed)       AS any_disbursed
+    MAX(l.is_disbursed)       AS any_disbursed,
+    MAX(l.is_repaid)          AS any_repaid
   FROM v_fct_loans_clean l
   GROUP BY l.user_id
 ),
@@ -223,7 +223,8 @@ SELECT
   COALESCE(b.bank_linked_flag, 0)                             AS did_bank_link,
   CASE WHEN l.first_request_ts   IS NOT NULL THEN 1 ELSE 0 END AS did_request,
   CASE WHEN l.first_approved_ts  IS NOT NULL OR l.any_approved  = 1 THEN 1 ELSE 0 END AS did_approve,
-  CASE WHEN l.first_disbursed_ts IS NOT NULL OR l.any_disbursed = 1 THEN 1 ELSE 0 END AS did_disburse
+  CASE WHEN l.first_disbursed_ts IS NOT NULL OR l.any_disbursed = 1 THEN 1 ELSE 0 END AS did_disburse,
+  COALESCE(l.any_repaid, 0)                                   AS did_repay
 
 FROM seg s
 LEFT JOIN user_first_app_open a ON s.user_id = a.user_id
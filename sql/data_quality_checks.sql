@@ -158,272 +158,91 @@ FROM base_counts b
 FULL OUTER JOIN clean_view_counts v ON b.table_name = v.table_name;
 
 -- ========================================================
--- 2. NOT NULL EXPECTATIONS FOR KEYS
+-- DQ CHECK STATE (persists across runs)
 -- ========================================================
-
-CREATE OR REPLACE VIEW dq_null_key_checks AS
--- Users table key checks
-SELECT 
-  'v_dim_users_clean' as table_name,
-  'user_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(user_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_dim_users_clean
-UNION ALL
--- Transactions table key checks
-SELECT 
-  'v_fct_transactions_clean' as table_name,
-  'txn_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(txn_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(txn_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_fct_transactions_clean
-UNION ALL
-SELECT 
-  'v_fct_transactions_clean' as table_name,
-  'user_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(user_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_fct_transactions_clean
-UNION ALL
--- Loans table key checks
-SELECT 
-  'v_fct_loans_clean' as table_name,
-  'loan_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(loan_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(loan_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_fct_loans_clean
-UNION ALL
-SELECT 
-  'v_fct_loans_clean' as table_name,
-  'user_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(user_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_fct_loans_clean
-UNION ALL
--- Sessions table key checks
-SELECT 
-  'v_fct_sessions_clean' as table_name,
-  'event_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(event_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(event_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_fct_sessions_clean
-UNION ALL
-SELECT 
-  'v_fct_sessions_clean' as table_name,
-  'user_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(user_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_fct_sessions_clean
-UNION ALL
--- A/B assignments key checks
-SELECT 
-  'v_ab_assignments_clean' as table_name,
-  'assignment_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(assignment_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(assignment_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_ab_assignments_clean
-UNION ALL
-SELECT 
-  'v_ab_assignments_clean' as table_name,
-  'user_id' as key_column,
-  COUNT(*) as total_rows,
-  COUNT(*) - COUNT(user_id) as null_count,
-  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
-FROM v_ab_assignments_clean;
+-- Latest totals per row-level rule and the base-table rowid
+-- watermark they cover, so incremental runs only evaluate
+-- rows loaded since. Dropped with the schema on a full reload.
+CREATE TABLE IF NOT EXISTS dq_check_state (
+  category TEXT,
+  check_name TEXT,
+  table_name TEXT,
+  watermark BIGINT,
+  total_rows BIGINT,
+  violation_count BIGINT,
+  status TEXT,
+  validated_at TIMESTAMP,
+  PRIMARY KEY (category, check_name, table_name)
+);
 
 -- ========================================================
--- 3. REFERENTIAL INTEGRITY (ORPHAN DETECTION)
+-- DQ RESULTS HISTORY (persists across runs and reloads)
 -- ========================================================
+-- One row per check per run, appended by the runner. Not part
+-- of drop_schema so trends survive full reloads; rows arrive in
+-- run order, so per-check trend scans stay small.
+CREATE TABLE IF NOT EXISTS dq_results_history (
+  run_id TEXT,
+  run_ts TIMESTAMP,
+  category TEXT,
+  check_name TEXT,
+  table_name TEXT,
+  total_rows BIGINT,
+  violation_count BIGINT,
+  status TEXT,
+  sampled_run BOOLEAN,
+  PRIMARY KEY (run_id, category, check_name, table_name)
+);
 
-CREATE OR REPLACE VIEW dq_referential_integrity AS
--- Orphaned transactions (user_id not in users table)
-SELECT 
-  'transactions_orphans' as check_name,
-  COUNT(*) as orphan_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
-FROM v_fct_transactions_clean t
-LEFT JOIN v_dim_users_clean u ON t.user_id = u.user_id
-WHERE u.user_id IS NULL
-UNION ALL
--- Orphaned loans (user_id not in users table)
-SELECT 
-  'loans_orphans' as check_name,
-  COUNT(*) as orphan_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
-FROM v_fct_loans_clean l
-LEFT JOIN v_dim_users_clean u ON l.user_id = u.user_id
-WHERE u.user_id IS NULL
-UNION ALL
--- Orphaned sessions (user_id not in users table)
-SELECT 
-  'sessions_orphans' as check_name,
-  COUNT(*) as orphan_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
-FROM v_fct_sessions_clean s
-LEFT JOIN v_dim_users_clean u ON s.user_id = u.user_id
-WHERE u.user_id IS NULL
-UNION ALL
--- Orphaned A/B assignments (user_id not in users table)
-SELECT 
-  'ab_assignments_orphans' as check_name,
-  COUNT(*) as orphan_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
-FROM v_ab_assignments_clean a
-LEFT JOIN v_dim_users_clean u ON a.user_id = u.user_id
-WHERE u.user_id IS NULL;
+-- Each result against the rolling baseline of the same check's
+-- previous 14 exact (non-sampled) runs. A count is anomalous when
+-- at least 5 baseline runs exist and it deviates from the baseline
+-- mean by more than 3 standard deviations and more than 1% of the
+-- mean (any change at all for counts that have been constant).
+CREATE OR REPLACE VIEW dq_results_trend AS
+WITH baseline AS (
+  SELECT
+    h.*,
+    COUNT(*) OVER w                    AS baseline_runs,
+    AVG(violation_count) OVER w        AS baseline_violation_count,
+    STDDEV_SAMP(violation_count) OVER w AS violation_count_stddev,
+    AVG(total_rows) OVER w             AS baseline_total_rows,
+    STDDEV_SAMP(total_rows) OVER w     AS total_rows_stddev
+  FROM dq_results_history h
+  WHERE NOT sampled_run
+  WINDOW w AS (
+    PARTITION BY category, check_name, table_name
+    ORDER BY run_ts
+    ROWS BETWEEN 14 PRECEDING AND 1 PRECEDING
+  )
+)
+SELECT
+  *,
+  COALESCE(baseline_runs >= 5
+    AND ABS(violation_count - baseline_violation_count)
+        > GREATEST(3 * COALESCE(violation_count_stddev, 0), 0.01 * baseline_violation_count),
+    FALSE) AS violation_count_anomaly,
+  COALESCE(baseline_runs >= 5
+    AND ABS(total_rows - baseline_total_rows)
+        > GREATEST(3 * COALESCE(total_rows_stddev, 0), 0.01 * baseline_total_rows),
+    FALSE) AS total_rows_anomaly
+FROM baseline;
 
 -- ========================================================
--- 4. DISTRIBUTION CHECKS & ANALYTICAL VALIDATIONS
+-- 2-3. ROW-LEVEL RULES (NOT NULL KEYS, REFERENTIAL INTEGRITY,
+--      VALIDATIONS, BUSINESS RULES)
 -- ========================================================
+-- Declared in src/dq_rules.py and created by DataQualityRunner
+-- before this script runs: dq_rule_results scans each canonical
+-- view once with COUNT(*) FILTER (WHERE ...) per rule, and
+-- dq_null_key_checks, dq_referential_integrity,
+-- dq_transaction_validations, dq_loan_validations,
+-- dq_user_validations, dq_session_validations,
+-- dq_ab_test_validations and dq_business_rules reshape it.
 
--- Transaction amount and direction validations
-CREATE OR REPLACE VIEW dq_transaction_validations AS
--- Negative amounts should only be in outflows
-SELECT 
-  'negative_amounts_in_inflows' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_transactions_clean
-WHERE direction = 'inflow' AND amount < 0
-UNION ALL
--- Positive amounts should not be in outflows (unless zero)
-SELECT 
-  'positive_amounts_in_outflows' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_transactions_clean
-WHERE direction = 'outflow' AND amount > 0
-UNION ALL
--- Zero amounts check
-SELECT 
-  'zero_amounts' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'WARN' END as validation_check
-FROM v_fct_transactions_clean
-WHERE amount = 0
-UNION ALL
--- Extreme amounts (> $10,000)
-SELECT 
-  'extreme_amounts' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) < (SELECT COUNT(*) * 0.01 FROM v_fct_transactions_clean) THEN 'PASS' ELSE 'WARN' END as validation_check
-FROM v_fct_transactions_clean
-WHERE ABS(amount) > 10000;
-
--- Loan amount and status validations
-CREATE OR REPLACE VIEW dq_loan_validations AS
--- Loan amounts should be positive
-SELECT 
-  'negative_loan_amounts' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_loans_clean
-WHERE amount <= 0
-UNION ALL
--- Approved loans should have approval timestamp
-SELECT 
-  'approved_without_timestamp' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_loans_clean
-WHERE is_approved = 1 AND approved_at_utc IS NULL
-UNION ALL
--- Disbursed loans should have disbursement timestamp
-SELECT 
-  'disbursed_without_timestamp' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_loans_clean
-WHERE is_disbursed = 1 AND disbursed_at_utc IS NULL
-UNION ALL
--- Repaid loans should have repayment timestamp
-SELECT 
-  'repaid_without_timestamp' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_loans_clean
-WHERE is_repaid = 1 AND repaid_at_utc IS NULL
-UNION ALL
--- Loan lifecycle order validation (requested < approved < disbursed)
-SELECT 
-  'invalid_loan_lifecycle_order' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_loans_clean
-WHERE (approved_at_utc IS NOT NULL AND approved_at_utc < requested_at_utc)
-   OR (disbursed_at_utc IS NOT NULL AND approved_at_utc IS NOT NULL AND disbursed_at_utc < approved_at_utc)
-   OR (disbursed_at_utc IS NOT NULL AND disbursed_at_utc < requested_at_utc);
-
--- User signup and bank linking validations
-CREATE OR REPLACE VIEW dq_user_validations AS
--- Bank linked timestamp should be after signup
-SELECT 
-  'bank_linked_before_signup' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_dim_users_clean
-WHERE bank_linked_at_utc IS NOT NULL 
-  AND bank_linked_at_utc < signup_at_utc
-UNION ALL
--- Risk score should be between 0 and 1
-SELECT 
-  'invalid_risk_scores' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_dim_users_clean
-WHERE baseline_risk_score < 0 OR baseline_risk_score > 1
-UNION ALL
--- Days to bank connect should be non-negative
-SELECT 
-  'negative_days_to_bank_connect' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_dim_users_clean
-WHERE days_taken_signup_bank_connect < 0;
-
--- Session and event validations
-CREATE OR REPLACE VIEW dq_session_validations AS
--- Session duration should be non-negative
-SELECT 
-  'negative_session_duration' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_fct_sessions_clean
-WHERE session_duration_sec < 0
-UNION ALL
--- Events per session should be positive
-SELECT 
-  'zero_events_per_session' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'WARN' END as validation_check
-FROM v_fct_sessions_clean
-WHERE events_per_session <= 0;
-
--- A/B test assignment validations
-CREATE OR REPLACE VIEW dq_ab_test_validations AS
--- Assignment timestamp should be reasonable (not in future, not too old)
-SELECT 
-  'future_assignment_dates' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
-FROM v_ab_assignments_clean
-WHERE assigned_at_utc > CURRENT_TIMESTAMP
-UNION ALL
--- Experiment variants should be valid
-SELECT 
-  'invalid_experiment_variants' as check_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'WARN' END as validation_check
-FROM v_ab_assignments_clean
-WHERE variant_norm NOT IN ('control', 'treatment', 'variant_a', 'variant_b', 'low', 'high', 'enabled', 'disabled');
+-- ========================================================
+-- 4. DISTRIBUTION CHECKS & ANALYTICAL VALIDATIONS
+-- ========================================================
 
 -- Distribution checks
 CREATE OR REPLACE VIEW dq_distribution_checks AS
@@ -494,64 +313,6 @@ SELECT
 FROM v_user_funnel_base
 WHERE first_approved_ts IS NOT NULL;
 
--- Business rule validations
-CREATE OR REPLACE VIEW dq_business_rules AS
--- Check for negative loan amounts
-SELECT 
-  'loans_negative_amounts' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_fct_loans_clean
-WHERE amount <= 0
-UNION ALL
--- Check for future loan request dates
-SELECT 
-  'loans_future_request_dates' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_fct_loans_clean
-WHERE requested_at_utc > CURRENT_TIMESTAMP
-UNION ALL
--- Check for disbursed loans without disbursement dates
-SELECT 
-  'disbursed_loans_no_disbursement_date' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_fct_loans_clean
-WHERE is_disbursed = 1 AND disbursed_at_utc IS NULL
-UNION ALL
--- Check for repaid loans without repayment dates
-SELECT 
-  'repaid_loans_no_repayment_date' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_fct_loans_clean
-WHERE is_repaid = 1 AND repaid_at_utc IS NULL
-UNION ALL
--- Check for transactions with zero amounts
-SELECT 
-  'transactions_zero_amounts' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_fct_transactions_clean
-WHERE amount = 0
-UNION ALL
--- Check for users with future signup dates
-SELECT 
-  'users_future_signup_dates' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_dim_users_clean
-WHERE signup_at_utc > CURRENT_TIMESTAMP
-UNION ALL
--- Check for experiment assignment integrity
-SELECT 
-  'experiment_assignments_future_dates' as rule_name,
-  COUNT(*) as violation_count,
-  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
-FROM v_ab_assignments_clean
-WHERE assigned_at_utc > CURRENT_TIMESTAMP;
-
 -- ========================================================
 -- SUMMARY DATA QUALITY REPORT
 -- ========================================================
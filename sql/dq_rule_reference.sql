@@ -0,0 +1,328 @@
+-- ========================================================
+-- HAND-WRITTEN REFERENCE FOR THE COMPILED DQ RULES
+-- ========================================================
+-- The row-level check views as they were written before the rules moved to
+-- src/dq_rules.py, kept as one query per check. Not loaded by the pipeline,
+-- project_test_runner creates them as TEMP views and compares each with the
+-- compiled category view of the same name without the reference_ prefix.
+
+CREATE OR REPLACE TEMP VIEW dq_reference_null_key_checks AS
+-- Users table key checks
+SELECT 
+  'v_dim_users_clean' as table_name,
+  'user_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(user_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_dim_users_clean
+UNION ALL
+-- Transactions table key checks
+SELECT 
+  'v_fct_transactions_clean' as table_name,
+  'txn_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(txn_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(txn_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_fct_transactions_clean
+UNION ALL
+SELECT 
+  'v_fct_transactions_clean' as table_name,
+  'user_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(user_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_fct_transactions_clean
+UNION ALL
+-- Loans table key checks
+SELECT 
+  'v_fct_loans_clean' as table_name,
+  'loan_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(loan_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(loan_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_fct_loans_clean
+UNION ALL
+SELECT 
+  'v_fct_loans_clean' as table_name,
+  'user_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(user_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_fct_loans_clean
+UNION ALL
+-- Sessions table key checks
+SELECT 
+  'v_fct_sessions_clean' as table_name,
+  'event_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(event_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(event_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_fct_sessions_clean
+UNION ALL
+SELECT 
+  'v_fct_sessions_clean' as table_name,
+  'user_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(user_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_fct_sessions_clean
+UNION ALL
+-- A/B assignments key checks
+SELECT 
+  'v_ab_assignments_clean' as table_name,
+  'assignment_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(assignment_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(assignment_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_ab_assignments_clean
+UNION ALL
+SELECT 
+  'v_ab_assignments_clean' as table_name,
+  'user_id' as key_column,
+  COUNT(*) as total_rows,
+  COUNT(*) - COUNT(user_id) as null_count,
+  CASE WHEN COUNT(*) - COUNT(user_id) = 0 THEN 'PASS' ELSE 'FAIL' END as null_check
+FROM v_ab_assignments_clean;
+
+-- ========================================================
+-- 3. REFERENTIAL INTEGRITY (ORPHAN DETECTION)
+-- ========================================================
+
+CREATE OR REPLACE TEMP VIEW dq_reference_referential_integrity AS
+-- Orphaned transactions (user_id not in users table)
+SELECT 
+  'transactions_orphans' as check_name,
+  COUNT(*) as orphan_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
+FROM v_fct_transactions_clean t
+LEFT JOIN v_dim_users_clean u ON t.user_id = u.user_id
+WHERE u.user_id IS NULL
+UNION ALL
+-- Orphaned loans (user_id not in users table)
+SELECT 
+  'loans_orphans' as check_name,
+  COUNT(*) as orphan_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
+FROM v_fct_loans_clean l
+LEFT JOIN v_dim_users_clean u ON l.user_id = u.user_id
+WHERE u.user_id IS NULL
+UNION ALL
+-- Orphaned sessions (user_id not in users table)
+SELECT 
+  'sessions_orphans' as check_name,
+  COUNT(*) as orphan_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
+FROM v_fct_sessions_clean s
+LEFT JOIN v_dim_users_clean u ON s.user_id = u.user_id
+WHERE u.user_id IS NULL
+UNION ALL
+-- Orphaned A/B assignments (user_id not in users table)
+SELECT 
+  'ab_assignments_orphans' as check_name,
+  COUNT(*) as orphan_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as integrity_check
+FROM v_ab_assignments_clean a
+LEFT JOIN v_dim_users_clean u ON a.user_id = u.user_id
+WHERE u.user_id IS NULL;
+
+CREATE OR REPLACE TEMP VIEW dq_reference_transaction_validations AS
+-- Negative amounts should only be in outflows
+SELECT 
+  'negative_amounts_in_inflows' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_transactions_clean
+WHERE direction = 'inflow' AND amount < 0
+UNION ALL
+-- Positive amounts should not be in outflows (unless zero)
+SELECT 
+  'positive_amounts_in_outflows' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_transactions_clean
+WHERE direction = 'outflow' AND amount > 0
+UNION ALL
+-- Zero amounts check
+SELECT 
+  'zero_amounts' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'WARN' END as validation_check
+FROM v_fct_transactions_clean
+WHERE amount = 0
+UNION ALL
+-- Extreme amounts (> $10,000)
+SELECT 
+  'extreme_amounts' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) < (SELECT COUNT(*) * 0.01 FROM v_fct_transactions_clean) THEN 'PASS' ELSE 'WARN' END as validation_check
+FROM v_fct_transactions_clean
+WHERE ABS(amount) > 10000;
+
+-- Loan amount and status validations
+CREATE OR REPLACE TEMP VIEW dq_reference_loan_validations AS
+-- Loan amounts should be positive
+SELECT 
+  'negative_loan_amounts' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_loans_clean
+WHERE amount <= 0
+UNION ALL
+-- Approved loans should have approval timestamp
+SELECT 
+  'approved_without_timestamp' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_loans_clean
+WHERE is_approved = 1 AND approved_at_utc IS NULL
+UNION ALL
+-- Disbursed loans should have disbursement timestamp
+SELECT 
+  'disbursed_without_timestamp' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_loans_clean
+WHERE is_disbursed = 1 AND disbursed_at_utc IS NULL
+UNION ALL
+-- Repaid loans should have repayment timestamp
+SELECT 
+  'repaid_without_timestamp' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_loans_clean
+WHERE is_repaid = 1 AND repaid_at_utc IS NULL
+UNION ALL
+-- Loan lifecycle order validation (requested < approved < disbursed)
+SELECT 
+  'invalid_loan_lifecycle_order' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_loans_clean
+WHERE (approved_at_utc IS NOT NULL AND approved_at_utc < requested_at_utc)
+   OR (disbursed_at_utc IS NOT NULL AND approved_at_utc IS NOT NULL AND disbursed_at_utc < approved_at_utc)
+   OR (disbursed_at_utc IS NOT NULL AND disbursed_at_utc < requested_at_utc);
+
+-- User signup and bank linking validations
+CREATE OR REPLACE TEMP VIEW dq_reference_user_validations AS
+-- Bank linked timestamp should be after signup
+SELECT 
+  'bank_linked_before_signup' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_dim_users_clean
+WHERE bank_linked_at_utc IS NOT NULL 
+  AND bank_linked_at_utc < signup_at_utc
+UNION ALL
+-- Risk score should be between 0 and 1
+SELECT 
+  'invalid_risk_scores' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_dim_users_clean
+WHERE baseline_risk_score < 0 OR baseline_risk_score > 1
+UNION ALL
+-- Days to bank connect should be non-negative
+SELECT 
+  'negative_days_to_bank_connect' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_dim_users_clean
+WHERE days_taken_signup_bank_connect < 0;
+
+-- Session and event validations
+CREATE OR REPLACE TEMP VIEW dq_reference_session_validations AS
+-- Session duration should be non-negative
+SELECT 
+  'negative_session_duration' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_fct_sessions_clean
+WHERE session_duration_sec < 0
+UNION ALL
+-- Events per session should be positive
+SELECT 
+  'zero_events_per_session' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'WARN' END as validation_check
+FROM v_fct_sessions_clean
+WHERE events_per_session <= 0;
+
+-- A/B test assignment validations
+CREATE OR REPLACE TEMP VIEW dq_reference_ab_test_validations AS
+-- Assignment timestamp should be reasonable (not in future, not too old)
+SELECT 
+  'future_assignment_dates' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as validation_check
+FROM v_ab_assignments_clean
+WHERE assigned_at_utc > CURRENT_TIMESTAMP
+UNION ALL
+-- Experiment variants should be valid
+SELECT 
+  'invalid_experiment_variants' as check_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'WARN' END as validation_check
+FROM v_ab_assignments_clean
+WHERE variant_norm NOT IN ('control', 'treatment', 'variant_a', 'variant_b', 'low', 'high', 'enabled', 'disabled');
+
+
+CREATE OR REPLACE TEMP VIEW dq_reference_business_rules AS
+-- Check for negative loan amounts
+SELECT 
+  'loans_negative_amounts' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_fct_loans_clean
+WHERE amount <= 0
+UNION ALL
+-- Check for future loan request dates
+SELECT 
+  'loans_future_request_dates' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_fct_loans_clean
+WHERE requested_at_utc > CURRENT_TIMESTAMP
+UNION ALL
+-- Check for disbursed loans without disbursement dates
+SELECT 
+  'disbursed_loans_no_disbursement_date' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_fct_loans_clean
+WHERE is_disbursed = 1 AND disbursed_at_utc IS NULL
+UNION ALL
+-- Check for repaid loans without repayment dates
+SELECT 
+  'repaid_loans_no_repayment_date' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_fct_loans_clean
+WHERE is_repaid = 1 AND repaid_at_utc IS NULL
+UNION ALL
+-- Check for transactions with zero amounts
+SELECT 
+  'transactions_zero_amounts' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_fct_transactions_clean
+WHERE amount = 0
+UNION ALL
+-- Check for users with future signup dates
+SELECT 
+  'users_future_signup_dates' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_dim_users_clean
+WHERE signup_at_utc > CURRENT_TIMESTAMP
+UNION ALL
+-- Check for experiment assignment integrity
+SELECT 
+  'experiment_assignments_future_dates' as rule_name,
+  COUNT(*) as violation_count,
+  CASE WHEN COUNT(*) = 0 THEN 'PASS' ELSE 'FAIL' END as rule_check
+FROM v_ab_assignments_clean
+WHERE assigned_at_utc > CURRENT_TIMESTAMP;
+
+-- ========================================================
+-- SUMMARY DATA QUALITY REPORT
+-- ========================================================
@@ -1,6 +1,34 @@
 -- Drop tables if they exist (in reverse dependency order)
+DROP TABLE IF EXISTS dq_check_state;
+DROP TABLE IF EXISTS meta_table_ordering;
+DROP TABLE IF EXISTS meta_data_version;
+DROP TABLE IF EXISTS meta_incremental_state;
+DROP TABLE IF EXISTS fct_metrics_daily;
+DROP TABLE IF EXISTS agg_loan_quantile_sketches;
+DROP TABLE IF EXISTS fct_risk_scores;
+DROP TABLE IF EXISTS fct_risk_model_base;
+DROP TABLE IF EXISTS fct_risk_model_base_staging;
+DROP TABLE IF EXISTS agg_funnel_cube;
+DROP TABLE IF EXISTS agg_funnel_hll;
+DROP TABLE IF EXISTS agg_experiment_segments;
 DROP TABLE IF EXISTS ab_assignments;
 DROP TABLE IF EXISTS fct_loans;
 DROP TABLE IF EXISTS fct_transactions;
+DROP TABLE IF EXISTS dim_user_first_events;
+DROP TABLE IF EXISTS fct_session_rollup;
 DROP TABLE IF EXISTS fct_sessions;
 DROP TABLE IF EXISTS dim_users;
+
+-- ENUM types created by the loader's typed schema (after the tables that use them)
+DROP TYPE IF EXISTS province_enum;
+DROP TYPE IF EXISTS device_os_enum;
+DROP TYPE IF EXISTS acquisition_channel_enum;
+DROP TYPE IF EXISTS payroll_frequency_enum;
+DROP TYPE IF EXISTS fico_band_enum;
+DROP TYPE IF EXISTS event_name_enum;
+DROP TYPE IF EXISTS screen_enum;
+DROP TYPE IF EXISTS direction_enum;
+DROP TYPE IF EXISTS category_enum;
+DROP TYPE IF EXISTS status_enum;
+DROP TYPE IF EXISTS price_variant_enum;
+DROP TYPE IF EXISTS tip_variant_enum;
@@ -19,7 +19,30 @@ CREATE TABLE fct_sessions (
   ts TIMESTAMP,
   event_name TEXT,
   screen TEXT,
-  properties_json TEXT
+  properties MAP(VARCHAR, VARCHAR)  -- parsed from properties_json at load, NULL when empty, malformed or not an object
+);
+
+-- session rollup (one row per session, maintained by the loader on every fct_sessions load)
+CREATE TABLE fct_session_rollup (
+  session_id TEXT PRIMARY KEY,
+  user_id INTEGER,
+  session_start_ts TIMESTAMP,
+  session_end_ts TIMESTAMP,
+  session_duration_sec DOUBLE,
+  event_count BIGINT,
+  funnel_step_mask INTEGER
+);
+
+-- user first events (maintained by the loader on every fct_sessions load)
+CREATE TABLE dim_user_first_events (
+  user_id INTEGER PRIMARY KEY,
+  first_event_ts TIMESTAMP,
+  first_app_open_ts TIMESTAMP,
+  first_bank_link_ts TIMESTAMP,
+  first_request_start_ts TIMESTAMP,
+  first_request_submit_ts TIMESTAMP,
+  first_approved_event_ts TIMESTAMP,
+  first_disbursed_event_ts TIMESTAMP
 );
 
 -- transactions
@@ -66,3 +89,48 @@ CREATE TABLE ab_assignments (
   variant TEXT,
   assigned_at TIMESTAMP
 );
+
+-- physical row ordering of fact tables written with the loader's cluster_facts option
+CREATE TABLE meta_table_ordering (
+  table_name TEXT PRIMARY KEY,
+  sort_keys TEXT,
+  sorted_at TIMESTAMP
+);
+
+-- additive daily loan metrics per segment, maintained by src/metrics_timeseries.py
+CREATE TABLE fct_metrics_daily (
+  metric_date DATE,
+  province TEXT,
+  device_os TEXT,
+  acquisition_channel TEXT,
+  metric TEXT,
+  numerator DOUBLE,
+  denominator DOUBLE,
+  PRIMARY KEY (metric_date, province, device_os, acquisition_channel, metric)
+);
+
+-- per-day log-bucketed quantile sketches of loan measures, maintained with fct_metrics_daily
+CREATE TABLE agg_loan_quantile_sketches (
+  metric_date DATE,
+  province TEXT,
+  device_os TEXT,
+  acquisition_channel TEXT,
+  measure TEXT,
+  buckets INTEGER[],
+  counts BIGINT[],
+  PRIMARY KEY (metric_date, province, device_os, acquisition_channel, measure)
+);
+
+-- data version stamps: one row per load or append, the latest is current
+CREATE TABLE meta_data_version (
+  data_version TEXT PRIMARY KEY,
+  stamped_at TIMESTAMP,
+  source TEXT
+);
+
+-- rowid watermarks of tables maintained incrementally from appended fact rows
+CREATE TABLE meta_incremental_state (
+  target TEXT PRIMARY KEY,
+  watermark BIGINT,
+  updated_at TIMESTAMP
+);
@@ -0,0 +1,94 @@
+"""
+Shared query helpers that move DuckDB results through Arrow.
+
+``fetch_frame`` is the drop-in replacement for ``conn.execute(sql).fetchdf()``:
+DuckDB hands the result over as an Arrow table and text columns stay
+Arrow-backed (``string[pyarrow]``) instead of being materialized as Python
+string objects. Numeric columns convert to NumPy without a copy when they have
+no NULLs. DECIMAL and HUGEINT results (e.g. SUM of an integer column) arrive as
+Arrow decimals and are cast to float64, matching fetchdf(), instead of becoming
+columns of decimal.Decimal objects. When pyarrow is not installed, fetch_frame
+falls back to fetchdf().
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import duckdb
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow ships with streamlit, optional elsewhere
+    pa = None
+
+
+def arrow_available() -> bool:
+    """True when pyarrow is importable and Arrow transport is used."""
+    return pa is not None
+
+
+def fetch_arrow(conn: duckdb.DuckDBPyConnection, query: str,
+                params: Optional[Sequence[Any]] = None) -> "pa.Table":
+    """
+    Run a query and return the result as a pyarrow Table.
+
+    Args:
+        conn: DuckDB connection or cursor
+        query: SQL text
+        params: Bound parameter values
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    if pa is None:
+        raise ImportError("fetch_arrow requires pyarrow (pip install pyarrow)")
+    return conn.execute(query, params or []).fetch_arrow_table()
+
+
+def _arrow_dtype(arrow_type: "pa.DataType") -> Optional[Any]:
+    """pandas dtype for an Arrow column: Arrow-backed strings, default conversion otherwise."""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def arrow_to_frame(table: "pa.Table") -> pd.DataFrame:
+    """Convert an Arrow table to pandas, keeping text columns Arrow-backed and decimals as float64."""
+    schema = pa.schema([
+        field.with_type(pa.float64()) if pa.types.is_decimal(field.type) else field
+        for field in table.schema
+    ])
+    if not schema.equals(table.schema):
+        table = table.cast(schema)
+    return table.to_pandas(types_mapper=_arrow_dtype)
+
+
+def fetch_frame(conn: duckdb.DuckDBPyConnection, query: str,
+                params: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+    """
+    Run a query and return a DataFrame via Arrow (see module docstring).
+
+    Args:
+        conn: DuckDB connection or cursor
+        query: SQL text
+        params: Bound parameter values
+    """
+    if pa is None:
+        return conn.execute(query, params or []).fetchdf()
+    return arrow_to_frame(fetch_arrow(conn, query, params))
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    ``frame.to_dict('records')`` with missing text values as None.
+
+    Arrow-backed string columns mark missing values with pd.NA, which JSON
+    reports cannot serialize; other columns convert exactly as to_dict does.
+    """
+    text_columns = [column for column, dtype in frame.dtypes.items() if isinstance(dtype, pd.StringDtype)]
+    if not text_columns:
+        return frame.to_dict('records')
+    converted = frame.astype({column: object for column in text_columns})
+    for column in text_columns:
+        converted[column] = converted[column].where(converted[column].notna(), None)
+    return converted.to_dict('records')
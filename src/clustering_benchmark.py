@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Clustered Fact Storage Benchmark
+Loads the CSVs twice (CSV order vs. sorted by user and time) and times window
+queries and per-user lookups against both databases.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import duckdb
+
+from duckdb_pipeline import DuckDBLoader
+
+BENCHMARK_QUERIES = {
+    "per_user_transactions": """
+        SELECT COUNT(*), SUM(amount) FROM fct_transactions WHERE user_id = {user_id}
+    """,
+    "per_user_sessions": """
+        SELECT COUNT(*), MIN(ts), MAX(ts) FROM fct_sessions WHERE user_id = {user_id}
+    """,
+    "per_user_loans": """
+        SELECT COUNT(*), SUM(amount) FROM fct_loans WHERE user_id = {user_id}
+    """,
+    "session_event_order": """
+        SELECT SUM(event_order) FROM v_fct_sessions_clean
+    """,
+    "transaction_risk_windows": """
+        SELECT SUM(inflow_sum_30d), SUM(days_since_last_payroll) FROM v_fct_transactions_for_risk
+    """,
+    "first_loan_window": """
+        SELECT SUM(is_first_loan) FROM v_fct_loans_clean
+    """
+}
+
+
+def build_database(database_path: str, data_directory: Optional[Path], cluster_facts: bool) -> None:
+    """Run the loader into ``database_path`` with or without clustered fact tables."""
+    loader = DuckDBLoader(database_path, cluster_facts=cluster_facts)
+    loader.load_all_data(data_directory).close()
+
+
+def time_query(conn: duckdb.DuckDBPyConnection, query: str, repeats: int) -> float:
+    """Median wall-clock seconds over ``repeats`` runs (after one warm-up run)."""
+    conn.execute(query).fetchall()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(query).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def sample_user_ids(conn: duckdb.DuckDBPyConnection, num_users: int) -> List[int]:
+    """Deterministic spread of user ids for the per-user lookups."""
+    return [row[0] for row in conn.execute(f"""
+        SELECT user_id FROM dim_users
+        ORDER BY hash(user_id)
+        LIMIT {int(num_users)}
+    """).fetchall()]
+
+
+def run_benchmark(data_directory: Optional[Path] = None, repeats: int = 3,
+                  num_users: int = 20) -> Dict[str, Dict[str, float]]:
+    """
+    Build unclustered and clustered databases and time BENCHMARK_QUERIES on each.
+
+    Per-user queries are timed as the total over ``num_users`` lookups.
+
+    Returns:
+        Mapping of query name to {"csv_order": s, "clustered": s, "speedup": x}
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            "csv_order": str(Path(tmp) / "csv_order.db"),
+            "clustered": str(Path(tmp) / "clustered.db")
+        }
+        build_database(paths["csv_order"], data_directory, cluster_facts=False)
+        build_database(paths["clustered"], data_directory, cluster_facts=True)
+
+        for layout, path in paths.items():
+            conn = duckdb.connect(path, read_only=True)
+            try:
+                user_ids = sample_user_ids(conn, num_users)
+                for name, query in BENCHMARK_QUERIES.items():
+                    if "{user_id}" in query:
+                        elapsed = sum(time_query(conn, query.format(user_id=user_id), repeats)
+                                      for user_id in user_ids)
+                    else:
+                        elapsed = time_query(conn, query, repeats)
+                    results.setdefault(name, {})[layout] = elapsed
+            finally:
+                conn.close()
+
+    for timings in results.values():
+        timings["speedup"] = timings["csv_order"] / timings["clustered"] if timings["clustered"] else float("nan")
+
+    return results
+
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark clustered vs. CSV-ordered fact tables")
+    parser.add_argument("--data-dir", type=Path, default=None, help="Directory with the CSV files")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per query (median reported)")
+    parser.add_argument("--users", type=int, default=20, help="Users sampled for per-user lookups")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.data_dir, args.repeats, args.users)
+
+    print("\n" + "=" * 70)
+    print("CLUSTERED FACT STORAGE BENCHMARK (median seconds)")
+    print("=" * 70)
+    print(f"{'query':<28} {'csv_order':>12} {'clustered':>12} {'speedup':>10}")
+    for name, timings in results.items():
+        print(f"{name:<28} {timings['csv_order']:>12.4f} {timings['clustered']:>12.4f} "
+              f"{timings['speedup']:>9.2f}x")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
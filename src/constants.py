@@ -7,6 +7,18 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 SQL_DIR = PROJECT_ROOT / "sql"
+MODELS_DIR = PROJECT_ROOT / "models"
+
+# Risk model scoring configuration
+RISK_MODEL_PARAMS_PATH = MODELS_DIR / "risk_model_v2.json"
+RISK_SCORES_TABLE = "fct_risk_scores"
+RISK_BASE_TABLE = "fct_risk_model_base"
+
+# Data version stamped by the loader on every load or append; caches key on it
+DATA_VERSION_TABLE = "meta_data_version"
+
+# Persisted metric results, keyed by metric, parameters and data version
+METRIC_CACHE_DIR = PROJECT_ROOT / ".metric_cache"
 
 # Table configuration mapping DuckDB table names to CSV files
 TABLE_CONFIG = {
@@ -32,6 +44,35 @@ TABLE_CONFIG = {
     }
 }
 
+# Low-cardinality TEXT columns stored as DuckDB ENUMs when the loader runs with
+# typed_schema=True; one ENUM type (<column>_enum) per column, values taken from the data
+ENUM_COLUMNS = {
+    "dim_users": ["province", "device_os", "acquisition_channel", "payroll_frequency", "fico_band"],
+    "fct_sessions": ["event_name", "screen"],
+    "fct_transactions": ["direction", "category"],
+    "fct_loans": ["status", "price_variant", "tip_variant"]
+}
+
+# Sort keys used when the loader writes fact tables clustered (cluster_facts=True);
+# recorded per table in meta_table_ordering
+FACT_SORT_KEYS = {
+    "fct_sessions": ["user_id", "ts"],
+    "fct_transactions": ["user_id", "posted_date"],
+    "fct_loans": ["user_id", "requested_at"]
+}
+
+# Bit assigned to each session event in fct_session_rollup.funnel_step_mask
+FUNNEL_STEP_BITS = {
+    "app_open": 1,
+    "view_onboarding": 2,
+    "link_bank_start": 4,
+    "link_bank_success": 8,
+    "start_advance_request": 16,
+    "submit_advance_request": 32,
+    "approved": 64,
+    "disbursed": 128
+}
+
 # Data quality settings
 DUPLICATE_HANDLING = {
     "transactions.csv": {
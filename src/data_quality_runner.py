@@ -3,24 +3,132 @@ Data Quality Check Runner for Bree Case Study
 Executes comprehensive data quality validations and generates reports
 """
 
+import argparse
+
 import duckdb
 import pandas as pd
 from pathlib import Path
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Tuple
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 
+from arrow_query import fetch_frame, frame_records
+from dq_rules import (DQ_RULES, RULE_BASE_TABLES, RULE_CATEGORY_COLUMNS, RULE_RESULTS_VIEW,
+                      RULE_STATE_TABLE, RULE_STATUS_SQL, compile_category_view_sql,
+                      compile_rule_results_sql)
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# bernoulli and reservoir draw individual rows; system draws whole vectors of
+# rows, so on tables clustered by user/time (cluster_facts) its sample is far
+# from simple random and the Wilson intervals come out too narrow
+SAMPLE_METHODS = ("bernoulli", "reservoir", "system")
+
+# Report category -> DQ view, in report order
+CHECK_CATEGORIES = {
+    "row_count_reconciliation": "dq_row_count_reconciliation",
+    "null_key_checks": "dq_null_key_checks",
+    "referential_integrity": "dq_referential_integrity",
+    "transaction_validations": "dq_transaction_validations",
+    "loan_validations": "dq_loan_validations",
+    "user_validations": "dq_user_validations",
+    "session_validations": "dq_session_validations",
+    "ab_test_validations": "dq_ab_test_validations",
+    "business_rules": "dq_business_rules",
+    "risk_model_coverage": "dq_risk_model_coverage",
+    "funnel_completeness": "dq_funnel_completeness",
+    "distribution_checks": "dq_distribution_checks"
+}
+
+# Streamed check detail formats -> DuckDB COPY options and file extension
+DETAIL_FORMATS = {
+    "ndjson": ("FORMAT JSON", "ndjson"),
+    "parquet": ("FORMAT PARQUET", "parquet")
+}
+
+# Materialized DQ result -> dq_results_history columns
+# (category, check_name, table_name, total_rows, violation_count, status)
+HISTORY_PROJECTIONS = {
+    RULE_RESULTS_VIEW: "category, check_name, table_name, total_rows, violation_count, status",
+    "dq_row_count_reconciliation": ("'dq_row_count_reconciliation', 'row_count', table_name, base_count, "
+                                    "ABS(base_count - view_count), row_count_check"),
+    "dq_risk_model_coverage": "'dq_risk_model_coverage', metric, 'v_risk_model_base', count, NULL, NULL",
+    "dq_funnel_completeness": "'dq_funnel_completeness', stage, 'v_user_funnel_base', count, NULL, NULL",
+    "dq_distribution_checks": ("'dq_distribution_checks', check_name || ':' || COALESCE(province, 'NULL'), "
+                               "'v_dim_users_clean', count, NULL, NULL"),
+}
+
+
+def wilson_interval(violations: pd.Series, rows: pd.Series, confidence: float) -> Tuple[pd.Series, pd.Series]:
+    """Wilson score interval for violation rates estimated from a simple random sample"""
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n = rows.clip(lower=1)
+    rate = violations / n
+    center = (rate + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    half_width = z * ((rate * (1 - rate) / n + z ** 2 / (4 * n ** 2)) ** 0.5) / (1 + z ** 2 / n)
+    return (center - half_width).clip(lower=0), (center + half_width).clip(upper=1)
+
+
 class DataQualityRunner:
-    def __init__(self, db_path: str = "bree_case_study.db"):
-        """Initialize data quality runner with database connection"""
+    def __init__(self, db_path: str = "bree_case_study.db", parallelism: int = 4,
+                 incremental: bool = False, sample_percent: Optional[float] = None,
+                 sample_method: str = "bernoulli", confidence: float = 0.95,
+                 sample_min_rows: int = 100_000, sample_tolerance: float = 0.0001,
+                 detail_format: Optional[str] = None, check_timeout: Optional[float] = None):
+        """Initialize data quality runner with database connection
+
+        Args:
+            db_path: DuckDB database built by the pipeline
+            parallelism: Number of check categories evaluated concurrently
+            incremental: Evaluate row-level rules only on rows loaded since the last
+                recorded watermark and add the stored totals
+            sample_percent: Evaluate row-level rules on a TABLESAMPLE of this percent of
+                each large table instead of every row (None = exact)
+            sample_method: DuckDB sampling method (bernoulli, reservoir or system;
+                system is faster but its intervals understate clustered error rates)
+            confidence: Confidence level of the reported violation rate intervals
+            sample_min_rows: Tables with fewer rows are always scanned in full
+            sample_tolerance: Violation rate a sampled check must be under when its
+                rule allows no violations
+            detail_format: Stream per-check detail rows to files in this format
+                (ndjson or parquet) instead of embedding them in the report
+            check_timeout: Seconds a check may run before its query is interrupted
+                and it is recorded as TIMEOUT (None = no limit)
+        """
+        if incremental and sample_percent:
+            raise ValueError("Sampled runs cannot be combined with incremental runs")
+        if sample_method not in SAMPLE_METHODS:
+            raise ValueError(f"sample_method must be one of {SAMPLE_METHODS}")
+        if sample_percent and sample_method == "system":
+            logger.warning("SYSTEM sampling draws blocks of rows: confidence intervals assume a simple "
+                           "random sample and are too narrow on clustered tables")
+        if detail_format is not None and detail_format not in DETAIL_FORMATS:
+            raise ValueError(f"detail_format must be one of {tuple(DETAIL_FORMATS)}")
+
         self.db_path = db_path
+        self.parallelism = max(1, parallelism)
+        self.incremental = incremental
+        self.sample_percent = sample_percent
+        self.sample_method = sample_method
+        self.confidence = confidence
+        self.sample_min_rows = sample_min_rows
+        self.sample_tolerance = sample_tolerance
+        self.sample_estimates = pd.DataFrame()
+        self.detail_format = detail_format
+        self.check_timeout = check_timeout
+        # Per-check status (OK / ERROR / TIMEOUT) and elapsed seconds of the last report
+        self.check_timings = {}
         self.conn = None
         self.results = {}
+        # dq_* views already evaluated into same-named TEMP tables this run
+        self.materialized_views = set()
         
     def connect(self):
         """Establish database connection"""
@@ -55,6 +163,12 @@ class DataQualityRunner:
         dq_sql = self.load_sql_script(sql_script_path)
         
         try:
+            # Results materialized by a previous run on this connection are stale
+            self.drop_materialized_views()
+
+            # Row-level rules come from the registry; the script's summary views reference them
+            self.create_rule_views()
+
             # Execute the entire DQ script to create views
             self.conn.execute(dq_sql)
             logger.info("Data quality check views created successfully")
@@ -62,17 +176,299 @@ class DataQualityRunner:
             logger.error(f"Failed to create data quality views: {e}")
             raise
     
-    def run_check_category(self, view_name: str, category_name: str) -> pd.DataFrame:
-        """Run a specific category of data quality checks"""
+    def create_rule_views(self):
+        """Create dq_rule_results (one fused scan per table) and the rule category views"""
+        self.conn.execute(f"CREATE OR REPLACE VIEW {RULE_RESULTS_VIEW} AS {compile_rule_results_sql()}")
+        for category in RULE_CATEGORY_COLUMNS:
+            self.conn.execute(f"CREATE OR REPLACE VIEW {category} AS {compile_category_view_sql(category)}")
+
+    def materialize_view(self, view_name: str, df: pd.DataFrame):
+        """
+        Store an evaluated DQ view in a TEMP table of the same name.
+
+        TEMP tables take precedence over main-schema views on name lookup, so every
+        later reference on this connection (including from dq_summary_report) reads
+        the stored result instead of re-running the underlying checks.
+        """
+        self.conn.register("dq_view_result", df)
         try:
-            query = f"SELECT * FROM {view_name}"
-            df = self.conn.execute(query).fetchdf()
+            self.conn.execute(f"CREATE OR REPLACE TEMP TABLE {view_name} AS SELECT * FROM dq_view_result")
+        finally:
+            self.conn.unregister("dq_view_result")
+        self.materialized_views.add(view_name)
+
+    def drop_materialized_views(self):
+        """Drop TEMP tables created by materialize_view"""
+        for view_name in self.materialized_views:
+            self.conn.execute(f"DROP TABLE IF EXISTS temp.{view_name}")
+        self.materialized_views.clear()
+
+    def run_check_category(self, view_name: str, category_name: str,
+                           cursor: duckdb.DuckDBPyConnection = None) -> pd.DataFrame:
+        """Run a specific category of data quality checks
+
+        Args:
+            view_name: dq_* view to evaluate
+            category_name: Category label for logging
+            cursor: Cursor to run on (defaults to the runner connection); one cursor
+                per category lets categories execute concurrently
+        """
+        try:
+            if view_name in self.materialized_views:
+                return fetch_frame(self.conn, f"SELECT * FROM temp.{view_name}")
+
+            query = f"SELECT * FROM main.{view_name}"
+            df = fetch_frame(cursor or self.conn, query)
             logger.info(f"Executed {category_name}: {len(df)} checks")
             return df
         except Exception as e:
             logger.error(f"Failed to run {category_name}: {e}")
             return pd.DataFrame()
-    
+
+    def rule_watermarks(self, cursor: duckdb.DuckDBPyConnection) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Row watermarks per rule table.
+
+        The high watermark is the current end of each base table (MAX(rowid) + 1).
+        The low watermark is where the stored totals stop: usable only when every
+        incremental rule on the table was recorded at the same watermark, otherwise
+        0 (evaluate the whole table).
+
+        Returns:
+            (low_watermarks, high_watermarks) keyed by canonical view name
+        """
+        high = {}
+        for view_name, base_table in RULE_BASE_TABLES.items():
+            high[view_name] = cursor.execute(
+                f"SELECT COALESCE(MAX(rowid) + 1, 0) FROM main.{base_table}"
+            ).fetchone()[0]
+
+        stored = {}
+        if self.incremental:
+            for category, check_name, table_name, watermark in cursor.execute(
+                f"SELECT category, check_name, table_name, watermark FROM {RULE_STATE_TABLE}"
+            ).fetchall():
+                stored[(category, check_name, table_name)] = watermark
+
+        low = {}
+        for view_name in RULE_BASE_TABLES:
+            marks = {stored.get((r.category, r.name, r.table))
+                     for r in DQ_RULES if r.table == view_name and r.incremental}
+            watermark = marks.pop() if len(marks) == 1 else None
+            # A table that shrank was reloaded; its stored totals no longer apply
+            low[view_name] = watermark if watermark is not None and watermark <= high[view_name] else 0
+
+        return low, high
+
+    def run_sampled_rule_scan(self, cursor: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+        """
+        Estimate registry rule violation rates from a sample of each large table.
+
+        Base tables with at least sample_min_rows rows are shadowed on this cursor by
+        a TEMP TABLESAMPLE of themselves; smaller tables are scanned exactly. A sampled
+        check passes only when the upper confidence bound of its violation rate is
+        under its threshold (max_violation_rate, or sample_tolerance for rules that
+        allow no violations). Nothing is recorded in dq_check_state.
+
+        Args:
+            cursor: Cursor to run on (TEMP samples stay local to it)
+
+        Returns:
+            Rows shaped like dq_rule_results (counts are sample counts), plus sampled,
+            estimated_rate, rate_ci_low and rate_ci_high
+        """
+        try:
+            sampled = []
+            for view_name, base_table in RULE_BASE_TABLES.items():
+                rows = cursor.execute(f"SELECT COUNT(*) FROM main.{base_table}").fetchone()[0]
+                if rows >= self.sample_min_rows:
+                    sampled.append(view_name)
+
+            catalog = cursor.execute("SELECT current_database()").fetchone()[0]
+            for view_name in sampled:
+                base_table = RULE_BASE_TABLES[view_name]
+                cursor.execute(f"""
+                    CREATE OR REPLACE TEMP TABLE {base_table} AS
+                    SELECT * FROM main.{base_table}
+                    USING SAMPLE {float(self.sample_percent)} PERCENT ({self.sample_method})
+                """)
+            try:
+                results = fetch_frame(cursor, compile_rule_results_sql(
+                    dim_users=f'"{catalog}".main.dim_users'
+                ))
+            finally:
+                for view_name in sampled:
+                    cursor.execute(f"DROP TABLE IF EXISTS temp.{RULE_BASE_TABLES[view_name]}")
+
+            results["sampled"] = results["table_name"].isin(sampled)
+            results["estimated_rate"] = results["violation_count"] / results["total_rows"].clip(lower=1)
+            results["rate_ci_low"], results["rate_ci_high"] = wilson_interval(
+                results["violation_count"], results["total_rows"], self.confidence
+            )
+            threshold = results["max_violation_rate"].fillna(self.sample_tolerance)
+            results.loc[results["sampled"], "status"] = results["severity"].where(
+                results["rate_ci_high"] >= threshold, "PASS"
+            )
+
+            self.sample_estimates = results[results["sampled"]]
+            logger.info(f"Executed rule_scan on a {self.sample_percent}% {self.sample_method} sample "
+                        f"of {', '.join(sampled) or 'no tables'}: {len(results)} checks")
+            return results
+
+        except Exception as e:
+            logger.error(f"Failed to run sampled rule_scan: {e}")
+            return pd.DataFrame()
+
+    def run_rule_scan(self, cursor: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+        """
+        Evaluate the registry rules and record per-check results with the watermark.
+
+        Incremental rules on tables with a stored watermark are evaluated only on
+        new rows: the base tables are shadowed on this cursor by TEMP tables holding
+        rows in [low, high) watermark, and the counts are added to the stored totals.
+
+        Args:
+            cursor: Cursor to run on (TEMP shadows stay local to it)
+
+        Returns:
+            Rows shaped like dq_rule_results
+        """
+        if self.sample_percent:
+            return self.run_sampled_rule_scan(cursor)
+
+        try:
+            low, high = self.rule_watermarks(cursor)
+
+            delta_orders = [
+                i for i, rule in enumerate(DQ_RULES)
+                if self.incremental and rule.incremental and low[rule.table] > 0
+                and (rule.reference_table is None
+                     or low[rule.reference_table] == high[rule.reference_table])
+            ]
+            full_orders = [i for i in range(len(DQ_RULES)) if i not in delta_orders]
+
+            frames = []
+            if full_orders:
+                frames.append(fetch_frame(cursor, compile_rule_results_sql(full_orders)))
+
+            if delta_orders:
+                shadowed = sorted({DQ_RULES[i].table for i in delta_orders})
+                for view_name in shadowed:
+                    base_table = RULE_BASE_TABLES[view_name]
+                    cursor.execute(f"""
+                        CREATE OR REPLACE TEMP TABLE {base_table} AS
+                        SELECT * FROM main.{base_table}
+                        WHERE rowid >= {low[view_name]} AND rowid < {high[view_name]}
+                    """)
+                catalog = cursor.execute("SELECT current_database()").fetchone()[0]
+                try:
+                    delta = fetch_frame(cursor, compile_rule_results_sql(
+                        delta_orders, dim_users=f'"{catalog}".main.dim_users'
+                    ))
+                finally:
+                    for view_name in shadowed:
+                        cursor.execute(f"DROP TABLE IF EXISTS temp.{RULE_BASE_TABLES[view_name]}")
+
+                cursor.register("dq_rule_delta", delta)
+                try:
+                    frames.append(fetch_frame(cursor, f"""
+                        SELECT *, {RULE_STATUS_SQL} AS status
+                        FROM (
+                          SELECT
+                            d.rule_order, d.category, d.check_name, d.table_name,
+                            d.total_rows + s.total_rows           AS total_rows,
+                            d.violation_count + s.violation_count AS violation_count,
+                            d.severity, d.max_violation_rate
+                          FROM dq_rule_delta d
+                          JOIN {RULE_STATE_TABLE} s USING (category, check_name, table_name)
+                        )
+                    """))
+                finally:
+                    cursor.unregister("dq_rule_delta")
+
+                new_rows = sum(high[v] - low[v] for v in shadowed)
+                logger.info(f"Evaluated {len(delta_orders)} rules incrementally on {new_rows:,} new rows")
+
+            results = pd.concat(frames, ignore_index=True).sort_values("rule_order", ignore_index=True)
+            self.record_rule_state(cursor, results, high)
+            logger.info(f"Executed rule_scan: {len(results)} checks")
+            return results
+
+        except Exception as e:
+            logger.error(f"Failed to run rule_scan: {e}")
+            return pd.DataFrame()
+
+    def record_rule_state(self, cursor: duckdb.DuckDBPyConnection, results: pd.DataFrame,
+                          high: Dict[str, int]):
+        """Upsert per-check totals and the watermark they cover into dq_check_state"""
+        state = results[["category", "check_name", "table_name", "total_rows",
+                         "violation_count", "status"]].copy()
+        state["watermark"] = state["table_name"].map(high)
+
+        cursor.register("dq_rule_state", state)
+        try:
+            cursor.execute(f"""
+                INSERT INTO {RULE_STATE_TABLE}
+                SELECT category, check_name, table_name, watermark, total_rows,
+                       violation_count, status, current_timestamp
+                FROM dq_rule_state
+                ON CONFLICT (category, check_name, table_name) DO UPDATE SET
+                  watermark       = EXCLUDED.watermark,
+                  total_rows      = EXCLUDED.total_rows,
+                  violation_count = EXCLUDED.violation_count,
+                  status          = EXCLUDED.status,
+                  validated_at    = EXCLUDED.validated_at
+            """)
+        finally:
+            cursor.unregister("dq_rule_state")
+
+    def run_timed_check(self, name: str, check: Callable[[duckdb.DuckDBPyConnection], pd.DataFrame],
+                        cursor: duckdb.DuckDBPyConnection) -> pd.DataFrame:
+        """
+        Run one check on its cursor within the time budget and record its timing.
+
+        When check_timeout elapses, the cursor's running query is interrupted; the
+        check then returns no rows and is recorded as TIMEOUT while the rest of the
+        suite carries on.
+
+        Args:
+            name: Check name used in check_timings
+            check: Callable evaluating the check on the given cursor
+            cursor: Cursor dedicated to this check
+
+        Returns:
+            Check result (empty on error or timeout)
+        """
+        timed_out = threading.Event()
+
+        def interrupt():
+            timed_out.set()
+            cursor.interrupt()
+
+        timer = threading.Timer(self.check_timeout, interrupt) if self.check_timeout else None
+        start = time.perf_counter()
+        if timer:
+            timer.start()
+        try:
+            df = check(cursor)
+        finally:
+            if timer:
+                timer.cancel()
+        elapsed = time.perf_counter() - start
+
+        if df.empty and timed_out.is_set():
+            status = "TIMEOUT"
+            logger.warning(f"{name} exceeded its {self.check_timeout}s budget and was interrupted")
+        else:
+            status = "ERROR" if df.empty else "OK"
+        self.check_timings[name] = {"status": status, "elapsed_sec": round(elapsed, 3)}
+        return df
+
+    def materialize_placeholder(self, view_name: str):
+        """Store an empty result for a check that timed out so later references skip it"""
+        self.conn.execute(f"CREATE OR REPLACE TEMP TABLE {view_name} AS SELECT * FROM main.{view_name} LIMIT 0")
+        self.materialized_views.add(view_name)
+
     def generate_detailed_report(self) -> Dict:
         """Generate comprehensive data quality report"""
         logger.info("Generating detailed data quality report...")
@@ -83,39 +479,86 @@ class DataQualityRunner:
             "categories": {}
         }
         
-        # Define check categories and their corresponding views (only existing views)
-        check_categories = {
-            "row_count_reconciliation": "dq_row_count_reconciliation",
-            "null_key_checks": "dq_null_key_checks", 
-            "referential_integrity": "dq_referential_integrity",
-            "transaction_validations": "dq_transaction_validations",
-            "loan_validations": "dq_loan_validations",
-            "user_validations": "dq_user_validations",
-            "session_validations": "dq_session_validations",
-            "ab_test_validations": "dq_ab_test_validations",
-            "business_rules": "dq_business_rules",
-            "risk_model_coverage": "dq_risk_model_coverage",
-            "funnel_completeness": "dq_funnel_completeness",
-            "distribution_checks": "dq_distribution_checks"
-        }
-        
-        # Execute each category
+        # Check categories and their corresponding views (only existing views)
+        check_categories = CHECK_CATEGORIES
+
+        # Execute the fused rule scan and the remaining categories concurrently, one
+        # cursor each. Rule categories are then reshaped from the materialized scan.
+        pooled = {RULE_RESULTS_VIEW: ("rule_scan", self.run_rule_scan)}
+        pooled.update({
+            view_name: (category,
+                        lambda cursor, v=view_name, c=category: self.run_check_category(v, c, cursor))
+            for category, view_name in check_categories.items()
+            if view_name not in RULE_CATEGORY_COLUMNS
+        })
+        self.check_timings = {}
+        cursors = [self.conn.cursor() for _ in pooled]
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+                frames = dict(zip(pooled, executor.map(
+                    lambda args: self.run_timed_check(*args[0], args[1]), zip(pooled.values(), cursors)
+                )))
+        finally:
+            for cursor in cursors:
+                cursor.close()
+
+        rule_scan_timed_out = self.check_timings["rule_scan"]["status"] == "TIMEOUT"
+        if not frames[RULE_RESULTS_VIEW].empty:
+            self.materialize_view(RULE_RESULTS_VIEW, frames[RULE_RESULTS_VIEW])
+
+        # Assemble in check_categories order
         for category, view_name in check_categories.items():
-            df = self.run_check_category(view_name, category)
-            if not df.empty:
+            if view_name in frames:
+                df = frames[view_name]
+            elif rule_scan_timed_out:
+                df = pd.DataFrame()
+                self.check_timings[category] = dict(self.check_timings["rule_scan"])
+            else:
+                df = self.run_timed_check(
+                    category, lambda cursor, v=view_name, c=category: self.run_check_category(v, c, cursor),
+                    self.conn
+                )
+
+            if self.check_timings[category]["status"] == "TIMEOUT":
+                # Keep the summary views from re-running the check without a budget
+                self.materialize_placeholder(view_name)
+                report["categories"][category] = {
+                    "total_checks": 0, "failed_checks": 0, "warned_checks": 0, "passed_checks": 0,
+                    "status": "TIMEOUT",
+                    "elapsed_sec": self.check_timings[category]["elapsed_sec"]
+                }
+            elif not df.empty:
+                self.materialize_view(view_name, df)
                 report["categories"][category] = {
                     "total_checks": len(df),
                     "failed_checks": len(df[df.iloc[:, -1] == 'FAIL']) if len(df.columns) > 0 else 0,
                     "warned_checks": len(df[df.iloc[:, -1] == 'WARN']) if len(df.columns) > 0 else 0,
-                    "passed_checks": len(df[df.iloc[:, -1] == 'PASS']) if len(df.columns) > 0 else 0,
-                    "details": df.to_dict('records')
+                    "passed_checks": len(df[df.iloc[:, -1] == 'PASS']) if len(df.columns) > 0 else 0
                 }
+                # Streamed runs keep only the counts; rows go out via write_check_details
+                if self.detail_format is None:
+                    report["categories"][category]["details"] = frame_records(df)
         
-        # Get summary report with fallback
+        if self.sample_percent:
+            report["sampling"] = {
+                "sample_percent": self.sample_percent,
+                "sample_method": self.sample_method,
+                "confidence": self.confidence,
+                "checks": self.sample_estimates[[
+                    "category", "check_name", "table_name", "total_rows", "violation_count",
+                    "estimated_rate", "rate_ci_low", "rate_ci_high", "status"
+                ]].rename(columns={"total_rows": "sampled_rows"}).pipe(frame_records)
+            }
+
+        report["check_timings"] = self.check_timings
+        report["timed_out_checks"] = [name for name, timing in self.check_timings.items()
+                                      if timing["status"] == "TIMEOUT"]
+
+        # Get summary report with fallback (built from the materialized categories)
         try:
             # Use basic summary report (extended doesn't exist)
-            summary_df = self.conn.execute("SELECT * FROM dq_summary_report").fetchdf()
-            report["summary"] = summary_df.to_dict('records')
+            summary_df = fetch_frame(self.conn, "SELECT * FROM dq_summary_report")
+            report["summary"] = frame_records(summary_df)
             
             # Calculate overall status - handle different column structures
             if 'failed_checks' in summary_df.columns:
@@ -132,8 +575,8 @@ class DataQualityRunner:
             logger.warning(f"Summary report failed ({e}), falling back to basic summary")
             try:
                 # Fallback to original summary
-                summary_df = self.conn.execute("SELECT * FROM dq_summary_report").fetchdf()
-                report["summary"] = summary_df.to_dict('records')
+                summary_df = fetch_frame(self.conn, "SELECT * FROM dq_summary_report")
+                report["summary"] = frame_records(summary_df)
                 
                 # Calculate overall status from categories
                 total_failed = 0
@@ -155,6 +598,10 @@ class DataQualityRunner:
                 report["overall_status"] = "PASS" if total_failed == 0 else "FAIL"
                 report["total_failed_checks"] = int(total_failed)
                 report["total_check_categories"] = len(report["categories"])
+
+        # A check that ran out of time cannot vouch for the data
+        if report["timed_out_checks"] and report["overall_status"] == "PASS":
+            report["overall_status"] = "TIMEOUT"
         
         return report
     
@@ -200,24 +647,58 @@ class DataQualityRunner:
         
         # Print detailed failures
         failed_details = []
+        failed_total = 0
+        if self.detail_format is not None:
+            # Details were not kept in memory; read the first failures back from the results
+            failed_sql = self.failed_checks_sql()
+            if failed_sql:
+                failed_total = self.conn.execute(f"SELECT COUNT(*) FROM ({failed_sql})").fetchone()[0]
+                failed_details = [
+                    {'category': row.pop('category'),
+                     'detail': {k: v for k, v in row.items() if v is not None and not pd.isna(v)}}
+                    for row in frame_records(fetch_frame(self.conn, f"{failed_sql}\nLIMIT 10"))
+                ]
         for category_name, category_data in report['categories'].items():
-            for detail in category_data['details']:
+            for detail in category_data.get('details', []):
                 # Check if this is a failed check (different views have different column structures)
                 if any(col for col in detail.values() if col == 'FAIL'):
                     failed_details.append({
                         'category': category_name,
                         'detail': detail
                     })
+                    failed_total += 1
         
         if failed_details:
-            print(f"\nFAILED CHECKS DETAILS ({len(failed_details)} total):")
+            print(f"\nFAILED CHECKS DETAILS ({failed_total} total):")
             print("-" * 80)
             for failure in failed_details[:10]:  # Show first 10 failures
                 print(f"❌ {failure['category']}: {failure['detail']}")
             
-            if len(failed_details) > 10:
-                print(f"... and {len(failed_details) - 10} more failures")
+            if failed_total > 10:
+                print(f"... and {failed_total - 10} more failures")
         
+        if report.get('check_timings'):
+            print("\nCHECK TIMINGS (slowest first):")
+            print("-" * 80)
+            for name, timing in sorted(report['check_timings'].items(),
+                                       key=lambda item: -item[1]['elapsed_sec'])[:5]:
+                status_icon = "⏱️" if timing['status'] == 'TIMEOUT' else "  "
+                print(f"{status_icon} {name:<35} | {timing['elapsed_sec']:>8.2f}s | {timing['status']}")
+            if report.get('timed_out_checks'):
+                print(f"Timed out: {', '.join(report['timed_out_checks'])}")
+
+        if report.get('anomalies'):
+            print(f"\nTREND ANOMALIES vs. ROLLING BASELINE ({len(report['anomalies'])} total):")
+            print("-" * 80)
+            for anomaly in report['anomalies']:
+                if anomaly['violation_count_anomaly']:
+                    print(f"📈 {anomaly['category']}.{anomaly['check_name']} ({anomaly['table_name']}): "
+                          f"violations {anomaly['violation_count']} vs. baseline "
+                          f"{anomaly['baseline_violation_count']:.1f}")
+                if anomaly['total_rows_anomaly']:
+                    print(f"📈 {anomaly['category']}.{anomaly['check_name']} ({anomaly['table_name']}): "
+                          f"rows {anomaly['total_rows']} vs. baseline {anomaly['baseline_total_rows']:.1f}")
+
         print("\n" + "="*80)
     
     def save_report(self, report: Dict, output_path: str = None):
@@ -237,6 +718,52 @@ class DataQualityRunner:
             logger.error(f"Failed to save report: {e}")
             return None
     
+    def failure_flag_sql(self, view_name: str) -> str:
+        """SQL flag for result rows with any column equal to 'FAIL' (layouts differ per view)"""
+        columns = [column[0] for column in self.conn.execute(f"SELECT * FROM {view_name} LIMIT 0").description]
+        values = ", ".join(f'CAST("{column}" AS VARCHAR)' for column in columns)
+        return f"COALESCE('FAIL' IN ({values}), FALSE)"
+
+    def failed_checks_sql(self) -> str:
+        """Failing rows of every materialized category, with a category column"""
+        return "\nUNION ALL BY NAME\n".join(
+            f"SELECT '{category}' AS category, * FROM {view_name} WHERE {self.failure_flag_sql(view_name)}"
+            for category, view_name in CHECK_CATEGORIES.items()
+            if view_name in self.materialized_views
+        )
+
+    def write_check_details(self, output_dir: str = None) -> Path:
+        """
+        Stream every category's result rows to one file per category.
+
+        DuckDB's COPY writes the materialized results chunk by chunk, so detail
+        volume never passes through Python; each row carries an is_failure flag.
+
+        Args:
+            output_dir: Directory for the files (defaults to reports/dq_details_<timestamp>)
+
+        Returns:
+            Directory the files were written to
+        """
+        copy_options, extension = DETAIL_FORMATS[self.detail_format or "ndjson"]
+        if output_dir is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_dir = Path(__file__).parent.parent / "reports" / f"dq_details_{timestamp}"
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for category, view_name in CHECK_CATEGORIES.items():
+            if view_name not in self.materialized_views:
+                continue
+            output_path = output_dir / f"{category}.{extension}"
+            self.conn.execute(f"""
+                COPY (SELECT *, {self.failure_flag_sql(view_name)} AS is_failure FROM {view_name})
+                TO '{output_path}' ({copy_options})
+            """)
+
+        logger.info(f"Check details written to: {output_dir}")
+        return output_dir
+
     def export_failed_checks_csv(self, report: Dict, output_path: str = None):
         """Export failed checks to CSV for further analysis"""
         if output_path is None:
@@ -244,10 +771,25 @@ class DataQualityRunner:
             reports_dir = Path(__file__).parent.parent / "reports"
             reports_dir.mkdir(exist_ok=True)
             output_path = reports_dir / f"failed_checks_{timestamp}.csv"
-        
+
+        if self.detail_format is not None:
+            # Details are not in the report; select failures in SQL and stream them out
+            failed_sql = self.failed_checks_sql()
+            if not failed_sql or self.conn.execute(f"SELECT COUNT(*) FROM ({failed_sql})").fetchone()[0] == 0:
+                logger.info("No failed checks to export")
+                return None
+            try:
+                self.conn.execute(f"COPY ({failed_sql}) TO '{output_path}' (HEADER)")
+                logger.info(f"Failed checks exported to: {output_path}")
+                return output_path
+            except Exception as e:
+                logger.error(f"Failed to export CSV: {e}")
+                return None
+
         failed_records = []
         for category_name, category_data in report['categories'].items():
-            for detail in category_data['details']:
+            # Timed-out categories carry no details
+            for detail in category_data.get('details', []):
                 # Add category info to each record
                 record = {'category': category_name, **detail}
                 # Check if this record represents a failure
@@ -267,6 +809,65 @@ class DataQualityRunner:
             logger.info("No failed checks to export")
             return None
     
+    def record_history(self, report: Dict) -> pd.DataFrame:
+        """
+        Append this run's results to dq_results_history and flag anomalies.
+
+        Every materialized check result is stored under a new run id; the run is
+        then compared with each check's rolling baseline through dq_results_trend.
+
+        Args:
+            report: Report from generate_detailed_report; gains run_id and anomalies
+
+        Returns:
+            This run's rows of dq_results_trend that deviate from their baseline
+        """
+        run_ts = datetime.fromisoformat(report["execution_timestamp"])
+        run_id = run_ts.strftime("%Y%m%d_%H%M%S_%f")
+        sampled_run = bool(self.sample_percent)
+
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            for view_name, projection in HISTORY_PROJECTIONS.items():
+                if view_name not in self.materialized_views:
+                    continue
+                self.conn.execute(f"""
+                    INSERT INTO dq_results_history
+                    SELECT ?, ?, {projection}, ? FROM {view_name}
+                """, [run_id, run_ts, sampled_run])
+            self.conn.execute("COMMIT")
+        except Exception as e:
+            self.conn.execute("ROLLBACK")
+            logger.error(f"Failed to record DQ history: {e}")
+            return pd.DataFrame()
+
+        anomalies = fetch_frame(self.conn, """
+            SELECT category, check_name, table_name,
+                   total_rows, baseline_total_rows, total_rows_anomaly,
+                   violation_count, baseline_violation_count, violation_count_anomaly
+            FROM dq_results_trend
+            WHERE run_id = ? AND (total_rows_anomaly OR violation_count_anomaly)
+            ORDER BY category, check_name, table_name
+        """, [run_id])
+
+        report["run_id"] = run_id
+        report["anomalies"] = frame_records(anomalies)
+        logger.info(f"Recorded run {run_id} in dq_results_history ({len(anomalies)} anomalies)")
+        return anomalies
+
+    def check_trend(self, check_name: str, category: str = None, runs: int = 30) -> pd.DataFrame:
+        """Latest ``runs`` results of one check with their rolling baseline"""
+        if not self.conn:
+            self.connect()
+        return fetch_frame(self.conn, """
+            SELECT run_id, run_ts, category, table_name, total_rows, violation_count, status,
+                   baseline_violation_count, violation_count_anomaly, total_rows_anomaly
+            FROM dq_results_trend
+            WHERE check_name = ? AND (? IS NULL OR category = ?)
+            ORDER BY run_ts DESC
+            LIMIT ?
+        """, [check_name, category, category, runs])
+
     def run_full_data_quality_suite(self, save_reports: bool = True) -> Dict:
         """Run complete data quality validation suite"""
         logger.info("Starting full data quality validation suite...")
@@ -277,12 +878,16 @@ class DataQualityRunner:
             
             # Generate comprehensive report
             report = self.generate_detailed_report()
+
+            # Append to the results history and compare with recent runs
+            self.record_history(report)
             
             # Print summary to console
             self.print_summary_report(report)
             
             # Save reports if requested
             if save_reports:
+                details_dir = self.write_check_details() if self.detail_format else None
                 json_path = self.save_report(report)
                 csv_path = self.export_failed_checks_csv(report)
                 
@@ -290,6 +895,8 @@ class DataQualityRunner:
                     "json_report": json_path,
                     "failed_checks_csv": csv_path
                 }
+                if details_dir:
+                    report["output_files"]["check_details_dir"] = details_dir
             
             logger.info("Data quality validation suite completed successfully")
             return report
@@ -304,8 +911,31 @@ class DataQualityRunner:
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Run the Bree data quality suite")
+    parser.add_argument("--db", default="bree_case_study.db", help="DuckDB database path")
+    parser.add_argument("--parallelism", type=int, default=4, help="Check categories run concurrently")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Evaluate row-level rules only on rows loaded since the last run")
+    parser.add_argument("--sample-percent", type=float, default=None,
+                        help="Estimate row-level rules from a sample of large tables (percent)")
+    parser.add_argument("--sample-method", choices=SAMPLE_METHODS, default="bernoulli",
+                        help="DuckDB sampling method (system is faster but its intervals are too narrow "
+                             "on clustered tables)")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="Confidence level of sampled violation rate intervals")
+    parser.add_argument("--check-timeout", type=float, default=None,
+                        help="Seconds each check may run before it is interrupted and marked TIMEOUT")
+    parser.add_argument("--detail-format", choices=tuple(DETAIL_FORMATS), default=None,
+                        help="Stream check details to per-category files instead of the JSON report")
+    args = parser.parse_args()
+
     # Initialize and run data quality checks
-    dq_runner = DataQualityRunner()
+    dq_runner = DataQualityRunner(args.db, args.parallelism, args.incremental,
+                                  sample_percent=args.sample_percent,
+                                  sample_method=args.sample_method,
+                                  confidence=args.confidence,
+                                  detail_format=args.detail_format,
+                                  check_timeout=args.check_timeout)
     
     try:
         report = dq_runner.run_full_data_quality_suite(save_reports=True)
@@ -315,7 +945,8 @@ def main():
             print("\n🎉 All data quality checks passed!")
             return 0
         else:
-            print(f"\n⚠️  Data quality issues detected: {report['total_failed_checks']} failed checks")
+            print(f"\n⚠️  Data quality issues detected: {report['total_failed_checks']} failed checks, "
+                  f"{len(report['timed_out_checks'])} timed out")
             return 1
             
     except Exception as e:
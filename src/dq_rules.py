@@ -0,0 +1,237 @@
+"""
+Declarative data quality rule registry.
+
+Each row-level rule is a (table, predicate, severity) triple. The runner compiles
+the registry into one scan per table, counting every rule's violations with
+COUNT(*) FILTER (WHERE ...), so DQ cost grows with the number of tables rather
+than the number of rules. Category views (dq_business_rules, ...) are reshaped
+from the fused results and keep the column layout of the original SQL views.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+RULE_RESULTS_VIEW = "dq_rule_results"
+RULE_STATE_TABLE = "dq_check_state"
+
+# Base table behind each canonical view rules are declared on. Incremental runs
+# scope a view to newly loaded rows by restricting its base table by rowid.
+RULE_BASE_TABLES: Dict[str, str] = {
+    "v_dim_users_clean": "dim_users",
+    "v_fct_transactions_clean": "fct_transactions",
+    "v_fct_loans_clean": "fct_loans",
+    "v_fct_sessions_clean": "fct_sessions",
+    "v_ab_assignments_clean": "ab_assignments",
+}
+
+# Status of a (possibly combined) rule result row
+RULE_STATUS_SQL = """CASE
+    WHEN max_violation_rate IS NULL AND violation_count = 0               THEN 'PASS'
+    WHEN violation_count < total_rows * max_violation_rate                THEN 'PASS'
+    ELSE severity
+  END"""
+
+
+@dataclass(frozen=True)
+class DQRule:
+    """One row-level rule: rows of ``table`` matching ``predicate`` are violations."""
+    category: str
+    name: str
+    table: str
+    predicate: str
+    severity: str = "FAIL"
+    # PASS while violations < max_violation_rate * total rows (None = no violations allowed)
+    max_violation_rate: Optional[float] = None
+    # Whether a row's verdict is fixed once loaded, so counts over new rows can be
+    # added to stored totals (False for rules on values recomputed across loads)
+    incremental: bool = True
+    # Rule table a predicate looks rows up in; new rows there can change old verdicts,
+    # so the rule is evaluated in full whenever that table has grown
+    reference_table: Optional[str] = None
+
+
+# Orphan predicate against the user dimension (t is the scanned table's alias).
+# {dim_users} is filled in at compile time: catalog-qualified for incremental scans,
+# where TEMP tables shadow both dim_users and main.dim_users, so new rows are still
+# matched against all users.
+_NO_MATCHING_USER = "NOT EXISTS (SELECT 1 FROM {dim_users} u WHERE u.user_id = t.user_id)"
+
+DQ_RULES: List[DQRule] = [
+    # Not-null expectations for keys (name = key column)
+    DQRule("dq_null_key_checks", "user_id", "v_dim_users_clean", "user_id IS NULL"),
+    DQRule("dq_null_key_checks", "txn_id", "v_fct_transactions_clean", "txn_id IS NULL"),
+    DQRule("dq_null_key_checks", "user_id", "v_fct_transactions_clean", "user_id IS NULL"),
+    DQRule("dq_null_key_checks", "loan_id", "v_fct_loans_clean", "loan_id IS NULL"),
+    DQRule("dq_null_key_checks", "user_id", "v_fct_loans_clean", "user_id IS NULL"),
+    DQRule("dq_null_key_checks", "event_id", "v_fct_sessions_clean", "event_id IS NULL"),
+    DQRule("dq_null_key_checks", "user_id", "v_fct_sessions_clean", "user_id IS NULL"),
+    DQRule("dq_null_key_checks", "assignment_id", "v_ab_assignments_clean", "assignment_id IS NULL"),
+    DQRule("dq_null_key_checks", "user_id", "v_ab_assignments_clean", "user_id IS NULL"),
+
+    # Referential integrity (orphan detection)
+    DQRule("dq_referential_integrity", "transactions_orphans", "v_fct_transactions_clean",
+           _NO_MATCHING_USER, reference_table="v_dim_users_clean"),
+    DQRule("dq_referential_integrity", "loans_orphans", "v_fct_loans_clean",
+           _NO_MATCHING_USER, reference_table="v_dim_users_clean"),
+    DQRule("dq_referential_integrity", "sessions_orphans", "v_fct_sessions_clean",
+           _NO_MATCHING_USER, reference_table="v_dim_users_clean"),
+    DQRule("dq_referential_integrity", "ab_assignments_orphans", "v_ab_assignments_clean",
+           _NO_MATCHING_USER, reference_table="v_dim_users_clean"),
+
+    # Transaction amount and direction validations
+    DQRule("dq_transaction_validations", "negative_amounts_in_inflows", "v_fct_transactions_clean",
+           "direction = 'inflow' AND amount < 0"),
+    DQRule("dq_transaction_validations", "positive_amounts_in_outflows", "v_fct_transactions_clean",
+           "direction = 'outflow' AND amount > 0"),
+    DQRule("dq_transaction_validations", "zero_amounts", "v_fct_transactions_clean",
+           "amount = 0", severity="WARN"),
+    DQRule("dq_transaction_validations", "extreme_amounts", "v_fct_transactions_clean",
+           "ABS(amount) > 10000", severity="WARN", max_violation_rate=0.01),
+
+    # Loan amount and status validations
+    DQRule("dq_loan_validations", "negative_loan_amounts", "v_fct_loans_clean", "amount <= 0"),
+    DQRule("dq_loan_validations", "approved_without_timestamp", "v_fct_loans_clean",
+           "is_approved = 1 AND approved_at_utc IS NULL"),
+    DQRule("dq_loan_validations", "disbursed_without_timestamp", "v_fct_loans_clean",
+           "is_disbursed = 1 AND disbursed_at_utc IS NULL"),
+    DQRule("dq_loan_validations", "repaid_without_timestamp", "v_fct_loans_clean",
+           "is_repaid = 1 AND repaid_at_utc IS NULL"),
+    DQRule("dq_loan_validations", "invalid_loan_lifecycle_order", "v_fct_loans_clean",
+           "(approved_at_utc IS NOT NULL AND approved_at_utc < requested_at_utc)"
+           " OR (disbursed_at_utc IS NOT NULL AND approved_at_utc IS NOT NULL AND disbursed_at_utc < approved_at_utc)"
+           " OR (disbursed_at_utc IS NOT NULL AND disbursed_at_utc < requested_at_utc)"),
+
+    # User signup and bank linking validations
+    DQRule("dq_user_validations", "bank_linked_before_signup", "v_dim_users_clean",
+           "bank_linked_at_utc IS NOT NULL AND bank_linked_at_utc < signup_at_utc"),
+    DQRule("dq_user_validations", "invalid_risk_scores", "v_dim_users_clean",
+           "baseline_risk_score < 0 OR baseline_risk_score > 1"),
+    DQRule("dq_user_validations", "negative_days_to_bank_connect", "v_dim_users_clean",
+           "days_taken_signup_bank_connect < 0"),
+
+    # Session and event validations (session rollups change as events are appended)
+    DQRule("dq_session_validations", "negative_session_duration", "v_fct_sessions_clean",
+           "session_duration_sec < 0", incremental=False),
+    DQRule("dq_session_validations", "zero_events_per_session", "v_fct_sessions_clean",
+           "events_per_session <= 0", severity="WARN", incremental=False),
+
+    # A/B test assignment validations
+    DQRule("dq_ab_test_validations", "future_assignment_dates", "v_ab_assignments_clean",
+           "assigned_at_utc > CURRENT_TIMESTAMP"),
+    DQRule("dq_ab_test_validations", "invalid_experiment_variants", "v_ab_assignments_clean",
+           "variant_norm NOT IN ('control', 'treatment', 'variant_a', 'variant_b', "
+           "'low', 'high', 'enabled', 'disabled')", severity="WARN"),
+
+    # Business rules
+    DQRule("dq_business_rules", "loans_negative_amounts", "v_fct_loans_clean", "amount <= 0"),
+    DQRule("dq_business_rules", "loans_future_request_dates", "v_fct_loans_clean",
+           "requested_at_utc > CURRENT_TIMESTAMP"),
+    DQRule("dq_business_rules", "disbursed_loans_no_disbursement_date", "v_fct_loans_clean",
+           "is_disbursed = 1 AND disbursed_at_utc IS NULL"),
+    DQRule("dq_business_rules", "repaid_loans_no_repayment_date", "v_fct_loans_clean",
+           "is_repaid = 1 AND repaid_at_utc IS NULL"),
+    DQRule("dq_business_rules", "transactions_zero_amounts", "v_fct_transactions_clean", "amount = 0"),
+    DQRule("dq_business_rules", "users_future_signup_dates", "v_dim_users_clean",
+           "signup_at_utc > CURRENT_TIMESTAMP"),
+    DQRule("dq_business_rules", "experiment_assignments_future_dates", "v_ab_assignments_clean",
+           "assigned_at_utc > CURRENT_TIMESTAMP"),
+]
+
+# Output columns of each rule category view, matching the original hand-written views
+RULE_CATEGORY_COLUMNS: Dict[str, str] = {
+    "dq_null_key_checks": ("table_name, check_name AS key_column, total_rows, "
+                           "violation_count AS null_count, status AS null_check"),
+    "dq_referential_integrity": "check_name, violation_count AS orphan_count, status AS integrity_check",
+    "dq_transaction_validations": "check_name, violation_count, status AS validation_check",
+    "dq_loan_validations": "check_name, violation_count, status AS validation_check",
+    "dq_user_validations": "check_name, violation_count, status AS validation_check",
+    "dq_session_validations": "check_name, violation_count, status AS validation_check",
+    "dq_ab_test_validations": "check_name, violation_count, status AS validation_check",
+    "dq_business_rules": "check_name AS rule_name, violation_count, status AS rule_check",
+}
+
+
+def _sql_literal(value) -> str:
+    """Render a Python value as a DuckDB literal."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return repr(value)
+
+
+def _sql_list(values) -> str:
+    return "[" + ", ".join(_sql_literal(v) for v in values) + "]"
+
+
+def compile_table_scan(table: str, rules: List[DQRule], rule_orders: List[int],
+                       dim_users: str = "dim_users") -> str:
+    """
+    Compile all rules on one table into a single scan returning one row per rule.
+
+    Args:
+        table: Relation scanned once (aliased as t)
+        rules: Rules whose table is ``table``
+        rule_orders: Position of each rule in DQ_RULES, used to keep report order
+        dim_users: Relation substituted for {dim_users} in predicates
+    """
+    counts = ",\n      ".join(
+        f"COUNT(*) FILTER (WHERE {rule.predicate.format(dim_users=dim_users)}) AS v{i}"
+        for i, rule in enumerate(rules)
+    )
+    return f"""
+  SELECT
+    UNNEST({_sql_list(rule_orders)})                          AS rule_order,
+    UNNEST({_sql_list([r.category for r in rules])})          AS category,
+    UNNEST({_sql_list([r.name for r in rules])})              AS check_name,
+    {_sql_literal(table)}                                     AS table_name,
+    total_rows,
+    UNNEST([{', '.join(f'v{i}' for i in range(len(rules)))}]) AS violation_count,
+    UNNEST({_sql_list([r.severity for r in rules])})          AS severity,
+    UNNEST({_sql_list([r.max_violation_rate for r in rules])}::DOUBLE[]) AS max_violation_rate
+  FROM (
+    SELECT
+      COUNT(*) AS total_rows,
+      {counts}
+    FROM {table} t
+  )"""
+
+
+def compile_rule_results_sql(rule_orders: Optional[List[int]] = None,
+                             dim_users: str = "dim_users") -> str:
+    """
+    Compile registry rules into one query with exactly one scan per table.
+
+    Args:
+        rule_orders: Positions in DQ_RULES to compile (defaults to all rules)
+        dim_users: Relation substituted for {dim_users} in predicates
+
+    Returns rows of (rule_order, category, check_name, table_name, total_rows,
+    violation_count, severity, max_violation_rate, status).
+    """
+    rule_orders = list(range(len(DQ_RULES))) if rule_orders is None else rule_orders
+
+    by_table: Dict[str, List[int]] = {}
+    for order in rule_orders:
+        by_table.setdefault(DQ_RULES[order].table, []).append(order)
+
+    scans = "\n  UNION ALL".join(
+        compile_table_scan(table, [DQ_RULES[i] for i in orders], orders, dim_users)
+        for table, orders in by_table.items()
+    )
+    return f"""
+SELECT
+  *,
+  {RULE_STATUS_SQL} AS status
+FROM ({scans}
+)
+ORDER BY rule_order"""
+
+
+def compile_category_view_sql(category: str) -> str:
+    """SELECT reshaping the fused results into one category's original layout."""
+    return f"""
+SELECT {RULE_CATEGORY_COLUMNS[category]}
+FROM {RULE_RESULTS_VIEW}
+WHERE category = {_sql_literal(category)}
+ORDER BY rule_order"""
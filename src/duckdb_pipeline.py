@@ -1,19 +1,58 @@
 """DuckDB database loader for Bree case study data pipeline."""
 
+import argparse
 import logging
+import uuid
 from pathlib import Path
 from typing import Dict, Optional
 
 import duckdb
 import pandas as pd
 
-from constants import SQL_DIR, TABLE_CONFIG
+from arrow_query import fetch_frame
+from constants import DATA_VERSION_TABLE, ENUM_COLUMNS, FACT_SORT_KEYS, FUNNEL_STEP_BITS, SQL_DIR, TABLE_CONFIG
 from data_reader import load_csv_files
+from metrics_timeseries import METRICS_DAILY_TABLE, QUANTILE_SKETCH_TABLE, update_metrics_daily
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Load-time projections for tables whose stored columns differ from the CSV.
+# properties_json is shredded into a MAP so property filters are columnar. The
+# shredding is lossy: empty payloads ({} or blank), malformed JSON and non-object
+# payloads (arrays, scalars) are stored as NULL, and nested object/array values
+# are kept as their JSON text. CASE only parses rows that passed json_valid, so
+# one bad payload cannot fail the whole insert.
+INSERT_PROJECTIONS = {
+    "fct_sessions": """
+        SELECT
+          event_id, user_id, session_id, ts, event_name, screen,
+          CASE WHEN json_valid(NULLIF(TRIM(properties_json), '')) THEN
+            CASE WHEN json_keys(properties_json::JSON) <> []
+                 THEN TRY_CAST(properties_json::JSON AS MAP(VARCHAR, VARCHAR))
+            END
+          END AS properties
+        FROM {source}
+    """
+}
+
+# Rows a load-time projection could not convert, counted and logged as a warning
+# on every insert: table -> (description, count query over {source})
+INSERT_REJECT_CHECKS = {
+    "fct_sessions": (
+        "properties_json payloads that are not JSON objects (stored as NULL properties)",
+        """
+        SELECT COUNT(*) FROM {source}
+        WHERE NULLIF(TRIM(properties_json), '') IS NOT NULL
+          AND NOT CASE WHEN json_valid(properties_json)
+                       THEN json_type(properties_json::JSON) = 'OBJECT'
+                       ELSE false
+                  END
+        """
+    )
+}
+
 
 class DatabaseError(Exception):
     """Custom exception for database operations."""
@@ -23,14 +62,19 @@ class DatabaseError(Exception):
 class DuckDBLoader:
     """Handles loading CSV data into DuckDB with proper schema management."""
     
-    def __init__(self, database_path: str = 'bree_case_study.db'):
+    def __init__(self, database_path: str = 'bree_case_study.db', typed_schema: bool = False,
+                 cluster_facts: bool = False):
         """
         Initialize DuckDB loader.
         
         Args:
             database_path: Path to database file or ':memory:' for in-memory database
+            typed_schema: Store ENUM_COLUMNS as DuckDB ENUM types derived from the loaded data
+            cluster_facts: Write fact tables sorted by FACT_SORT_KEYS (user, time)
         """
         self.database_path = database_path
+        self.typed_schema = typed_schema
+        self.cluster_facts = cluster_facts
         self.connection: Optional[duckdb.DuckDBPyConnection] = None
         
     def connect(self) -> duckdb.DuckDBPyConnection:
@@ -95,7 +139,221 @@ class DuckDBLoader:
         logger.info("Creating analytical views...")
         views_path = SQL_DIR / "canonical_views.sql"
         self.execute_sql_file(views_path, "create views")
-    
+
+    def create_aggregate_tables(self) -> None:
+        """Materialize (or rebuild) the pre-aggregated tables from the canonical views."""
+        logger.info("Creating aggregate tables...")
+        aggregates_path = SQL_DIR / "aggregate_tables.sql"
+        self.execute_sql_file(aggregates_path, "create aggregate tables")
+
+    def update_metric_time_series(self) -> None:
+        """Fold loans and users loaded since the last update into fct_metrics_daily and the loan quantile sketches."""
+        logger.info("Updating daily metric time series...")
+        days = update_metrics_daily(self.connect())
+        logger.info(f"✓ Updated {METRICS_DAILY_TABLE} and {QUANTILE_SKETCH_TABLE}: {days:,} days recomputed")
+
+    def stamp_data_version(self, source: str) -> str:
+        """
+        Record a new data version in meta_data_version.
+
+        Caches keyed on the data version (metric results, dashboard queries)
+        invalidate exactly when a load or append commits.
+
+        Args:
+            source: What changed the data, e.g. 'load' or 'append_sessions'
+
+        Returns:
+            The new data version (a load run id)
+        """
+        data_version = uuid.uuid4().hex
+        self.connect().execute(
+            f"INSERT INTO {DATA_VERSION_TABLE} VALUES (?, current_timestamp, ?)", [data_version, source]
+        )
+        return data_version
+
+    def apply_enum_types(self, table_name: str, source: str) -> None:
+        """
+        Convert a table's low-cardinality TEXT columns to ENUMs built from the data.
+
+        Must run on the empty table, before the first insert. Later appends with a
+        value outside the enum fail the insert, so reload to pick up new categories.
+
+        Args:
+            table_name: Table listed in ENUM_COLUMNS
+            source: Table or registered DataFrame holding the rows about to be loaded
+        """
+        conn = self.connect()
+
+        for column in ENUM_COLUMNS.get(table_name, []):
+            enum_type = f"{column}_enum"
+            conn.execute(f"DROP TYPE IF EXISTS {enum_type}")
+            conn.execute(f"""
+                CREATE TYPE {enum_type} AS ENUM (
+                    SELECT DISTINCT CAST({column} AS VARCHAR) FROM {source}
+                    WHERE {column} IS NOT NULL ORDER BY 1
+                )
+            """)
+            conn.execute(f"ALTER TABLE {table_name} ALTER {column} SET DATA TYPE {enum_type}")
+
+        if table_name in ENUM_COLUMNS:
+            logger.info(f"✓ Typed {table_name} columns as ENUM: {', '.join(ENUM_COLUMNS[table_name])}")
+
+    def insert_rows(self, table_name: str, source: str) -> None:
+        """
+        Insert rows from a source relation, applying any load-time projection.
+
+        With cluster_facts, fact tables are written in FACT_SORT_KEYS order and the
+        ordering is recorded in meta_table_ordering. Each insert is sorted on its
+        own, so incremental appends keep the clustering per batch.
+
+        Args:
+            table_name: Target table
+            source: Table or registered DataFrame with the CSV columns
+        """
+        projection = INSERT_PROJECTIONS.get(table_name, "SELECT * FROM {source}")
+        insert_query = f"INSERT INTO {table_name} {projection.format(source=source)}"
+
+        # Sorted writes leave each row group covering a narrow user range, so min/max
+        # zonemaps prune per-user lookups and PARTITION BY user_id windows sort presorted input
+        sort_keys = FACT_SORT_KEYS.get(table_name) if self.cluster_facts else None
+        if sort_keys:
+            # Time keys arrive as CSV text, so order by their typed value
+            order_by = ", ".join(key if key == "user_id" else f"TRY_CAST({key} AS TIMESTAMP)"
+                                 for key in sort_keys)
+            insert_query = (f"INSERT INTO {table_name} SELECT * FROM ({projection.format(source=source)}) "
+                            f"ORDER BY {order_by}")
+
+        conn = self.connect()
+        conn.execute(insert_query)
+
+        if table_name in INSERT_REJECT_CHECKS:
+            description, reject_query = INSERT_REJECT_CHECKS[table_name]
+            rejected = conn.execute(reject_query.format(source=source)).fetchone()[0]
+            if rejected:
+                logger.warning(f"Found {rejected:,} {description} in {table_name}")
+
+        if sort_keys:
+            conn.execute("""
+                INSERT INTO meta_table_ordering VALUES (?, ?, current_timestamp)
+                ON CONFLICT (table_name) DO UPDATE SET
+                  sort_keys = EXCLUDED.sort_keys,
+                  sorted_at = EXCLUDED.sorted_at
+            """, [table_name, ", ".join(sort_keys)])
+
+    def update_session_rollups(self, source: str) -> None:
+        """
+        Fold newly loaded session events into fct_session_rollup and dim_user_first_events.
+
+        Sessions and users already present are merged (LEAST/GREATEST timestamps,
+        summed event counts, OR-ed step masks), so rollups can be appended batch by
+        batch instead of recomputing window functions over all events per query.
+        Events with a NULL session_id / user_id are skipped by the respective
+        rollup (they stay in fct_sessions for the DQ null-key checks).
+
+        Callers run this in the same transaction as the fct_sessions insert.
+
+        Args:
+            source: Table or registered DataFrame holding only the new fct_sessions rows
+
+        Raises:
+            DatabaseError: If either rollup fails
+        """
+        conn = self.connect()
+
+        step_mask = "CASE event_name " + " ".join(
+            f"WHEN '{event_name}' THEN {bit}" for event_name, bit in FUNNEL_STEP_BITS.items()
+        ) + " ELSE 0 END"
+
+        try:
+            conn.execute(f"""
+                INSERT INTO fct_session_rollup
+                SELECT
+                  session_id,
+                  MIN(user_id),
+                  MIN(ts),
+                  MAX(ts),
+                  EXTRACT(EPOCH FROM (MAX(ts) - MIN(ts))),
+                  COUNT(*),
+                  BIT_OR({step_mask})
+                FROM (SELECT session_id, user_id, CAST(ts AS TIMESTAMP) AS ts, event_name FROM {source})
+                WHERE session_id IS NOT NULL
+                GROUP BY session_id
+                ON CONFLICT (session_id) DO UPDATE SET
+                  session_start_ts     = LEAST(session_start_ts, EXCLUDED.session_start_ts),
+                  session_end_ts       = GREATEST(session_end_ts, EXCLUDED.session_end_ts),
+                  session_duration_sec = EXTRACT(EPOCH FROM (GREATEST(session_end_ts, EXCLUDED.session_end_ts)
+                                                           - LEAST(session_start_ts, EXCLUDED.session_start_ts))),
+                  event_count          = event_count + EXCLUDED.event_count,
+                  funnel_step_mask     = funnel_step_mask | EXCLUDED.funnel_step_mask
+            """)
+
+            conn.execute(f"""
+                INSERT INTO dim_user_first_events
+                SELECT
+                  user_id,
+                  MIN(ts),
+                  MIN(CASE WHEN event_name = 'app_open'               THEN ts END),
+                  MIN(CASE WHEN event_name = 'link_bank_success'      THEN ts END),
+                  MIN(CASE WHEN event_name = 'start_advance_request'  THEN ts END),
+                  MIN(CASE WHEN event_name = 'submit_advance_request' THEN ts END),
+                  MIN(CASE WHEN event_name = 'approved'               THEN ts END),
+                  MIN(CASE WHEN event_name = 'disbursed'              THEN ts END)
+                FROM (SELECT user_id, CAST(ts AS TIMESTAMP) AS ts, event_name FROM {source})
+                WHERE user_id IS NOT NULL
+                GROUP BY user_id
+                ON CONFLICT (user_id) DO UPDATE SET
+                  first_event_ts           = LEAST(first_event_ts, EXCLUDED.first_event_ts),
+                  first_app_open_ts        = LEAST(first_app_open_ts, EXCLUDED.first_app_open_ts),
+                  first_bank_link_ts       = LEAST(first_bank_link_ts, EXCLUDED.first_bank_link_ts),
+                  first_request_start_ts   = LEAST(first_request_start_ts, EXCLUDED.first_request_start_ts),
+                  first_request_submit_ts  = LEAST(first_request_submit_ts, EXCLUDED.first_request_submit_ts),
+                  first_approved_event_ts  = LEAST(first_approved_event_ts, EXCLUDED.first_approved_event_ts),
+                  first_disbursed_event_ts = LEAST(first_disbursed_event_ts, EXCLUDED.first_disbursed_event_ts)
+            """)
+        except Exception as e:
+            raise DatabaseError(f"Failed to update session rollups: {e}") from e
+
+        logger.info("✓ Updated session rollups (fct_session_rollup, dim_user_first_events)")
+
+    def append_sessions(self, dataframe: pd.DataFrame) -> int:
+        """
+        Incrementally append session events and their rollups.
+
+        The aggregate tables built from sessions (funnel cube, funnel HLL
+        sketches) are rebuilt in the same transaction before the new data
+        version is stamped, so version-keyed caches never pick up stale
+        aggregates under the new version.
+
+        Args:
+            dataframe: New fct_sessions rows (same columns as sessions.csv)
+
+        Returns:
+            Number of events appended
+
+        Raises:
+            DatabaseError: If the append fails (nothing is committed)
+        """
+        conn = self.connect()
+
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            conn.register("temp_sessions", dataframe)
+            self.insert_rows("fct_sessions", "temp_sessions")
+            self.update_session_rollups("temp_sessions")
+            self.create_aggregate_tables()
+            self.stamp_data_version("append_sessions")
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            error_msg = f"Failed to append sessions: {e}"
+            logger.error(error_msg)
+            raise DatabaseError(error_msg) from e
+        finally:
+            conn.unregister("temp_sessions")
+
+        logger.info(f"✓ Appended {len(dataframe):,} session events")
+        return len(dataframe)
+
     def get_connection(self) -> duckdb.DuckDBPyConnection:
         """Get the DuckDB connection for direct querying."""
         return self.connect()
@@ -132,9 +390,20 @@ class DuckDBLoader:
                 # Register DataFrame temporarily for DuckDB
                 conn.register("temp_dataframe", dataframe)
                 
-                # Insert data into table
-                insert_query = f"INSERT INTO {table_name} SELECT * FROM temp_dataframe"
-                conn.execute(insert_query)
+                if self.typed_schema:
+                    self.apply_enum_types(table_name, "temp_dataframe")
+
+                # Insert data into table; session rollups are maintained at load
+                # time in the same transaction, so they never diverge from fct_sessions
+                conn.execute("BEGIN TRANSACTION")
+                try:
+                    self.insert_rows(table_name, "temp_dataframe")
+                    if table_name == "fct_sessions":
+                        self.update_session_rollups("temp_dataframe")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
                 
                 # Verify insertion
                 count_result = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()
@@ -143,6 +412,10 @@ class DuckDBLoader:
                 logger.info(f"✓ Loaded {table_name}: {row_count:,} rows from {csv_filename}")
                 tables_loaded += 1
                 
+            except DatabaseError as e:
+                # Rollup failures would leave funnel aggregates silently empty
+                logger.error(f"✗ Failed to load {table_name}: {e}")
+                raise
             except Exception as e:
                 logger.error(f"✗ Failed to load {table_name}: {e}")
                 continue
@@ -189,7 +462,20 @@ class DuckDBLoader:
             # Step 5: Create analytical views
             logger.info("Step 5: Creating analytical views...")
             self.create_analytical_views()
-            
+
+            # Step 6: Materialize aggregate tables
+            logger.info("Step 6: Creating aggregate tables...")
+            self.create_aggregate_tables()
+
+            # Step 7: Update incrementally maintained metric tables
+            logger.info("Step 7: Updating daily metric time series...")
+            self.update_metric_time_series()
+
+            # Step 8: Stamp the data version that downstream caches key on
+            logger.info("Step 8: Stamping data version...")
+            data_version = self.stamp_data_version("load")
+            logger.info(f"✓ Data version: {data_version}")
+
             total_tables = len(TABLE_CONFIG)
             logger.info(f"✓ Pipeline complete! {tables_loaded}/{total_tables} tables loaded successfully")
             logger.info("="*70)
@@ -247,7 +533,7 @@ class DuckDBLoader:
         for table_name in TABLE_CONFIG.keys():
             try:
                 print(f"\n{table_name}:")
-                result = conn.execute(f"SELECT * FROM {table_name} LIMIT {limit}").fetchdf()
+                result = fetch_frame(conn, f"SELECT * FROM {table_name} LIMIT {limit}")
                 print(result.to_string(index=False))
                 
             except Exception as e:
@@ -322,9 +608,16 @@ class DuckDBLoader:
 
 def main():
     """Main function to run the complete data loading pipeline."""
+    parser = argparse.ArgumentParser(description="Load Bree CSV data into DuckDB")
+    parser.add_argument("--typed-schema", action="store_true",
+                        help="Store low-cardinality text columns as ENUM types derived from the data")
+    parser.add_argument("--cluster-facts", action="store_true",
+                        help="Write fact tables sorted by (user_id, time)")
+    args = parser.parse_args()
+
     try:
         # Initialize loader
-        loader = DuckDBLoader()
+        loader = DuckDBLoader(typed_schema=args.typed_schema, cluster_facts=args.cluster_facts)
         
         # Load all data
         connection = loader.load_all_data()
@@ -345,24 +638,24 @@ def main():
         logger.info("\nRunning basic analytical queries...")
         
         # User distribution by province
-        result = connection.execute("""
+        result = fetch_frame(connection, """
             SELECT province, COUNT(*) as user_count 
             FROM dim_users 
             GROUP BY province 
             ORDER BY user_count DESC
             LIMIT 5
-        """).fetchdf()
+        """)
         print("\nTop 5 provinces by user count:")
         print(result.to_string(index=False))
         
         # Loan status distribution
-        result = connection.execute("""
+        result = fetch_frame(connection, """
             SELECT status, COUNT(*) as loan_count,
                    ROUND(AVG(amount), 2) as avg_amount
             FROM fct_loans 
             GROUP BY status 
             ORDER BY loan_count DESC
-        """).fetchdf()
+        """)
         print("\nLoan status distribution:")
         print(result.to_string(index=False))
         
@@ -0,0 +1,94 @@
+"""Segment lookups against the materialized funnel cube (agg_funnel_cube)."""
+
+from typing import Optional
+
+import duckdb
+import pandas as pd
+
+from arrow_query import fetch_frame
+
+FUNNEL_CUBE_TABLE = "agg_funnel_cube"
+
+# Cube dimensions in GROUPING() bit order (most significant bit first); the signup
+# cohort is a single (signup_year, signup_month) grouping element.
+FUNNEL_CUBE_DIMENSIONS = ["province", "device_os", "acquisition_channel", "signup_month"]
+
+FUNNEL_STEP_COLUMNS = [
+    "total_users",
+    "app_open_users",
+    "bank_linked_users",
+    "requested_users",
+    "approved_users",
+    "disbursed_users",
+    "repaid_users"
+]
+
+
+def grouping_id_for(group_by) -> int:
+    """
+    Return the cube grouping_id for a set of kept dimensions.
+
+    Args:
+        group_by: Dimensions that are broken out (all others are rolled up)
+    """
+    unknown = set(group_by) - set(FUNNEL_CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown funnel cube dimensions: {sorted(unknown)}")
+
+    grouping_id = 0
+    for dimension in FUNNEL_CUBE_DIMENSIONS:
+        grouping_id = (grouping_id << 1) | (0 if dimension in group_by else 1)
+    return grouping_id
+
+
+def lookup_funnel(conn: duckdb.DuckDBPyConnection,
+                  province: Optional[str] = None,
+                  device_os: Optional[str] = None,
+                  acquisition_channel: Optional[str] = None,
+                  signup_month: Optional[int] = None,
+                  group_by=()) -> pd.DataFrame:
+    """
+    Fetch funnel step counts for any segment combination from the cube.
+
+    A filter value pins that dimension; ``group_by`` breaks a dimension out into
+    one row per value. Everything else is read from its rolled-up level, so the
+    query is an indexed-size lookup regardless of the user count.
+
+    Args:
+        conn: Connection to a database built by the loader
+        province, device_os, acquisition_channel, signup_month: Optional filters
+        group_by: Dimensions to return one row per value for
+
+    Returns:
+        DataFrame with the broken-out dimensions plus FUNNEL_STEP_COLUMNS
+    """
+    filters = {
+        "province": province,
+        "device_os": device_os,
+        "acquisition_channel": acquisition_channel,
+        "signup_month": signup_month
+    }
+    kept = [d for d in FUNNEL_CUBE_DIMENSIONS if d in group_by or filters[d] is not None]
+
+    conditions = ["grouping_id = ?"]
+    params = [grouping_id_for(kept)]
+    for dimension, value in filters.items():
+        if value is not None:
+            conditions.append(f"{dimension} = ?")
+            params.append(value)
+
+    group_columns = [d for d in FUNNEL_CUBE_DIMENSIONS if d in group_by]
+    if "signup_month" in group_columns:
+        group_columns.insert(group_columns.index("signup_month"), "signup_year")
+
+    select_columns = group_columns + [f"SUM({c})::BIGINT AS {c}" for c in FUNNEL_STEP_COLUMNS]
+    group_clause = f"GROUP BY {', '.join(group_columns)} ORDER BY {', '.join(group_columns)}" if group_columns else ""
+
+    # SUM over the matching rows also folds the same month across signup years
+    query = f"""
+        SELECT {', '.join(select_columns)}
+        FROM {FUNNEL_CUBE_TABLE}
+        WHERE {' AND '.join(conditions)}
+        {group_clause}
+    """
+    return fetch_frame(conn, query, params)
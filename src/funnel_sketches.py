@@ -0,0 +1,140 @@
+"""Mergeable HyperLogLog distinct-user counts over agg_funnel_hll."""
+
+import math
+from typing import Dict, Iterable, Optional, Sequence
+
+import duckdb
+import numpy as np
+
+FUNNEL_HLL_TABLE = "agg_funnel_hll"
+
+# Must match the precision baked into sql/aggregate_tables.sql
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_STANDARD_ERROR = 1.04 / math.sqrt(HLL_REGISTERS)  # ~1.6% relative
+
+
+class FunnelSketchError(Exception):
+    """Custom exception for funnel sketch queries."""
+    pass
+
+
+class HyperLogLog:
+    """Dense HLL state that merges with other states register-wise."""
+
+    def __init__(self, registers: Optional[np.ndarray] = None):
+        """
+        Initialize sketch.
+
+        Args:
+            registers: Dense uint8 register array of length HLL_REGISTERS
+        """
+        if registers is None:
+            registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        self.registers = registers
+
+    @classmethod
+    def from_encoded(cls, encoded: Iterable[int]) -> "HyperLogLog":
+        """Build a sketch from the sparse (index << 8) | rank encoding stored in DuckDB."""
+        values = np.fromiter(encoded, dtype=np.uint32)
+        registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        np.maximum.at(registers, values >> 8, (values & 0xFF).astype(np.uint8))
+        return cls(registers)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Return the union of two sketches."""
+        return HyperLogLog(np.maximum(self.registers, other.registers))
+
+    __or__ = merge
+
+    def estimate(self) -> float:
+        """Distinct count estimate with the small-range (linear counting) correction."""
+        m = HLL_REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros > 0:
+            return m * math.log(m / zeros)
+        return raw
+
+
+def with_error_bounds(estimate: float, z: float = 1.96) -> Dict[str, float]:
+    """Attach the HLL standard error and a normal-approximation interval."""
+    margin = z * HLL_STANDARD_ERROR * estimate
+    return {
+        "estimate": round(estimate, 1),
+        "relative_std_error": round(HLL_STANDARD_ERROR, 4),
+        "lower_bound": round(max(0.0, estimate - margin), 1),
+        "upper_bound": round(estimate + margin, 1)
+    }
+
+
+def merge_sketches(conn: duckdb.DuckDBPyConnection, step: str,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   provinces: Optional[Sequence[str]] = None,
+                   device_os: Optional[Sequence[str]] = None,
+                   acquisition_channels: Optional[Sequence[str]] = None) -> HyperLogLog:
+    """
+    Merge stored sketches for one funnel step over a date range and segment union.
+
+    The register-wise MAX runs inside DuckDB, so at most HLL_REGISTERS rows come
+    back however many days and segments are selected.
+
+    Args:
+        conn: Connection to a database built by the loader
+        step: Funnel event name (e.g. 'submit_advance_request')
+        start_date, end_date: Inclusive event_date bounds (ISO dates)
+        provinces, device_os, acquisition_channels: Segment values to union
+
+    Raises:
+        FunnelSketchError: If no sketches exist for ``step``
+    """
+    known_steps = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT step FROM {FUNNEL_HLL_TABLE} ORDER BY step"
+    ).fetchall()]
+    if step not in known_steps:
+        raise FunnelSketchError(f"Unknown funnel step: {step} (expected one of {known_steps})")
+
+    conditions = ["step = ?"]
+    params = [step]
+
+    if start_date is not None:
+        conditions.append("event_date >= ?::DATE")
+        params.append(start_date)
+    if end_date is not None:
+        conditions.append("event_date <= ?::DATE")
+        params.append(end_date)
+
+    for column, values in (("province", provinces),
+                           ("device_os", device_os),
+                           ("acquisition_channel", acquisition_channels)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+
+    merged = conn.execute(f"""
+        SELECT
+          (r >> 8)::USMALLINT    AS register_idx,
+          MAX(r & 255)::UTINYINT AS register_rank
+        FROM {FUNNEL_HLL_TABLE}, UNNEST(hll_registers) AS t(r)
+        WHERE {' AND '.join(conditions)}
+        GROUP BY register_idx
+    """, params).fetchnumpy()
+
+    registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+    registers[merged["register_idx"]] = merged["register_rank"]
+    return HyperLogLog(registers)
+
+
+def estimate_distinct_users(conn: duckdb.DuckDBPyConnection, step: str, **filters) -> Dict[str, float]:
+    """
+    Approximate distinct users reaching ``step`` for a date range and segment union.
+
+    Accepts the same filters as merge_sketches(). Returns the estimate plus a 95%
+    interval from the HLL standard error (1.04 / sqrt(4096) ~= 1.6%).
+
+    Raises:
+        FunnelSketchError: If no sketches exist for ``step``
+    """
+    return with_error_bounds(merge_sketches(conn, step, **filters).estimate())
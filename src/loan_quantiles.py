@@ -0,0 +1,169 @@
+"""Mergeable quantile sketches of loan distributions over agg_loan_quantile_sketches."""
+
+import argparse
+import math
+from typing import Any, Dict, Optional, Sequence
+
+import duckdb
+import numpy as np
+
+from metric_registry import compile_params
+from metrics_timeseries import (QUANTILE_BUCKET_OFFSET, QUANTILE_GAMMA, QUANTILE_MEASURES,
+                                QUANTILE_RELATIVE_ACCURACY, QUANTILE_SKETCH_TABLE, SEGMENT_COLUMNS)
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LoanQuantileError(Exception):
+    """Custom exception for loan quantile sketch queries."""
+    pass
+
+
+class QuantileSketch:
+    """Sparse log-bucketed histogram that merges with other sketches by adding counts."""
+
+    def __init__(self, buckets: Optional[np.ndarray] = None, counts: Optional[np.ndarray] = None):
+        """
+        Initialize sketch.
+
+        Args:
+            buckets: Ascending sign-encoded bucket keys (see metrics_timeseries)
+            counts: Values counted in each bucket
+        """
+        self.buckets = np.asarray(buckets if buckets is not None else [], dtype=np.int64)
+        self.counts = np.asarray(counts if counts is not None else [], dtype=np.int64)
+
+    @property
+    def count(self) -> int:
+        """Number of values summarized."""
+        return int(self.counts.sum())
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Return the sketch of both inputs' values."""
+        buckets, inverse = np.unique(np.concatenate([self.buckets, other.buckets]), return_inverse=True)
+        counts = np.zeros(len(buckets), dtype=np.int64)
+        np.add.at(counts, inverse, np.concatenate([self.counts, other.counts]))
+        return QuantileSketch(buckets, counts)
+
+    __or__ = merge
+
+    @staticmethod
+    def bucket_value(bucket: int) -> float:
+        """Representative value of a bucket, within the relative accuracy of all its values."""
+        if bucket == 0:
+            return 0.0
+        index = abs(bucket) - QUANTILE_BUCKET_OFFSET
+        return math.copysign(2 * QUANTILE_GAMMA ** index / (QUANTILE_GAMMA + 1), bucket)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q-quantile (nearest rank, as quantile_disc), or None for an empty sketch."""
+        if not 0 <= q <= 1:
+            raise LoanQuantileError(f"Quantile must be in [0, 1], got {q}")
+        if self.count == 0:
+            return None
+        # 0-based position of the ceil(q * n)-th smallest value
+        rank = max(math.ceil(q * self.count) - 1, 0)
+        position = int(np.searchsorted(np.cumsum(self.counts), rank, side="right"))
+        return self.bucket_value(int(self.buckets[min(position, len(self.buckets) - 1)]))
+
+
+def merge_sketches(conn: duckdb.DuckDBPyConnection, measure: str,
+                   start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   **segments: Any) -> QuantileSketch:
+    """
+    Merge stored sketches of one measure over a date range and segment union.
+
+    Counts are summed per bucket inside DuckDB, so only the occupied buckets
+    (a few hundred at 1% accuracy) come back however many days are selected.
+
+    Args:
+        conn: Connection to a database built by the loader
+        measure: Name from QUANTILE_MEASURES
+        start_date, end_date: Inclusive metric_date bounds (ISO dates)
+        **segments: province / device_os / acquisition_channel value or list of values
+    """
+    if measure not in QUANTILE_MEASURES:
+        raise LoanQuantileError(f"Unknown measure: {measure} (expected one of {list(QUANTILE_MEASURES)})")
+    unknown = [column for column in segments if column not in SEGMENT_COLUMNS]
+    if unknown:
+        raise LoanQuantileError(f"Unknown segment columns: {unknown}")
+
+    where_clause, params = compile_params(segments)
+    conditions = [where_clause[len("WHERE "):]] if where_clause else []
+    conditions.append("measure = ?")
+    params.append(measure)
+    if start_date is not None:
+        conditions.append("metric_date >= ?::DATE")
+        params.append(start_date)
+    if end_date is not None:
+        conditions.append("metric_date <= ?::DATE")
+        params.append(end_date)
+
+    merged = conn.execute(f"""
+        SELECT bucket, SUM(bucket_count) AS bucket_count
+        FROM (
+          SELECT UNNEST(buckets) AS bucket, UNNEST(counts) AS bucket_count
+          FROM {QUANTILE_SKETCH_TABLE}
+          WHERE {' AND '.join(conditions)}
+        )
+        GROUP BY bucket
+        ORDER BY bucket
+    """, params).fetchnumpy()
+
+    return QuantileSketch(merged["bucket"], merged["bucket_count"])
+
+
+def estimate_quantiles(conn: duckdb.DuckDBPyConnection, measure: str,
+                       quantiles: Sequence[float] = DEFAULT_QUANTILES, **filters) -> Dict[str, Optional[float]]:
+    """
+    Approximate quantiles of ``measure`` for a date range and segment union.
+
+    Accepts the same filters as merge_sketches(). Estimates are within 1%
+    (QUANTILE_RELATIVE_ACCURACY) of a value of the requested rank.
+
+    Returns:
+        {"count": n, "p50": ..., "p90": ..., ...}
+    """
+    sketch = merge_sketches(conn, measure, **filters)
+    result: Dict[str, Optional[float]] = {"count": sketch.count}
+    for q in quantiles:
+        value = sketch.quantile(q)
+        result[f"p{q * 100:g}"] = None if value is None else round(value, 4)
+    return result
+
+
+def main():
+    """Print p50/p90/p99 of the sketched loan measures."""
+    parser = argparse.ArgumentParser(description="Approximate loan distribution quantiles from stored sketches")
+    parser.add_argument("--db", default="bree_case_study.db", help="DuckDB database path")
+    parser.add_argument("--measure", action="append", choices=list(QUANTILE_MEASURES),
+                        help="Measure to report (repeatable; default all)")
+    parser.add_argument("--start", default=None, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--province", action="append", help="Province filter (repeatable)")
+    parser.add_argument("--device-os", action="append", help="Device OS filter (repeatable)")
+    parser.add_argument("--acquisition-channel", action="append", help="Acquisition channel filter (repeatable)")
+    args = parser.parse_args()
+
+    segments = {
+        "province": args.province,
+        "device_os": args.device_os,
+        "acquisition_channel": args.acquisition_channel
+    }
+    segments = {column: values for column, values in segments.items() if values}
+
+    conn = duckdb.connect(args.db, read_only=True)
+    try:
+        print(f"\nLoan quantiles (relative accuracy {QUANTILE_RELATIVE_ACCURACY:.0%})")
+        print(f"{'measure':<16} {'count':>8} {'p50':>10} {'p90':>10} {'p99':>10}")
+        for measure in args.measure or QUANTILE_MEASURES:
+            estimate = estimate_quantiles(conn, measure, start_date=args.start, end_date=args.end, **segments)
+            cells = [f"{estimate[key]:>10.2f}" if estimate[key] is not None else f"{'N/A':>10}"
+                     for key in ("p50", "p90", "p99")]
+            print(f"{measure:<16} {estimate['count']:>8,} {' '.join(cells)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
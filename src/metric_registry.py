@@ -0,0 +1,480 @@
+"""
+Declarative business metric registry with a versioned result cache.
+
+Each metric is a set of output columns (SQL expressions written as for a
+standalone query over its grain's source relation), an optional row filter and a
+grain. The engine computes all requested metrics of a grain in one scan, moving
+each metric's filter into FILTER clauses of its aggregates, and caches every
+metric's result under (metric, parameters, data version) so repeated requests
+from the CLI, dashboard or tests skip the database until the data changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import duckdb
+import pandas as pd
+
+from arrow_query import fetch_frame
+from constants import DATA_VERSION_TABLE, METRIC_CACHE_DIR, TABLE_CONFIG
+
+# Source relation of each grain; one row per user / per loan, with the user
+# segment dimensions available for filtering
+GRAIN_SOURCES = {
+    "user": """(
+    SELECT
+      u.user_id, u.signup_at_utc AS signup_at, u.bank_linked_flag,
+      u.province, u.device_os, u.acquisition_channel, u.signup_month,
+      f.first_request_at
+    FROM v_dim_users_clean u
+    LEFT JOIN (
+      SELECT user_id, MIN(requested_at_utc) AS first_request_at
+      FROM v_fct_loans_clean
+      GROUP BY 1
+    ) f USING(user_id)
+  )""",
+    "loan": """(
+    SELECT l.*, u.province, u.device_os, u.acquisition_channel, u.signup_month
+    FROM v_fct_loans_clean l
+    LEFT JOIN v_dim_users_clean u USING(user_id)
+  )"""
+}
+
+# Columns metric parameters may filter on (equality or IN list)
+PARAM_DIMENSIONS = ("province", "device_os", "acquisition_channel", "signup_month")
+
+_AGGREGATE_CALL = re.compile(
+    r"\b(COUNT|SUM|AVG|MIN|MAX|MEDIAN|STDDEV_SAMP|QUANTILE_CONT|BOOL_OR|BOOL_AND)\s*\(",
+    re.IGNORECASE
+)
+
+
+class MetricRegistryError(Exception):
+    """Custom exception for metric registry operations."""
+    pass
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """One metric: output columns over a grain's source, restricted to ``filters``."""
+    name: str
+    title: str
+    grain: str
+    # Output column -> SQL expression (aggregates over the grain source)
+    columns: Dict[str, str]
+    filters: Optional[str] = None
+    description: str = ""
+
+
+METRIC_DEFINITIONS: List[MetricDefinition] = [
+    MetricDefinition(
+        name="activation",
+        title="1. D1/D7/W1 Signup-to-Request Rate",
+        description="Measures user activation and product-market fit",
+        grain="user",
+        columns={
+            "total_signups": "COUNT(*)",
+            "d1_requests": "COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 1 THEN 1 END)",
+            "d7_requests": "COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 7 THEN 1 END)",
+            "w1_requests": "COUNT(CASE WHEN DATEDIFF('week', signup_at, first_request_at) <= 1 THEN 1 END)",
+            "d1_rate_pct": ("ROUND(100.0 * COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 1 "
+                            "THEN 1 END) / COUNT(*), 2)"),
+            "d7_rate_pct": ("ROUND(100.0 * COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 7 "
+                            "THEN 1 END) / COUNT(*), 2)"),
+            "w1_rate_pct": ("ROUND(100.0 * COUNT(CASE WHEN DATEDIFF('week', signup_at, first_request_at) <= 1 "
+                            "THEN 1 END) / COUNT(*), 2)")
+        }
+    ),
+    MetricDefinition(
+        name="bank_link",
+        title="2. Bank Link Rate",
+        description="Critical onboarding step required for loan eligibility",
+        grain="user",
+        columns={
+            "total_users": "COUNT(*)",
+            "users_linked_bank": "SUM(bank_linked_flag)",
+            "bank_link_rate_pct": "ROUND(SUM(bank_linked_flag) * 100.0 / COUNT(*), 2)"
+        }
+    ),
+    MetricDefinition(
+        name="approval",
+        title="3. Approval Rate & Disbursement Rate",
+        description="Measures underwriting efficiency and operational performance",
+        grain="loan",
+        columns={
+            "total_loan_requests": "COUNT(*)",
+            "approved_loans": "SUM(is_approved)",
+            "disbursed_loans": "SUM(is_disbursed)",
+            "approval_rate_pct": "ROUND(SUM(is_approved) * 100.0 / COUNT(*), 2)",
+            "disbursement_rate_pct": "ROUND(SUM(is_disbursed) * 100.0 / COUNT(*), 2)",
+            "approval_to_disbursement_rate_pct": "ROUND(SUM(is_disbursed) * 100.0 / NULLIF(SUM(is_approved), 0), 2)"
+        }
+    ),
+    MetricDefinition(
+        name="repayment",
+        title="4. Repayment Rate & Default Rate",
+        description="Core risk metrics for loan portfolio health",
+        grain="loan",
+        filters="is_disbursed = 1",
+        columns={
+            "total_disbursed_loans": "COUNT(*)",
+            "repaid_loans": "SUM(is_repaid)",
+            "defaulted_loans": "SUM(is_default)",
+            "repayment_rate_pct": "ROUND(SUM(is_repaid) * 100.0 / COUNT(*), 2)",
+            "default_rate_pct": "ROUND(SUM(is_default) * 100.0 / COUNT(*), 2)"
+        }
+    ),
+    MetricDefinition(
+        name="loan_amount",
+        title="5. Average Loan Amount & Total Take-Rate Per Loan",
+        description="Unit economics and revenue per transaction",
+        grain="loan",
+        columns={
+            "total_loans": "COUNT(*)",
+            "avg_loan_amount": "ROUND(AVG(amount), 2)",
+            "avg_take": "ROUND(AVG(revenue), 2)",
+            "avg_take_rate_pct": "ROUND(AVG(revenue_to_loan) * 100, 2)"
+        }
+    ),
+    MetricDefinition(
+        name="instant",
+        title="6. Instant Transfer Adoption Rate",
+        description="Premium feature adoption and additional revenue stream",
+        grain="loan",
+        filters="is_disbursed = 1",
+        columns={
+            "disbursed_loans": "COUNT(*)",
+            "instant_transfer_users": "SUM(CASE WHEN instant_transfer_fee > 0 THEN 1 ELSE 0 END)",
+            "instant_adoption_rate_pct": ("ROUND(SUM(CASE WHEN instant_transfer_fee > 0 THEN 1 ELSE 0 END) "
+                                          "* 100.0 / COUNT(*), 2)")
+        }
+    ),
+    MetricDefinition(
+        name="revenue",
+        title="7. Revenue Per Disbursed Loan (Exclude Principal)",
+        description="Core revenue metric excluding principal (which is repaid)",
+        grain="loan",
+        filters="is_disbursed = 1",
+        columns={
+            "disbursed_loans": "COUNT(*)",
+            "avg_revenue_per_loan": "ROUND(AVG(revenue), 2)",
+            "total_revenue": "ROUND(SUM(revenue), 2)",
+            "avg_fee": "ROUND(AVG(fee), 2)",
+            "avg_tip": "ROUND(AVG(tip_amount), 2)",
+            "avg_instant_fee": "ROUND(AVG(instant_transfer_fee), 2)"
+        }
+    ),
+    MetricDefinition(
+        name="late",
+        title="8. Guardrail: Basic NPS Proxy - Late Payment Rate",
+        description="Customer satisfaction guardrail - high late payment rates may indicate customer stress",
+        grain="loan",
+        filters="is_repaid = 1",
+        columns={
+            "repaid_loans": "COUNT(*)",
+            "late_repaid_loans": "SUM(CASE WHEN late_days > 7 THEN 1 ELSE 0 END)",
+            "late_payment_rate_pct": "ROUND(SUM(CASE WHEN late_days > 7 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2)",
+            "avg_late_days": "ROUND(AVG(late_days), 1)"
+        }
+    ),
+]
+
+METRICS: Dict[str, MetricDefinition] = {metric.name: metric for metric in METRIC_DEFINITIONS}
+
+
+def apply_filter(expression: str, predicate: Optional[str]) -> str:
+    """Add ``FILTER (WHERE predicate)`` to every aggregate call in ``expression``."""
+    if not predicate:
+        return expression
+
+    result, position = [], 0
+    for match in _AGGREGATE_CALL.finditer(expression):
+        if match.start() < position:
+            continue  # inside an aggregate already handled
+        depth, end = 1, match.end()
+        while depth:
+            if end >= len(expression):
+                raise MetricRegistryError(f"Unbalanced parentheses in metric expression: {expression}")
+            depth += {"(": 1, ")": -1}.get(expression[end], 0)
+            end += 1
+        result.append(expression[position:end])
+        result.append(f" FILTER (WHERE {predicate})")
+        position = end
+    result.append(expression[position:])
+    return "".join(result)
+
+
+def compile_params(params: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+    """
+    Compile segment parameters into a WHERE clause with bound values.
+
+    Args:
+        params: Dimension -> value, or list of values (None / 'All' = no filter)
+
+    Returns:
+        (where_clause, bound_values)
+    """
+    conditions, values = [], []
+    for dimension, value in sorted((params or {}).items()):
+        if dimension not in PARAM_DIMENSIONS:
+            raise MetricRegistryError(f"Unknown metric parameter: {dimension}")
+        if value is None or value == "All":
+            continue
+        if isinstance(value, (list, tuple)):
+            conditions.append(f"{dimension} IN ({', '.join('?' for _ in value)})")
+            values.extend(value)
+        else:
+            conditions.append(f"{dimension} = ?")
+            values.append(value)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), values
+
+
+def compile_grain_scan(grain: str, metrics: List[MetricDefinition],
+                       params: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Any]]:
+    """
+    Compile metrics of one grain into a single scan of its source.
+
+    Output columns are named <metric>__<column>.
+
+    Returns:
+        (sql, bound_values)
+    """
+    if grain not in GRAIN_SOURCES:
+        raise MetricRegistryError(f"Unknown metric grain: {grain}")
+
+    select_list = ",\n  ".join(
+        f'{apply_filter(expression, metric.filters)} AS "{metric.name}__{column}"'
+        for metric in metrics
+        for column, expression in metric.columns.items()
+    )
+    where_clause, values = compile_params(params)
+    return f"SELECT\n  {select_list}\nFROM {GRAIN_SOURCES[grain]} src\n{where_clause}", values
+
+
+def current_data_version(conn: duckdb.DuckDBPyConnection) -> str:
+    """
+    Version of the loaded data: the latest stamp in meta_data_version.
+
+    Databases built before the loader stamped versions fall back to a
+    fingerprint of every base table's row count.
+    """
+    try:
+        stamp = conn.execute(f"""
+            SELECT data_version FROM {DATA_VERSION_TABLE}
+            ORDER BY stamped_at DESC, rowid DESC
+            LIMIT 1
+        """).fetchone()
+    except duckdb.CatalogException:
+        stamp = None
+    if stamp is not None:
+        return stamp[0]
+
+    counts = conn.execute(" UNION ALL ".join(
+        f"SELECT '{table}', COUNT(*) FROM {table}" for table in TABLE_CONFIG
+    )).fetchall()
+    return ",".join(f"{table}={rows}" for table, rows in sorted(counts))
+
+
+class MetricCache:
+    """
+    Two-level cache of metric results: a bounded in-process LRU in front of
+    Parquet files shared by every process using the same cache directory.
+    """
+
+    def __init__(self, directory: Optional[Path] = METRIC_CACHE_DIR, max_entries: int = 256):
+        """
+        Args:
+            directory: Directory for persisted results (None = in-process only)
+            max_entries: Results kept in memory
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._entries_lock = threading.Lock()
+        # In-memory DuckDB connection reading and writing the Parquet files
+        self._io: Optional[duckdb.DuckDBPyConnection] = None
+        self._io_lock = threading.Lock()
+
+    def _io_connection(self) -> duckdb.DuckDBPyConnection:
+        if self._io is None:
+            self._io = duckdb.connect()
+        return self._io
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def _path(self, metric: str, params: Optional[Dict[str, Any]], data_version: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / f"{metric}-{self._digest(params or {})}-{self._digest(data_version)}.parquet"
+
+    def get(self, metric: str, params: Optional[Dict[str, Any]], data_version: str) -> Optional[pd.DataFrame]:
+        """Cached result for the key, or None"""
+        key = self._digest([metric, params or {}, data_version])
+        with self._entries_lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key].copy()
+
+        path = self._path(metric, params, data_version)
+        if path is None or not path.exists():
+            return None
+        with self._io_lock:
+            result = fetch_frame(self._io_connection(), "SELECT * FROM read_parquet(?)", [str(path)])
+        self._remember(key, result)
+        return result.copy()
+
+    def put(self, metric: str, params: Optional[Dict[str, Any]], data_version: str, result: pd.DataFrame):
+        """Store a result, replacing results of the same metric and parameters for older data"""
+        self._remember(self._digest([metric, params or {}, data_version]), result.copy())
+
+        path = self._path(metric, params, data_version)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for stale in path.parent.glob(f"{metric}-{self._digest(params or {})}-*.parquet"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+        # Write then rename so concurrent readers never see a partial file
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with self._io_lock:
+            writer = self._io_connection()
+            writer.register("metric_result", result)
+            try:
+                writer.execute(f"COPY metric_result TO '{temp_path}' (FORMAT PARQUET)")
+            finally:
+                writer.unregister("metric_result")
+        os.replace(temp_path, path)
+
+    def _remember(self, key: str, result: pd.DataFrame):
+        with self._entries_lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class MetricEngine:
+    """Computes registry metrics with one scan per grain, through the result cache."""
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, cache: Optional[MetricCache] = None):
+        """
+        Args:
+            conn: Connection to a database built by the pipeline
+            cache: Result cache (None disables caching)
+        """
+        self.conn = conn
+        self.cache = cache
+
+    def compute(self, names: Optional[List[str]] = None,
+                params: Optional[Dict[str, Any]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Compute metrics, serving unchanged ones from the cache.
+
+        Args:
+            names: Metric names (defaults to every registered metric, in registry order)
+            params: Segment filters applied to every metric (see PARAM_DIMENSIONS)
+
+        Returns:
+            Metric name -> single-row DataFrame with the metric's columns
+
+        Raises:
+            MetricRegistryError: If a metric or parameter is unknown
+        """
+        names = list(METRICS) if names is None else names
+        unknown = [name for name in names if name not in METRICS]
+        if unknown:
+            raise MetricRegistryError(f"Unknown metrics: {unknown}")
+
+        data_version = current_data_version(self.conn) if self.cache is not None else None
+        results: Dict[str, pd.DataFrame] = {}
+        missing: Dict[str, List[MetricDefinition]] = {}
+        for name in names:
+            cached = self.cache.get(name, params, data_version) if self.cache is not None else None
+            if cached is not None:
+                results[name] = cached
+            else:
+                missing.setdefault(METRICS[name].grain, []).append(METRICS[name])
+
+        for grain, metrics in missing.items():
+            sql, values = compile_grain_scan(grain, metrics, params)
+            combined = fetch_frame(self.conn, sql, values)
+            for metric in metrics:
+                prefix = f"{metric.name}__"
+                columns = [column for column in combined.columns if column.startswith(prefix)]
+                results[metric.name] = combined[columns].rename(columns=lambda column: column[len(prefix):])
+                if self.cache is not None:
+                    self.cache.put(metric.name, params, data_version, results[metric.name])
+
+        return {name: results[name] for name in names}
+
+    def compute_concurrent(self, names: Optional[List[str]] = None,
+                           params: Optional[Dict[str, Any]] = None,
+                           parallelism: int = 4) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict[str, Any]]]:
+        """
+        Compute metrics concurrently, one query per metric on pooled cursors.
+
+        Unlike compute(), metrics of a grain are not fused into one scan, so each
+        result carries its own latency; DuckDB runs the per-metric queries in
+        parallel. Cache hits are served without a query.
+
+        Args:
+            names: Metric names (defaults to every registered metric, in registry order)
+            params: Segment filters applied to every metric (see PARAM_DIMENSIONS)
+            parallelism: Metrics computed at once (each on its own cursor)
+
+        Returns:
+            (results, timings): metric name -> single-row DataFrame, and metric
+            name -> {"latency_ms": float, "cached": bool}
+
+        Raises:
+            MetricRegistryError: If a metric or parameter is unknown, or parallelism < 1
+        """
+        names = list(METRICS) if names is None else names
+        unknown = [name for name in names if name not in METRICS]
+        if unknown:
+            raise MetricRegistryError(f"Unknown metrics: {unknown}")
+        if parallelism < 1:
+            raise MetricRegistryError("parallelism must be at least 1")
+
+        data_version = current_data_version(self.conn) if self.cache is not None else None
+
+        def compute_metric(name: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+            start = time.perf_counter()
+            result = self.cache.get(name, params, data_version) if self.cache is not None else None
+            cached = result is not None
+            if not cached:
+                metric = METRICS[name]
+                sql, values = compile_grain_scan(metric.grain, [metric], params)
+                cursor = self.conn.cursor()
+                try:
+                    result = fetch_frame(cursor, sql, values)
+                finally:
+                    cursor.close()
+                result = result.rename(columns=lambda column: column[len(name) + 2:])
+                if self.cache is not None:
+                    self.cache.put(name, params, data_version, result)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            return result, {"latency_ms": round(elapsed_ms, 3), "cached": cached}
+
+        with ThreadPoolExecutor(max_workers=min(parallelism, max(len(names), 1))) as executor:
+            outcomes = list(executor.map(compute_metric, names))
+
+        results = {name: result for name, (result, _) in zip(names, outcomes)}
+        timings = {name: timing for name, (_, timing) in zip(names, outcomes)}
+        return results, timings
+
+    def compute_one(self, name: str, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Compute a single metric (see compute)"""
+        return self.compute([name], params)[name]
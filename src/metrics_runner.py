@@ -4,12 +4,16 @@ Business Metrics Runner
 Executes SQL queries from METRICS.md and displays results in a formatted way.
 """
 
+import argparse
+import json
 import duckdb
 import pandas as pd
 from datetime import datetime
 import sys
 import os
 
+from metric_registry import METRIC_DEFINITIONS, METRICS, MetricCache, MetricEngine, current_data_version
+
 def connect_db():
     """Connect to the DuckDB database."""
     try:
@@ -31,183 +35,134 @@ def format_percentage(value):
         return "N/A"
     return f"{value:.2f}%"
 
-def run_metric_query(conn, metric_name, sql_query, description=""):
-    """Run a single metric query and display formatted results."""
+def compute_metrics(conn, use_cache=True):
+    """
+    Compute every registry metric with one user-level and one loan-level scan.
+
+    Returns:
+        Dictionary of metric name -> single-row DataFrame with that metric's columns
+    """
+    engine = MetricEngine(conn, MetricCache() if use_cache else None)
+    return engine.compute()
+
+def compute_metrics_report(conn, use_cache=True, parallelism=4, names=None):
+    """
+    Compute metrics concurrently and collect them into a machine-readable report.
+
+    Returns:
+        Dictionary with generated_at, data_version, total_latency_ms and a
+        ``metrics`` mapping of name -> {title, values, latency_ms, cached}
+    """
+    engine = MetricEngine(conn, MetricCache() if use_cache else None)
+    start = datetime.now()
+    results, timings = engine.compute_concurrent(names, parallelism=parallelism)
+    total_ms = (datetime.now() - start).total_seconds() * 1000
+
+    return {
+        "generated_at": start.isoformat(timespec="seconds"),
+        "data_version": current_data_version(conn),
+        "total_latency_ms": round(total_ms, 3),
+        "metrics": {
+            name: {
+                "title": METRICS[name].title,
+                # to_json maps numpy scalars to plain numbers and NaN to null
+                "values": json.loads(result.to_json(orient="records"))[0],
+                **timings[name]
+            }
+            for name, result in results.items()
+        }
+    }
+
+def write_metrics_report(report, output_format, output_path=None):
+    """
+    Write a metrics report as JSON (stdout when no path) or Parquet.
+
+    Parquet output is long format: one row per metric column with the metric's
+    latency, so it appends cleanly to a monitoring table.
+    """
+    if output_format == "json":
+        payload = json.dumps(report, indent=2)
+        if output_path is None:
+            print(payload)
+        else:
+            with open(output_path, "w") as f:
+                f.write(payload + "\n")
+        return
+
+    rows = pd.DataFrame([
+        {
+            "generated_at": report["generated_at"],
+            "metric": name,
+            "column": column,
+            "value": None if value is None else float(value),
+            "latency_ms": entry["latency_ms"],
+            "cached": entry["cached"]
+        }
+        for name, entry in report["metrics"].items()
+        for column, value in entry["values"].items()
+    ])
+    writer = duckdb.connect()
+    try:
+        writer.register("metric_rows", rows)
+        writer.execute(f"COPY metric_rows TO '{output_path}' (FORMAT PARQUET)")
+    finally:
+        writer.close()
+
+def display_metric(metric_name, result, description=""):
+    """Print a metric's name, optional description and result table."""
     print(f"\n{'='*80}")
     print(f"📊 {metric_name}")
     print(f"{'='*80}")
     if description:
         print(f"📝 {description}")
         print()
-    
-    try:
-        result = conn.execute(sql_query).fetchdf()
-        print("📋 Results:")
-        print(result.to_string(index=False))
-        print()
-        return result
-    except Exception as e:
-        print(f"❌ Error executing query: {e}")
-        return None
+
+    print("📋 Results:")
+    print(result.to_string(index=False))
+    print()
 
 def main():
     """Main function to run all business metrics."""
+    parser = argparse.ArgumentParser(description="Bree business metrics")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute metrics instead of using cached results")
+    parser.add_argument("--format", choices=["text", "json", "parquet"], default="text",
+                        help="text prints the dashboard; json/parquet compute metrics concurrently "
+                             "and write them with per-metric latency")
+    parser.add_argument("--output", default=None, help="Output file (json defaults to stdout; required for parquet)")
+    parser.add_argument("--parallelism", type=int, default=4, help="Metrics computed concurrently (json/parquet)")
+    parser.add_argument("--metrics", nargs="+", default=None, help="Metric names to compute (json/parquet)")
+    args = parser.parse_args()
+
+    if args.format != "text":
+        if args.format == "parquet" and args.output is None:
+            parser.error("--output is required with --format parquet")
+        conn = connect_db()
+        try:
+            report = compute_metrics_report(conn, use_cache=not args.no_cache,
+                                            parallelism=args.parallelism, names=args.metrics)
+        except Exception as e:
+            print(f"Error computing metrics: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            conn.close()
+        write_metrics_report(report, args.format, args.output)
+        return
+
     print("🚀 Bree Business Metrics Dashboard")
     print(f"📅 Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     conn = connect_db()
-    
-    # Metric 1: D1/D7/W1 Signup-to-Request Rate
-    metric_1_sql = """
-    WITH user_timings AS (
-      SELECT u.user_id, u.signup_at_utc AS signup_at, MIN(l.requested_at_utc) AS first_request_at
-      FROM v_dim_users_clean u
-      LEFT JOIN v_fct_loans_clean l USING(user_id)
-      GROUP BY 1,2
-    )
-    SELECT
-      COUNT(*) AS total_signups,
-      COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 1 THEN 1 END) AS d1_requests,
-      COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 7 THEN 1 END) AS d7_requests,
-      COUNT(CASE WHEN DATEDIFF('week', signup_at, first_request_at) <= 1 THEN 1 END) AS w1_requests,
-      ROUND(100.0 * COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 1 THEN 1 END) / COUNT(*), 2) AS d1_rate_pct,
-      ROUND(100.0 * COUNT(CASE WHEN DATEDIFF('day', signup_at, first_request_at) <= 7 THEN 1 END) / COUNT(*), 2) AS d7_rate_pct,
-      ROUND(100.0 * COUNT(CASE WHEN DATEDIFF('week', signup_at, first_request_at) <= 1 THEN 1 END) / COUNT(*), 2) AS w1_rate_pct
-    FROM user_timings;
-    """
-    
-    run_metric_query(
-        conn, 
-        "1. D1/D7/W1 Signup-to-Request Rate",
-        metric_1_sql,
-        "Measures user activation and product-market fit"
-    )
-    
-    # Metric 2: Bank Link Rate
-    metric_2_sql = """
-    SELECT 
-      COUNT(*) as total_users,
-      SUM(bank_linked_flag) as users_linked_bank,
-      ROUND(SUM(bank_linked_flag) * 100.0 / COUNT(*), 2) as bank_link_rate_pct
-    FROM v_dim_users_clean;
-    """
-    
-    run_metric_query(
-        conn,
-        "2. Bank Link Rate", 
-        metric_2_sql,
-        "Critical onboarding step required for loan eligibility"
-    )
-    
-    # Metric 3: Approval Rate & Disbursement Rate
-    metric_3_sql = """
-    SELECT 
-      COUNT(*) as total_loan_requests,
-      SUM(is_approved) as approved_loans,
-      SUM(is_disbursed) as disbursed_loans,
-      ROUND(SUM(is_approved) * 100.0 / COUNT(*), 2) as approval_rate_pct,
-      ROUND(SUM(is_disbursed) * 100.0 / COUNT(*), 2) as disbursement_rate_pct,
-      ROUND(SUM(is_disbursed) * 100.0 / NULLIF(SUM(is_approved), 0), 2) as approval_to_disbursement_rate_pct
-    FROM v_fct_loans_clean;
-    """
-    
-    run_metric_query(
-        conn,
-        "3. Approval Rate & Disbursement Rate",
-        metric_3_sql,
-        "Measures underwriting efficiency and operational performance"
-    )
-    
-    # Metric 4: Repayment Rate & Default Rate
-    metric_4_sql = """
-    SELECT 
-      COUNT(*) as total_disbursed_loans,
-      SUM(is_repaid) as repaid_loans,
-      SUM(is_default) as defaulted_loans,
-      ROUND(SUM(is_repaid) * 100.0 / COUNT(*), 2) as repayment_rate_pct,
-      ROUND(SUM(is_default) * 100.0 / COUNT(*), 2) as default_rate_pct
-    FROM v_fct_loans_clean
-    WHERE is_disbursed = 1;
-    """
-    
-    run_metric_query(
-        conn,
-        "4. Repayment Rate & Default Rate",
-        metric_4_sql,
-        "Core risk metrics for loan portfolio health"
-    )
-    
-    # Metric 5: Average Loan Amount & Take-Rate
-    metric_5_sql = """
-    SELECT 
-      COUNT(*) as total_loans,
-      ROUND(AVG(amount), 2) as avg_loan_amount,
-      ROUND(AVG(revenue), 2) as avg_take,
-      ROUND(AVG(revenue_to_loan) * 100, 2) as avg_take_rate_pct
-    FROM v_fct_loans_clean;
-    """
-    
-    run_metric_query(
-        conn,
-        "5. Average Loan Amount & Total Take-Rate Per Loan",
-        metric_5_sql,
-        "Unit economics and revenue per transaction"
-    )
-    
-    # Metric 6: Instant Transfer Adoption Rate
-    metric_6_sql = """
-    SELECT 
-      COUNT(*) as disbursed_loans,
-      SUM(CASE WHEN instant_transfer_fee > 0 THEN 1 ELSE 0 END) as instant_transfer_users,
-      ROUND(SUM(CASE WHEN instant_transfer_fee > 0 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) as instant_adoption_rate_pct
-    FROM v_fct_loans_clean
-    WHERE is_disbursed = 1;
-    """
-    
-    run_metric_query(
-        conn,
-        "6. Instant Transfer Adoption Rate",
-        metric_6_sql,
-        "Premium feature adoption and additional revenue stream"
-    )
-    
-    # Metric 7: Revenue Per Disbursed Loan
-    metric_7_sql = """
-    SELECT 
-      COUNT(*) as disbursed_loans,
-      ROUND(AVG(revenue), 2) as avg_revenue_per_loan,
-      ROUND(SUM(revenue), 2) as total_revenue,
-      ROUND(AVG(fee), 2) as avg_fee,
-      ROUND(AVG(tip_amount), 2) as avg_tip,
-      ROUND(AVG(instant_transfer_fee), 2) as avg_instant_fee
-    FROM v_fct_loans_clean
-    WHERE is_disbursed = 1;
-    """
-    
-    run_metric_query(
-        conn,
-        "7. Revenue Per Disbursed Loan (Exclude Principal)",
-        metric_7_sql,
-        "Core revenue metric excluding principal (which is repaid)"
-    )
-    
-    # Metric 8: Late Payment Rate (NPS Proxy)
-    metric_8_sql = """
-    SELECT 
-      COUNT(*) as repaid_loans,
-      SUM(CASE WHEN late_days > 7 THEN 1 ELSE 0 END) as late_repaid_loans,
-      ROUND(SUM(CASE WHEN late_days > 7 THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) as late_payment_rate_pct,
-      ROUND(AVG(late_days), 1) as avg_late_days
-    FROM v_fct_loans_clean
-    WHERE is_repaid = 1;
-    """
-    
-    run_metric_query(
-        conn,
-        "8. Guardrail: Basic NPS Proxy - Late Payment Rate",
-        metric_8_sql,
-        "Customer satisfaction guardrail - high late payment rates may indicate customer stress"
-    )
+
+    # All eight metrics from two scans (or the cache); the detailed output and the summary share them
+    try:
+        metrics = compute_metrics(conn, use_cache=not args.no_cache)
+    except Exception as e:
+        print(f"❌ Error executing metrics queries: {e}")
+        conn.close()
+        sys.exit(1)
+
+    for metric in METRIC_DEFINITIONS:
+        display_metric(metric.title, metrics[metric.name], metric.description)
     
     # Summary Dashboard
     print(f"\n{'='*80}")
@@ -216,38 +171,15 @@ def main():
     
     # Get key metrics for summary
     try:
-        # D7 rate
-        d7_result = conn.execute(metric_1_sql).fetchdf()
-        d7_rate = d7_result['d7_rate_pct'].iloc[0] if not d7_result.empty else 0
-        
-        # Bank link rate
-        bank_result = conn.execute(metric_2_sql).fetchdf()
-        bank_rate = bank_result['bank_link_rate_pct'].iloc[0] if not bank_result.empty else 0
-        
-        # Approval rate
-        approval_result = conn.execute(metric_3_sql).fetchdf()
-        approval_rate = approval_result['approval_rate_pct'].iloc[0] if not approval_result.empty else 0
-        
-        # Repayment rate
-        repay_result = conn.execute(metric_4_sql).fetchdf()
-        repay_rate = repay_result['repayment_rate_pct'].iloc[0] if not repay_result.empty else 0
-        default_rate = repay_result['default_rate_pct'].iloc[0] if not repay_result.empty else 0
-        
-        # Revenue metrics
-        revenue_result = conn.execute(metric_7_sql).fetchdf()
-        avg_revenue = revenue_result['avg_revenue_per_loan'].iloc[0] if not revenue_result.empty else 0
-        
-        # Average loan amount
-        loan_amount_result = conn.execute(metric_5_sql).fetchdf()
-        avg_loan_amount = loan_amount_result['avg_loan_amount'].iloc[0] if not loan_amount_result.empty else 0
-        
-        # Instant transfer
-        instant_result = conn.execute(metric_6_sql).fetchdf()
-        instant_rate = instant_result['instant_adoption_rate_pct'].iloc[0] if not instant_result.empty else 0
-        
-        # Late payment
-        late_result = conn.execute(metric_8_sql).fetchdf()
-        late_rate = late_result['late_payment_rate_pct'].iloc[0] if not late_result.empty else 0
+        d7_rate = metrics['activation']['d7_rate_pct'].iloc[0]
+        bank_rate = metrics['bank_link']['bank_link_rate_pct'].iloc[0]
+        approval_rate = metrics['approval']['approval_rate_pct'].iloc[0]
+        repay_rate = metrics['repayment']['repayment_rate_pct'].iloc[0]
+        default_rate = metrics['repayment']['default_rate_pct'].iloc[0]
+        avg_revenue = metrics['revenue']['avg_revenue_per_loan'].iloc[0]
+        avg_loan_amount = metrics['loan_amount']['avg_loan_amount'].iloc[0]
+        instant_rate = metrics['instant']['instant_adoption_rate_pct'].iloc[0]
+        late_rate = metrics['late']['late_payment_rate_pct'].iloc[0]
         
         def get_status(metric, value, thresholds):
             """Get status emoji based on thresholds."""
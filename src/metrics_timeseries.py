@@ -0,0 +1,377 @@
+"""
+Daily loan metric time series backed by fct_metrics_daily.
+
+Each metric is stored as an additive (numerator, denominator) pair per request
+day and user segment, so the rate of any period and segment union is
+SUM(numerator) / SUM(denominator) over the matching rows. Quantile sketches of
+loan distributions (agg_loan_quantile_sketches, queried via loan_quantiles.py)
+share the same grain. Both tables are maintained incrementally: only days
+touched by loans or users appended since the last update are recomputed.
+"""
+
+import argparse
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import duckdb
+import pandas as pd
+
+from arrow_query import fetch_frame
+from metric_registry import GRAIN_SOURCES, compile_params
+
+METRICS_DAILY_TABLE = "fct_metrics_daily"
+QUANTILE_SKETCH_TABLE = "agg_loan_quantile_sketches"
+INCREMENTAL_STATE_TABLE = "meta_incremental_state"
+
+# Tables whose appended rows drive the incremental update: new loans change their
+# request day, new users move their existing loans out of the 'unknown' segment.
+# Each has its own rowid watermark in meta_incremental_state.
+METRICS_DAILY_SOURCE_TABLE = "fct_loans"
+METRICS_DAILY_SEGMENT_TABLE = "dim_users"
+METRICS_DAILY_WATERMARKS = {
+    METRICS_DAILY_SOURCE_TABLE: METRICS_DAILY_TABLE,
+    METRICS_DAILY_SEGMENT_TABLE: f"{METRICS_DAILY_TABLE}:{METRICS_DAILY_SEGMENT_TABLE}"
+}
+
+# Segment columns of fct_metrics_daily (loans of unknown users fall under 'unknown')
+SEGMENT_COLUMNS = ("province", "device_os", "acquisition_channel")
+
+TIME_GRAINS = ("day", "week", "month")
+
+# Measures sketched per day and segment: name -> value expression over the loan
+# grain source (NULL rows are skipped)
+QUANTILE_MEASURES = {
+    "amount": "amount",
+    "revenue": "CASE WHEN is_disbursed = 1 THEN revenue END",
+    "late_days": "CASE WHEN is_repaid = 1 THEN late_days END",
+    "days_to_repay": "days_to_repay"
+}
+
+# Log-bucketed (DDSketch-style) quantile sketch: a value x != 0 falls in bucket
+# ceil(log_gamma(|x|)), so every value in a bucket is within QUANTILE_RELATIVE_ACCURACY
+# of the bucket's representative. Buckets are stored sign-encoded as
+# sign(x) * (index + QUANTILE_BUCKET_OFFSET), with 0 for x = 0, which keeps the
+# encoding monotone in x. Changing these constants requires a full refresh.
+QUANTILE_RELATIVE_ACCURACY = 0.01
+QUANTILE_GAMMA = (1 + QUANTILE_RELATIVE_ACCURACY) / (1 - QUANTILE_RELATIVE_ACCURACY)
+QUANTILE_BUCKET_OFFSET = 1 << 20
+
+
+class MetricsTimeseriesError(Exception):
+    """Custom exception for daily metric time series operations."""
+    pass
+
+
+@dataclass(frozen=True)
+class DailyMetric:
+    """One ratio metric as additive aggregates over the loan grain source."""
+    name: str
+    numerator: str
+    denominator: str
+    description: str = ""
+
+
+DAILY_METRICS: List[DailyMetric] = [
+    DailyMetric("approval_rate", "SUM(is_approved)", "COUNT(*)",
+                "Approved / requested loans"),
+    DailyMetric("disbursement_rate", "SUM(is_disbursed)", "COUNT(*)",
+                "Disbursed / requested loans"),
+    DailyMetric("repayment_rate", "SUM(is_repaid) FILTER (WHERE is_disbursed = 1)", "SUM(is_disbursed)",
+                "Repaid / disbursed loans"),
+    DailyMetric("default_rate", "SUM(is_default) FILTER (WHERE is_disbursed = 1)", "SUM(is_disbursed)",
+                "Defaulted / disbursed loans"),
+    DailyMetric("instant_adoption_rate", "COUNT(*) FILTER (WHERE is_disbursed = 1 AND instant_transfer_fee > 0)",
+                "SUM(is_disbursed)", "Disbursed loans with an instant transfer fee / disbursed loans"),
+    DailyMetric("revenue_per_loan", "SUM(revenue) FILTER (WHERE is_disbursed = 1)", "SUM(is_disbursed)",
+                "Fee + tip + instant fee per disbursed loan"),
+    DailyMetric("avg_loan_amount", "SUM(amount)", "COUNT(amount)",
+                "Mean requested amount"),
+    DailyMetric("take_rate", "SUM(revenue_to_loan)", "COUNT(revenue_to_loan)",
+                "Mean revenue / amount per loan"),
+    DailyMetric("late_payment_rate", "COUNT(*) FILTER (WHERE is_repaid = 1 AND late_days > 7)", "SUM(is_repaid)",
+                "Repaid loans more than 7 days late / repaid loans"),
+]
+
+DAILY_METRICS_BY_NAME: Dict[str, DailyMetric] = {metric.name: metric for metric in DAILY_METRICS}
+
+
+def daily_loan_source_sql() -> str:
+    """Loan grain source with metric_date and the segment columns as VARCHAR ('unknown' when missing)."""
+    segments = ",\n      ".join(
+        f"COALESCE(CAST({column} AS VARCHAR), 'unknown') AS {column}" for column in SEGMENT_COLUMNS
+    )
+    return f"""(
+      SELECT
+        src.* EXCLUDE ({', '.join(SEGMENT_COLUMNS)}),
+        CAST(CAST(src.requested_at AS TIMESTAMP) AS DATE) AS metric_date,
+        {segments}
+      FROM {GRAIN_SOURCES["loan"]} src
+    )"""
+
+
+def compile_daily_metrics_sql(day_filter: Optional[str] = None) -> str:
+    """
+    Compile the long-format (metric_date, segment, metric, numerator, denominator) query.
+
+    All metrics are aggregated in one grouped scan of the loan source and then
+    unpivoted by unnesting parallel lists of names, numerators and denominators.
+
+    Args:
+        day_filter: Optional predicate on metric_date restricting the days computed
+    """
+    names = ", ".join(f"'{metric.name}'" for metric in DAILY_METRICS)
+    numerators = ",\n        ".join(f"CAST({metric.numerator} AS DOUBLE)" for metric in DAILY_METRICS)
+    denominators = ",\n        ".join(f"CAST({metric.denominator} AS DOUBLE)" for metric in DAILY_METRICS)
+
+    return f"""
+    SELECT
+      metric_date,
+      {', '.join(SEGMENT_COLUMNS)},
+      UNNEST([{names}]) AS metric,
+      UNNEST(numerators) AS numerator,
+      UNNEST(denominators) AS denominator
+    FROM (
+      SELECT
+        metric_date,
+        {', '.join(SEGMENT_COLUMNS)},
+        [{numerators}] AS numerators,
+        [{denominators}] AS denominators
+      FROM {daily_loan_source_sql()} daily
+      {f"WHERE {day_filter}" if day_filter else ""}
+      GROUP BY ALL
+    )
+    """
+
+
+def quantile_bucket_sql(value: str) -> str:
+    """SQL expression mapping ``value`` to its sign-encoded sketch bucket."""
+    index = f"CAST(CEIL(LN(ABS({value})) / {math.log(QUANTILE_GAMMA)!r}) AS INTEGER) + {QUANTILE_BUCKET_OFFSET}"
+    return f"CASE WHEN {value} > 0 THEN {index} WHEN {value} < 0 THEN -({index}) ELSE 0 END"
+
+
+def compile_quantile_sketches_sql(day_filter: Optional[str] = None) -> str:
+    """
+    Compile the (metric_date, segment, measure, buckets, counts) sketch query.
+
+    Each sketch is a sparse histogram: parallel lists of sign-encoded buckets
+    (ascending) and their counts. Sketches merge by summing counts per bucket.
+
+    Args:
+        day_filter: Optional predicate on metric_date restricting the days computed
+    """
+    names = ", ".join(f"'{name}'" for name in QUANTILE_MEASURES)
+    values = ", ".join(f"CAST({expression} AS DOUBLE)" for expression in QUANTILE_MEASURES.values())
+
+    return f"""
+    WITH measure_values AS (
+      SELECT
+        metric_date,
+        {', '.join(SEGMENT_COLUMNS)},
+        UNNEST([{names}]) AS measure,
+        UNNEST([{values}]) AS x
+      FROM {daily_loan_source_sql()} daily
+      {f"WHERE {day_filter}" if day_filter else ""}
+    ),
+    bucket_counts AS (
+      SELECT
+        metric_date, {', '.join(SEGMENT_COLUMNS)}, measure,
+        {quantile_bucket_sql("x")} AS bucket,
+        COUNT(*) AS bucket_count
+      FROM measure_values
+      WHERE x IS NOT NULL
+      GROUP BY ALL
+    )
+    SELECT
+      metric_date,
+      {', '.join(SEGMENT_COLUMNS)},
+      measure,
+      LIST(bucket ORDER BY bucket)       AS buckets,
+      LIST(bucket_count ORDER BY bucket) AS counts
+    FROM bucket_counts
+    GROUP BY ALL
+    """
+
+
+def rebuild_metrics_daily(conn: duckdb.DuckDBPyConnection) -> int:
+    """Recompute fct_metrics_daily from every loan (see update_metrics_daily)."""
+    return update_metrics_daily(conn, full_refresh=True)
+
+
+def update_metrics_daily(conn: duckdb.DuckDBPyConnection, full_refresh: bool = False) -> int:
+    """
+    Fold loans and users appended since the last update into fct_metrics_daily
+    and agg_loan_quantile_sketches.
+
+    New fct_loans and dim_users rows are found through rowid watermarks stored
+    in meta_incremental_state. Every day holding a new loan, or a loan of a new
+    user (previously counted under 'unknown'), is deleted and recomputed from
+    all loans of that day, in one transaction. Both tables are treated as
+    append-only: after updating or deleting existing rows, run a full refresh
+    (a table holding fewer rows than its watermark triggers one). The loader
+    recreates the schema on every load, so its update is a full refresh; the
+    incremental path serves appends to an existing database (--update).
+
+    Args:
+        conn: Connection to a database built by the loader
+        full_refresh: Recompute every day instead of only days with new loans
+
+    Returns:
+        Number of days recomputed
+
+    Raises:
+        MetricsTimeseriesError: If the update fails (nothing is committed)
+    """
+    try:
+        conn.execute("BEGIN TRANSACTION")
+
+        high, low = {}, {}
+        for table, target in METRICS_DAILY_WATERMARKS.items():
+            high[table] = conn.execute(f"SELECT COALESCE(MAX(rowid), -1) FROM {table}").fetchone()[0]
+            state = conn.execute(
+                f"SELECT watermark FROM {INCREMENTAL_STATE_TABLE} WHERE target = ?", [target]
+            ).fetchone()
+            low[table] = state[0] if state else None
+            if low[table] is None or high[table] < low[table]:
+                full_refresh = True  # never updated, or table reloaded or truncated
+
+        if full_refresh:
+            conn.execute(f"DELETE FROM {METRICS_DAILY_TABLE}")
+            conn.execute(f"DELETE FROM {QUANTILE_SKETCH_TABLE}")
+            day_filter = None
+        else:
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE metrics_daily_changed_days AS
+                SELECT DISTINCT CAST(CAST(requested_at AS TIMESTAMP) AS DATE) AS metric_date
+                FROM {METRICS_DAILY_SOURCE_TABLE}
+                WHERE rowid > {int(low[METRICS_DAILY_SOURCE_TABLE])}
+                   OR user_id IN (
+                     SELECT user_id FROM {METRICS_DAILY_SEGMENT_TABLE}
+                     WHERE rowid > {int(low[METRICS_DAILY_SEGMENT_TABLE])}
+                   )
+            """)
+            for table in (METRICS_DAILY_TABLE, QUANTILE_SKETCH_TABLE):
+                conn.execute(f"""
+                    DELETE FROM {table}
+                    WHERE metric_date IN (SELECT metric_date FROM metrics_daily_changed_days)
+                """)
+            day_filter = "metric_date IN (SELECT metric_date FROM metrics_daily_changed_days)"
+
+        conn.execute(f"INSERT INTO {METRICS_DAILY_TABLE} {compile_daily_metrics_sql(day_filter)}")
+        conn.execute(f"INSERT INTO {QUANTILE_SKETCH_TABLE} {compile_quantile_sketches_sql(day_filter)}")
+        days = conn.execute(f"""
+            SELECT COUNT(DISTINCT metric_date) FROM {METRICS_DAILY_TABLE}
+            {f"WHERE {day_filter}" if day_filter else ""}
+        """).fetchone()[0]
+
+        for table, target in METRICS_DAILY_WATERMARKS.items():
+            conn.execute(f"""
+                INSERT INTO {INCREMENTAL_STATE_TABLE} VALUES (?, ?, current_timestamp)
+                ON CONFLICT (target) DO UPDATE SET
+                  watermark  = EXCLUDED.watermark,
+                  updated_at = EXCLUDED.updated_at
+            """, [target, high[table]])
+        conn.execute("DROP TABLE IF EXISTS temp.metrics_daily_changed_days")
+        conn.execute("COMMIT")
+    except Exception as e:
+        conn.execute("ROLLBACK")
+        raise MetricsTimeseriesError(f"Failed to update {METRICS_DAILY_TABLE}: {e}") from e
+
+    return days
+
+
+def metric_timeseries(conn: duckdb.DuckDBPyConnection, metric: str, grain: str = "day",
+                      start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      **segments: Any) -> pd.DataFrame:
+    """
+    Time series of one metric, summed from fct_metrics_daily.
+
+    Args:
+        conn: Connection to a database built by the loader
+        metric: Name from DAILY_METRICS
+        grain: 'day', 'week' (Monday start) or 'month'
+        start_date, end_date: Inclusive metric_date bounds (ISO dates)
+        **segments: province / device_os / acquisition_channel value or list of values
+
+    Returns:
+        DataFrame with period, numerator, denominator and value (NULL when the
+        denominator is zero), ordered by period
+
+    Raises:
+        MetricsTimeseriesError: If the metric, grain or a segment is unknown
+    """
+    if metric not in DAILY_METRICS_BY_NAME:
+        raise MetricsTimeseriesError(f"Unknown daily metric: {metric}")
+    if grain not in TIME_GRAINS:
+        raise MetricsTimeseriesError(f"Unknown time grain: {grain} (expected one of {TIME_GRAINS})")
+    unknown = [column for column in segments if column not in SEGMENT_COLUMNS]
+    if unknown:
+        raise MetricsTimeseriesError(f"Unknown segment columns: {unknown}")
+
+    where_clause, values = compile_params(segments)
+    conditions = [where_clause[len("WHERE "):]] if where_clause else []
+    conditions.append("metric = ?")
+    values.append(metric)
+    if start_date is not None:
+        conditions.append("metric_date >= ?::DATE")
+        values.append(start_date)
+    if end_date is not None:
+        conditions.append("metric_date <= ?::DATE")
+        values.append(end_date)
+
+    return fetch_frame(conn, f"""
+        SELECT
+          CAST(DATE_TRUNC('{grain}', metric_date) AS DATE) AS period,
+          SUM(numerator)   AS numerator,
+          SUM(denominator) AS denominator,
+          SUM(numerator) / NULLIF(SUM(denominator), 0) AS value
+        FROM {METRICS_DAILY_TABLE}
+        WHERE {' AND '.join(conditions)}
+        GROUP BY 1
+        ORDER BY 1
+    """, values)
+
+
+def main():
+    """Print a metric time series from fct_metrics_daily."""
+    parser = argparse.ArgumentParser(description="Daily/weekly/monthly loan metric time series")
+    parser.add_argument("--db", default="bree_case_study.db", help="DuckDB database path")
+    parser.add_argument("--metric", default="approval_rate", help="Metric name (see --list)")
+    parser.add_argument("--grain", choices=TIME_GRAINS, default="day", help="Time series period")
+    parser.add_argument("--start", default=None, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--province", action="append", help="Province filter (repeatable)")
+    parser.add_argument("--device-os", action="append", help="Device OS filter (repeatable)")
+    parser.add_argument("--acquisition-channel", action="append", help="Acquisition channel filter (repeatable)")
+    parser.add_argument("--update", action="store_true", help="Fold newly appended loans and users in before querying")
+    parser.add_argument("--refresh", action="store_true", help="Recompute every day before querying")
+    parser.add_argument("--list", action="store_true", help="List available metrics and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for metric in DAILY_METRICS:
+            print(f"{metric.name:<24} {metric.description}")
+        return
+
+    conn = duckdb.connect(args.db, read_only=not (args.update or args.refresh))
+    try:
+        if args.update or args.refresh:
+            days = update_metrics_daily(conn, full_refresh=args.refresh)
+            print(f"✓ Recomputed {days} days of {METRICS_DAILY_TABLE}")
+
+        segments = {
+            "province": args.province,
+            "device_os": args.device_os,
+            "acquisition_channel": args.acquisition_channel
+        }
+        series = metric_timeseries(conn, args.metric, args.grain, args.start, args.end,
+                                   **{column: values for column, values in segments.items() if values})
+    finally:
+        conn.close()
+
+    print(f"\n{args.metric} by {args.grain}")
+    print(series.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
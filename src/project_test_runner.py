@@ -5,8 +5,10 @@ Validates all key components of the Bree case study project to ensure nothing br
 """
 
 import os
+import shutil
 import sys
 import subprocess
+import tempfile
 import duckdb
 import pandas as pd
 from datetime import datetime
@@ -157,6 +159,501 @@ class ProjectTester:
         except Exception as e:
             self.log_test("Metrics Runner", "FAIL", str(e))
     
+    def test_metrics_timeseries_incremental(self):
+        """Test that an incremental fct_metrics_daily update matches a full recompute."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from metrics_timeseries import (METRICS_DAILY_TABLE, compile_daily_metrics_sql,
+                                            rebuild_metrics_daily, update_metrics_daily)
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_copy = os.path.join(tmp_dir, 'metrics_incremental.db')
+                shutil.copy(os.path.join(self.project_root, 'bree_case_study.db'), db_copy)
+                conn = duckdb.connect(db_copy)
+
+                # Hold back some loans and users, build, then append them back: the
+                # held-back users' remaining loans move out of the 'unknown' segment
+                conn.execute("CREATE TEMP TABLE held_users AS SELECT * FROM dim_users WHERE user_id % 50 = 0")
+                conn.execute("CREATE TEMP TABLE held_loans AS SELECT * FROM fct_loans WHERE hash(loan_id) % 20 = 0")
+                conn.execute("DELETE FROM dim_users WHERE user_id IN (SELECT user_id FROM held_users)")
+                conn.execute("DELETE FROM fct_loans WHERE loan_id IN (SELECT loan_id FROM held_loans)")
+                rebuild_metrics_daily(conn)
+
+                conn.execute("INSERT INTO dim_users SELECT * FROM held_users")
+                conn.execute("INSERT INTO fct_loans SELECT * FROM held_loans")
+                days = update_metrics_daily(conn)
+
+                mismatches = conn.execute(f"""
+                    SELECT COUNT(*)
+                    FROM {METRICS_DAILY_TABLE} i
+                    FULL JOIN ({compile_daily_metrics_sql()}) f
+                      USING (metric_date, province, device_os, acquisition_channel, metric)
+                    WHERE i.metric IS NULL OR f.metric IS NULL
+                       OR NOT COALESCE(ABS(i.numerator - f.numerator) <= 1e-6,
+                                       i.numerator IS NULL AND f.numerator IS NULL)
+                       OR NOT COALESCE(ABS(i.denominator - f.denominator) <= 1e-6,
+                                       i.denominator IS NULL AND f.denominator IS NULL)
+                """).fetchone()[0]
+                conn.close()
+
+            if days > 0 and mismatches == 0:
+                self.log_test("Metrics Time Series Incremental Update", "PASS")
+            else:
+                self.log_test("Metrics Time Series Incremental Update", "FAIL",
+                              f"{mismatches} rows differ from a full recompute ({days} days updated)")
+
+        except Exception as e:
+            self.log_test("Metrics Time Series Incremental Update", "FAIL", str(e))
+
+    def test_dq_check_timeout(self):
+        """Test that checks over their time budget are reported as TIMEOUT and exports still run."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from data_quality_runner import CHECK_CATEGORIES, DataQualityRunner
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_copy = os.path.join(tmp_dir, 'dq_timeout.db')
+                shutil.copy(os.path.join(self.project_root, 'bree_case_study.db'), db_copy)
+
+                runner = DataQualityRunner(db_copy, check_timeout=0.001)
+                try:
+                    runner.execute_dq_checks()
+                    report = runner.generate_detailed_report()
+                    timed_out = [category for category, data in report["categories"].items()
+                                 if data.get("status") == "TIMEOUT"]
+                    # Placeholders stand in for the timed-out views, empty but queryable
+                    placeholder_rows = sum(
+                        runner.conn.execute(f"SELECT COUNT(*) FROM temp.{CHECK_CATEGORIES[c]}").fetchone()[0]
+                        for c in timed_out
+                    )
+                    csv_path = runner.export_failed_checks_csv(report, os.path.join(tmp_dir, 'failed.csv'))
+                finally:
+                    runner.conn.close()
+
+            problems = []
+            if not timed_out or set(timed_out) != set(report["timed_out_checks"]) - {"rule_scan"}:
+                problems.append(f"timed out categories {timed_out} vs checks {report['timed_out_checks']}")
+            if placeholder_rows != 0:
+                problems.append(f"placeholders hold {placeholder_rows} rows")
+            if report["overall_status"] != "TIMEOUT":
+                problems.append(f"overall status {report['overall_status']}")
+            if csv_path is not None:
+                problems.append("failed checks exported for a run with no completed checks")
+
+            if problems:
+                self.log_test("DQ Check Timeout", "FAIL", "; ".join(problems))
+            else:
+                self.log_test("DQ Check Timeout", "PASS")
+
+        except Exception as e:
+            self.log_test("DQ Check Timeout", "FAIL", str(e))
+
+    def test_loan_quantile_accuracy(self):
+        """Test that merged quantile sketches stay within the relative accuracy of exact quantiles."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from loan_quantiles import DEFAULT_QUANTILES, estimate_quantiles
+            from metrics_timeseries import QUANTILE_MEASURES, QUANTILE_RELATIVE_ACCURACY, daily_loan_source_sql
+
+            conn = duckdb.connect(os.path.join(self.project_root, 'bree_case_study.db'), read_only=True)
+            provinces = [row[0] for row in conn.execute(
+                "SELECT DISTINCT province FROM agg_loan_quantile_sketches ORDER BY province LIMIT 2"
+            ).fetchall()]
+            start_date, end_date = [str(d) for d in conn.execute(
+                "SELECT MIN(metric_date) + 30, MAX(metric_date) - 30 FROM agg_loan_quantile_sketches"
+            ).fetchone()]
+            # Whole population, and a province union over a date range (many sketches merged)
+            populations = [
+                ({}, "TRUE"),
+                ({"province": provinces, "start_date": start_date, "end_date": end_date},
+                 f"province IN ({', '.join(repr(p) for p in provinces)}) "
+                 f"AND metric_date BETWEEN '{start_date}' AND '{end_date}'"),
+            ]
+
+            errors = []
+            for measure, expression in QUANTILE_MEASURES.items():
+                for filters, condition in populations:
+                    estimate = estimate_quantiles(conn, measure, **filters)
+                    exact = conn.execute(f"""
+                        SELECT COUNT(x), {', '.join(f'quantile_disc(x, {q})' for q in DEFAULT_QUANTILES)}
+                        FROM (SELECT CAST({expression} AS DOUBLE) AS x FROM {daily_loan_source_sql()} daily
+                              WHERE {condition})
+                    """).fetchone()
+                    if estimate["count"] != exact[0]:
+                        errors.append(f"{measure} {filters}: count {estimate['count']} vs {exact[0]}")
+                    for q, value in zip(DEFAULT_QUANTILES, exact[1:]):
+                        approx = estimate[f"p{q * 100:g}"]
+                        # estimate_quantiles rounds to 4 decimals
+                        if abs(approx - value) > QUANTILE_RELATIVE_ACCURACY * abs(value) + 1e-4:
+                            errors.append(f"{measure} {filters} p{q * 100:g}: {approx} vs exact {value}")
+            conn.close()
+
+            if errors:
+                self.log_test("Loan Quantile Sketch Accuracy", "FAIL", "; ".join(errors[:5]))
+            else:
+                self.log_test("Loan Quantile Sketch Accuracy", "PASS")
+
+        except Exception as e:
+            self.log_test("Loan Quantile Sketch Accuracy", "FAIL", str(e))
+
+    def test_arrow_query(self):
+        """Test that Arrow-backed fetch_frame returns the same values and numeric dtypes as fetchdf()."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from arrow_query import arrow_available, fetch_frame, frame_records
+
+            if not arrow_available():
+                self.log_test("Arrow Query Helper", "WARN", "pyarrow not installed, fetchdf() fallback in use")
+                return
+
+            conn = duckdb.connect(os.path.join(self.project_root, 'bree_case_study.db'), read_only=True)
+            # SUM of integers is HUGEINT and SUM of decimals DECIMAL: both arrive as Arrow decimals
+            query = """
+                SELECT
+                  province,
+                  SUM(is_approved)                 AS approved_loans,
+                  SUM(CAST(amount AS DECIMAL(18, 2))) AS amount_sum,
+                  CAST(NULL AS HUGEINT)            AS missing_count,
+                  COUNT(*)                         AS loans
+                FROM v_fct_loans_clean l
+                JOIN v_dim_users_clean u USING (user_id)
+                GROUP BY province
+                ORDER BY province
+            """
+            arrow_frame = fetch_frame(conn, query)
+            pandas_frame = conn.execute(query).fetchdf()
+            conn.close()
+
+            numeric = ['approved_loans', 'amount_sum', 'missing_count', 'loans']
+            dtypes_match = all(arrow_frame[c].dtype == pandas_frame[c].dtype for c in numeric)
+            values_match = arrow_frame[numeric].equals(pandas_frame[numeric])
+            # NULL counts are NaN on both paths (and NaN != NaN), so compare records without them
+            columns = ['province', 'approved_loans', 'amount_sum', 'loans']
+            records_match = (frame_records(arrow_frame[columns])
+                             == pandas_frame[columns].astype({'province': object}).to_dict('records'))
+
+            if dtypes_match and values_match and records_match:
+                self.log_test("Arrow Query Helper", "PASS")
+            else:
+                self.log_test("Arrow Query Helper", "FAIL", "fetch_frame differs from fetchdf()",
+                              f"arrow dtypes {dict(arrow_frame.dtypes)}, fetchdf dtypes {dict(pandas_frame.dtypes)}")
+
+        except Exception as e:
+            self.log_test("Arrow Query Helper", "FAIL", str(e))
+
+    def test_point_in_time_features(self):
+        """Test that the scoring service's point-in-time features match v_risk_model_base at approval time."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from scoring_service import POINT_IN_TIME_FEATURES_SQL
+
+            conn = duckdb.connect(os.path.join(self.project_root, 'bree_case_study.db'), read_only=True)
+            # Scoring an approved loan as of its approval time must reproduce the training features
+            requests = conn.execute("""
+                SELECT loan_id AS request_id, user_id,
+                       CAST(approved_at_utc AT TIME ZONE 'UTC' AS TIMESTAMP) AS as_of_ts
+                FROM v_fct_loans_clean
+                JOIN v_dim_users_clean USING (user_id)
+                WHERE approved_at_utc IS NOT NULL
+                ORDER BY hash(loan_id)
+                LIMIT 200
+            """).fetchdf()
+            conn.register("score_requests", requests)
+            user_ids = ",".join(str(int(u)) for u in requests["user_id"].unique())
+            features = conn.execute(
+                POINT_IN_TIME_FEATURES_SQL.replace("{requests}", "score_requests").replace("{user_ids}", user_ids)
+            ).fetchdf().set_index("loan_id").sort_index()
+            expected = conn.execute(f"""
+                SELECT {', '.join(['loan_id'] + list(features.columns))}
+                FROM v_risk_model_base
+                WHERE loan_id IN (SELECT request_id FROM score_requests)
+            """).fetchdf().set_index("loan_id").sort_index()
+            conn.close()
+
+            pd.testing.assert_frame_equal(features, expected, check_dtype=False, rtol=1e-9)
+            self.log_test("Scoring Point-in-Time Features", "PASS")
+
+        except AssertionError as e:
+            self.log_test("Scoring Point-in-Time Features", "FAIL",
+                          "POINT_IN_TIME_FEATURES_SQL drifted from v_risk_model_base", str(e).splitlines()[0])
+        except Exception as e:
+            self.log_test("Scoring Point-in-Time Features", "FAIL", str(e))
+
+    def test_scoring_service_batching(self):
+        """Test that concurrent requests with duplicate request_ids each get their own user's score."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            import json
+            import threading
+            import urllib.request
+            from scoring_service import ScoringService
+
+            conn = duckdb.connect(os.path.join(self.project_root, 'bree_case_study.db'), read_only=True)
+            user_ids = [row[0] for row in conn.execute(
+                "SELECT user_id FROM dim_users ORDER BY baseline_risk_score, user_id LIMIT 4"
+            ).fetchall() + conn.execute(
+                "SELECT user_id FROM dim_users ORDER BY baseline_risk_score DESC, user_id LIMIT 4"
+            ).fetchall()]
+            conn.close()
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # Small synthetic model: scores differ by user, independent of the exported model
+                params_path = os.path.join(tmp_dir, 'risk_model_test.json')
+                with open(params_path, 'w') as f:
+                    json.dump({
+                        "model_version": "project_test", "intercept": -1.0, "approval_threshold": 0.5,
+                        "features": [
+                            {"source": "baseline_risk_score", "value": None, "coef": 2.0,
+                             "scale": 1.0, "mean": 0.0, "median": 0.5},
+                            {"source": "prior_approved_loans_count", "value": None, "coef": 0.3,
+                             "scale": 1.0, "mean": 0.0, "median": 0.0}
+                        ]
+                    }, f)
+
+                service = ScoringService(os.path.join(self.project_root, 'bree_case_study.db'), port=0,
+                                         max_wait_ms=50, params_path=params_path)
+                service.start()
+                try:
+                    host, port = service.address
+                    payloads = [{"user_id": user_id, "requested_at": "2025-06-01T00:00:00"} for user_id in user_ids]
+                    # Same client id for every user, plus ids colliding with the service's own req-N ids
+                    for i, payload in enumerate(payloads):
+                        payload["request_id"] = "x" if i % 2 == 0 else "req-1"
+                    payloads.append({"user_id": user_ids[0], "requested_at": "2025-06-01T00:00:00"})
+
+                    expected = {user_id: service.score({"user_id": user_id, "requested_at": "2025-06-01T00:00:00"})
+                                for user_id in user_ids}
+
+                    responses = [None] * len(payloads)
+
+                    def post(i):
+                        request = urllib.request.Request(
+                            f"http://{host}:{port}/score", data=json.dumps(payloads[i]).encode(),
+                            headers={"Content-Type": "application/json"}
+                        )
+                        with urllib.request.urlopen(request, timeout=30) as response:
+                            responses[i] = json.loads(response.read())
+
+                    threads = [threading.Thread(target=post, args=(i,)) for i in range(len(payloads))]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    max_batch = max(service.batcher.batch_sizes)
+                finally:
+                    service.shutdown()
+
+            wrong = [
+                (payload["user_id"], response and response.get("user_id"))
+                for payload, response in zip(payloads, responses)
+                if response is None
+                or response["user_id"] != payload["user_id"]
+                or response["request_id"] != payload.get("request_id", response["request_id"])
+                or abs(response["prob_default"] - expected[payload["user_id"]]["prob_default"]) > 1e-12
+            ]
+            if not wrong and max_batch > 1:
+                self.log_test("Scoring Service Micro-Batching", "PASS")
+            elif wrong:
+                self.log_test("Scoring Service Micro-Batching", "FAIL",
+                              f"{len(wrong)} responses carry another request's score", str(wrong))
+            else:
+                self.log_test("Scoring Service Micro-Batching", "WARN", "Concurrent requests were not batched together")
+
+        except Exception as e:
+            self.log_test("Scoring Service Micro-Batching", "FAIL", str(e))
+
+    def test_funnel_sketches(self):
+        """Test HLL distinct-user estimates against exact counts and unknown-step handling."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from funnel_sketches import HLL_STANDARD_ERROR, FunnelSketchError, estimate_distinct_users
+
+            conn = duckdb.connect(os.path.join(self.project_root, 'bree_case_study.db'), read_only=True)
+            # Sketches cover events of users present in dim_users
+            exact = dict(conn.execute("""
+                SELECT s.event_name, COUNT(DISTINCT s.user_id)
+                FROM fct_sessions s
+                JOIN dim_users u USING (user_id)
+                GROUP BY s.event_name
+            """).fetchall())
+
+            off = {}
+            for step, users in exact.items():
+                estimate = estimate_distinct_users(conn, step)["estimate"]
+                # Three standard errors: a correct sketch fails this well under 1% of the time
+                if abs(estimate - users) > 3 * HLL_STANDARD_ERROR * users:
+                    off[step] = (estimate, users)
+
+            try:
+                estimate_distinct_users(conn, "signup")
+                unknown_rejected = False
+            except FunnelSketchError:
+                unknown_rejected = True
+            conn.close()
+
+            if not off and unknown_rejected:
+                self.log_test("Funnel HLL Sketches", "PASS")
+            elif off:
+                self.log_test("Funnel HLL Sketches", "FAIL", "Estimates outside 3 standard errors", str(off))
+            else:
+                self.log_test("Funnel HLL Sketches", "FAIL", "Unknown step did not raise FunnelSketchError")
+
+        except Exception as e:
+            self.log_test("Funnel HLL Sketches", "FAIL", str(e))
+
+    def append_dq_violations(self, conn, tag):
+        """Append copies of existing rows that break the row-level DQ rules.
+
+        Args:
+            conn: Connection to a scratch copy of the database
+            tag: Suffix keeping the appended keys unique across calls
+        """
+        conn.execute(f"""
+            INSERT INTO fct_loans
+            SELECT * REPLACE (loan_id || '-{tag}-a' AS loan_id, -amount AS amount,
+                              user_id + 10000000 AS user_id)
+            FROM fct_loans WHERE hash(loan_id) % 50 = 0
+        """)
+        conn.execute(f"""
+            INSERT INTO fct_loans
+            SELECT * REPLACE (loan_id || '-{tag}-b' AS loan_id,
+                              requested_at + INTERVAL 3 DAY AS requested_at)
+            FROM fct_loans WHERE approved_at IS NOT NULL AND hash(loan_id) % 40 = 0
+        """)
+        conn.execute(f"""
+            INSERT INTO fct_transactions
+            SELECT * REPLACE (txn_id || '-{tag}' AS txn_id,
+                              CASE WHEN hash(txn_id) % 3 = 0 THEN 0 ELSE -amount END AS amount,
+                              CASE WHEN hash(txn_id) % 2 = 0 THEN user_id + 10000000 ELSE user_id END AS user_id)
+            FROM fct_transactions WHERE hash(txn_id) % 500 = 0
+        """)
+        conn.execute(f"""
+            INSERT INTO fct_sessions
+            SELECT * REPLACE (event_id || '-{tag}' AS event_id, NULL AS user_id)
+            FROM fct_sessions WHERE hash(event_id) % 100 = 0
+        """)
+        conn.execute(f"""
+            INSERT INTO dim_users
+            SELECT * REPLACE (user_id + 20000000 + (SELECT COUNT(*) FROM dim_users) AS user_id,
+                              baseline_risk_score + 1 AS baseline_risk_score,
+                              signup_at + INTERVAL 400 DAY AS signup_at)
+            FROM dim_users WHERE user_id % 100 = 0
+        """)
+        conn.execute(f"""
+            INSERT INTO ab_assignments
+            SELECT * REPLACE (assignment_id || '-{tag}' AS assignment_id, 'Holdout' AS variant,
+                              user_id + 10000000 AS user_id)
+            FROM ab_assignments WHERE hash(assignment_id) % 50 = 0
+        """)
+
+    def test_dq_rule_parity(self):
+        """Test that the compiled DQ rule categories match the hand-written reference views."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from data_quality_runner import CHECK_CATEGORIES, DataQualityRunner
+            from dq_rules import RULE_CATEGORY_COLUMNS
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_copy = os.path.join(tmp_dir, 'dq_parity.db')
+                shutil.copy(os.path.join(self.project_root, 'bree_case_study.db'), db_copy)
+                conn = duckdb.connect(db_copy)
+                self.append_dq_violations(conn, 'parity')
+                conn.close()
+
+                runner = DataQualityRunner(db_copy)
+                runner.execute_dq_checks()
+                report = runner.generate_detailed_report()
+
+                with open(os.path.join(self.project_root, 'sql', 'dq_rule_reference.sql')) as f:
+                    for statement in f.read().split(';'):
+                        if statement.strip():
+                            runner.conn.execute(statement)
+
+                mismatched = []
+                for category, view_name in CHECK_CATEGORIES.items():
+                    if view_name not in RULE_CATEGORY_COLUMNS:
+                        continue
+                    reference = runner.conn.execute(
+                        f"SELECT * FROM {view_name.replace('dq_', 'dq_reference_', 1)}"
+                    ).fetchdf()
+                    compiled = pd.DataFrame(report["categories"][category]["details"])
+                    try:
+                        pd.testing.assert_frame_equal(
+                            compiled.sort_values(list(compiled.columns)).reset_index(drop=True),
+                            reference.sort_values(list(reference.columns)).reset_index(drop=True),
+                            check_dtype=False
+                        )
+                    except AssertionError:
+                        mismatched.append(view_name)
+                runner.conn.close()
+
+            if mismatched:
+                self.log_test("DQ Rule Parity", "FAIL", f"Differs from reference SQL: {', '.join(mismatched)}")
+            else:
+                self.log_test("DQ Rule Parity", "PASS")
+
+        except Exception as e:
+            self.log_test("DQ Rule Parity", "FAIL", str(e))
+
+    def test_dq_incremental_report(self):
+        """Test that incremental DQ runs after appends report the same results as full runs."""
+        sys.path.insert(0, os.path.join(self.project_root, 'src'))
+        try:
+            from data_quality_runner import DataQualityRunner
+
+            def category_details(db_path, incremental):
+                runner = DataQualityRunner(db_path, incremental=incremental)
+                try:
+                    runner.execute_dq_checks()
+                    report = runner.generate_detailed_report()
+                finally:
+                    runner.conn.close()
+                return {
+                    category: pd.DataFrame(data.get("details", [])).pipe(
+                        lambda df: df.sort_values(list(df.columns)).reset_index(drop=True))
+                    for category, data in report["categories"].items()
+                }
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_copy = os.path.join(tmp_dir, 'dq_incremental.db')
+                shutil.copy(os.path.join(self.project_root, 'bree_case_study.db'), db_copy)
+                category_details(db_copy, incremental=True)
+
+                mismatched = []
+                # Loans alone take the delta path for every loan rule (dim_users is
+                # unchanged), then appends across all tables force the orphan rules to
+                # be re-evaluated in full
+                for round_name, append in [
+                    ("loans", lambda conn: conn.execute("""
+                        INSERT INTO fct_loans
+                        SELECT * REPLACE (loan_id || '-inc' AS loan_id, -amount AS amount,
+                                          user_id + 10000000 AS user_id)
+                        FROM fct_loans WHERE hash(loan_id) % 20 = 0
+                    """)),
+                    ("all tables", lambda conn: self.append_dq_violations(conn, 'inc')),
+                ]:
+                    conn = duckdb.connect(db_copy)
+                    append(conn)
+                    conn.close()
+
+                    incremental = category_details(db_copy, incremental=True)
+                    full = category_details(db_copy, incremental=False)
+                    for category in full:
+                        try:
+                            pd.testing.assert_frame_equal(incremental[category], full[category],
+                                                          check_dtype=False)
+                        except (AssertionError, KeyError):
+                            mismatched.append(f"{category} after {round_name}")
+
+            if mismatched:
+                self.log_test("DQ Incremental Report", "FAIL",
+                              f"Differs from a full run: {', '.join(mismatched)}")
+            else:
+                self.log_test("DQ Incremental Report", "PASS")
+
+        except Exception as e:
+            self.log_test("DQ Incremental Report", "FAIL", str(e))
+
     def test_notebooks_structure(self):
         """Test that notebook files exist and are readable."""
         notebooks_dir = os.path.join(self.project_root, 'notebooks')
@@ -372,6 +869,25 @@ class ProjectTester:
             
             print("\n📊 Testing Metrics Runner...")
             self.test_metrics_runner()
+
+            print("\n📈 Testing Metrics Time Series...")
+            self.test_metrics_timeseries_incremental()
+            self.test_loan_quantile_accuracy()
+
+            print("\n🏹 Testing Arrow Query Helper...")
+            self.test_arrow_query()
+
+            print("\n🎯 Testing Scoring Service...")
+            self.test_point_in_time_features()
+            self.test_scoring_service_batching()
+
+            print("\n🔻 Testing Funnel Sketches...")
+            self.test_funnel_sketches()
+
+            print("\n🧮 Testing Data Quality Rules...")
+            self.test_dq_rule_parity()
+            self.test_dq_incremental_report()
+            self.test_dq_check_timeout()
         else:
             print("⚠️  Skipping database-dependent tests due to connection failure")
         
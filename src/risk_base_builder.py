@@ -0,0 +1,179 @@
+"""User-bucketed materialization of v_risk_model_base with bounded memory."""
+
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import duckdb
+
+from constants import RISK_BASE_TABLE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Base tables the risk view stack reads. Every window and join in
+# v_fct_transactions_for_risk, v_user_prior_loan_perf and v_risk_model_base is
+# keyed on user_id, so restricting all three to one user bucket yields exactly
+# that bucket's rows of the full view.
+BUCKETED_TABLES = ["dim_users", "fct_loans", "fct_transactions"]
+
+
+class RiskBaseBuildError(Exception):
+    """Custom exception for bucketed risk base builds."""
+    pass
+
+
+class BucketedRiskBaseBuilder:
+    """
+    Builds the risk base table one hash bucket of user_id at a time.
+
+    Filters on user_id are not pushed through the user-partitioned windows of the
+    risk views, so each bucket shadows the base tables with connection-local TEMP
+    tables holding only its users. The unchanged views then resolve to those
+    tables, and peak working memory is roughly parallelism / num_buckets of a
+    full build.
+    """
+
+    def __init__(self, database_path: str = 'bree_case_study.db', num_buckets: int = 8,
+                 parallelism: int = 1, memory_limit: Optional[str] = None,
+                 target: str = RISK_BASE_TABLE):
+        """
+        Initialize builder.
+
+        Args:
+            database_path: Path to a database built by the loader
+            num_buckets: Number of hash(user_id) buckets
+            parallelism: Buckets computed concurrently (each on its own cursor)
+            memory_limit: Optional DuckDB memory_limit, e.g. '2GB'
+            target: Table the risk base is written to
+        """
+        if num_buckets < 1 or parallelism < 1:
+            raise RiskBaseBuildError("num_buckets and parallelism must be at least 1")
+
+        self.database_path = database_path
+        self.num_buckets = num_buckets
+        self.parallelism = min(parallelism, num_buckets)
+        self.memory_limit = memory_limit
+        self.target = target
+        self.connection: Optional[duckdb.DuckDBPyConnection] = None
+
+    def connect(self) -> duckdb.DuckDBPyConnection:
+        """Create and return DuckDB connection."""
+        if self.connection is None:
+            self.connection = duckdb.connect(self.database_path)
+            if self.memory_limit:
+                self.connection.execute(f"SET memory_limit = '{self.memory_limit}'")
+            logger.info(f"✓ Connected to DuckDB database: {self.database_path}")
+        return self.connection
+
+    def bucket_predicate(self, bucket: int) -> str:
+        """SQL predicate selecting the users of one bucket."""
+        return f"hash(user_id) % {self.num_buckets} = {bucket}"
+
+    def build_bucket(self, bucket: int, staging_table: str) -> Dict:
+        """
+        Compute one bucket of v_risk_model_base and append it to ``staging_table``.
+
+        Args:
+            bucket: Bucket number in [0, num_buckets)
+            staging_table: Table in the main schema receiving the rows
+
+        Returns:
+            Dictionary with bucket, rows and elapsed_sec
+        """
+        start = time.perf_counter()
+        cursor = self.connect().cursor()
+
+        try:
+            # TEMP tables take precedence over main tables of the same name for this cursor only
+            for table in BUCKETED_TABLES:
+                cursor.execute(f"""
+                    CREATE OR REPLACE TEMP TABLE {table} AS
+                    SELECT * FROM main.{table} WHERE {self.bucket_predicate(bucket)}
+                """)
+
+            rows = cursor.execute(f"INSERT INTO main.{staging_table} SELECT * FROM v_risk_model_base").fetchone()[0]
+
+            for table in BUCKETED_TABLES:
+                cursor.execute(f"DROP TABLE temp.{table}")
+        finally:
+            cursor.close()
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"✓ Bucket {bucket + 1}/{self.num_buckets}: {rows:,} rows in {elapsed:.2f}s")
+        return {"bucket": bucket, "rows": rows, "elapsed_sec": round(elapsed, 3)}
+
+    def build(self) -> List[Dict]:
+        """
+        Rebuild the target table from all buckets.
+
+        Buckets are appended to a staging table that replaces the target only once
+        every bucket has succeeded, so a failed run leaves the previous table intact.
+
+        Returns:
+            Per-bucket statistics in bucket order
+
+        Raises:
+            RiskBaseBuildError: If any bucket fails
+        """
+        conn = self.connect()
+        staging_table = f"{self.target}_staging"
+
+        logger.info(f"Building {self.target} in {self.num_buckets} user buckets "
+                    f"(parallelism {self.parallelism})...")
+
+        try:
+            conn.execute(f"CREATE OR REPLACE TABLE {staging_table} AS SELECT * FROM v_risk_model_base LIMIT 0")
+
+            with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+                stats = list(executor.map(lambda b: self.build_bucket(b, staging_table),
+                                          range(self.num_buckets)))
+        except Exception as e:
+            conn.execute(f"DROP TABLE IF EXISTS {staging_table}")
+            error_msg = f"Failed to build {self.target}: {e}"
+            logger.error(error_msg)
+            raise RiskBaseBuildError(error_msg) from e
+
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            conn.execute(f"DROP TABLE IF EXISTS {self.target}")
+            conn.execute(f"ALTER TABLE {staging_table} RENAME TO {self.target}")
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            error_msg = f"Failed to build {self.target}: {e}"
+            logger.error(error_msg)
+            raise RiskBaseBuildError(error_msg) from e
+
+        total_rows = sum(s["rows"] for s in stats)
+        logger.info(f"✓ Built {self.target}: {total_rows:,} rows")
+        return stats
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def main():
+    """Materialize v_risk_model_base into fct_risk_model_base bucket by bucket."""
+    parser = argparse.ArgumentParser(description="Build the risk base table in user_id hash buckets")
+    parser.add_argument("--db", default="bree_case_study.db", help="DuckDB database path")
+    parser.add_argument("--buckets", type=int, default=8, help="Number of user_id hash buckets")
+    parser.add_argument("--parallelism", type=int, default=1, help="Buckets computed concurrently")
+    parser.add_argument("--memory-limit", default=None, help="DuckDB memory_limit, e.g. 2GB")
+    args = parser.parse_args()
+
+    builder = BucketedRiskBaseBuilder(args.db, args.buckets, args.parallelism, args.memory_limit)
+    try:
+        builder.build()
+    finally:
+        builder.close()
+
+
+if __name__ == '__main__':
+    main()
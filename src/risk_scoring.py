@@ -0,0 +1,316 @@
+"""In-database batch scoring for the logistic risk model."""
+
+import argparse
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import duckdb
+
+from arrow_query import fetch_frame
+from constants import RISK_BASE_TABLE, RISK_MODEL_PARAMS_PATH, RISK_SCORES_TABLE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ScoringError(Exception):
+    """Custom exception for risk scoring operations."""
+    pass
+
+
+def _quote_identifier(name: str) -> str:
+    """Quote a column name for use in DuckDB SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    """Quote a string value for use in DuckDB SQL."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def export_model_params(
+    pipeline,
+    imputer,
+    feature_names: Sequence[str],
+    categorical_columns: Sequence[str],
+    approval_threshold: float,
+    output_path: Optional[Path] = None,
+    model_version: str = "risk_model_v2"
+) -> Path:
+    """
+    Export the fitted imputer, scaler and classifier parameters to JSON.
+
+    The notebook one-hot encodes categoricals with ``pd.get_dummies(drop_first=True)``,
+    median-imputes, then runs a ``StandardScaler`` + ``LogisticRegressionCV`` pipeline.
+    Each encoded feature is recorded with its source column so the scoring engine
+    can rebuild the same design matrix in SQL.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline with "scaler" and "clf" steps
+        imputer: Fitted SimpleImputer applied to the encoded feature matrix
+        feature_names: Encoded feature names in training column order
+        categorical_columns: Raw columns that were one-hot encoded
+        approval_threshold: Loans with prob_default below this are approved
+        output_path: Destination JSON file (defaults to RISK_MODEL_PARAMS_PATH)
+        model_version: Version label stamped onto every score
+
+    Returns:
+        Path the parameters were written to
+    """
+    if output_path is None:
+        output_path = RISK_MODEL_PARAMS_PATH
+    output_path = Path(output_path)
+
+    scaler = pipeline.named_steps["scaler"]
+    clf = pipeline.named_steps["clf"]
+
+    # Longest prefix first so e.g. "payroll_frequency_" wins over shorter names
+    prefixes = sorted(categorical_columns, key=len, reverse=True)
+
+    features = []
+    for i, name in enumerate(feature_names):
+        source, value = name, None
+        for column in prefixes:
+            if name.startswith(f"{column}_"):
+                source, value = column, name[len(column) + 1:]
+                break
+
+        features.append({
+            "name": name,
+            "source": source,
+            "value": value,
+            "median": float(imputer.statistics_[i]),
+            "mean": float(scaler.mean_[i]) if scaler.with_mean else 0.0,
+            "scale": float(scaler.scale_[i]) if scaler.with_std else 1.0,
+            "coef": float(clf.coef_[0][i])
+        })
+
+    params = {
+        "model_version": model_version,
+        "exported_at": datetime.now().isoformat(),
+        "intercept": float(clf.intercept_[0]),
+        "approval_threshold": float(approval_threshold),
+        "features": features
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(params, f, indent=2)
+
+    logger.info(f"✓ Exported {len(features)} model features to {output_path}")
+    return output_path
+
+
+class RiskScoringEngine:
+    """Compiles exported model parameters into SQL and scores loans inside DuckDB."""
+
+    def __init__(self, database_path: str = 'bree_case_study.db',
+                 params_path: Optional[Path] = None):
+        """
+        Initialize scoring engine.
+
+        Args:
+            database_path: Path to database file or ':memory:' for in-memory database
+            params_path: Exported model parameters (defaults to RISK_MODEL_PARAMS_PATH)
+        """
+        self.database_path = database_path
+        self.params_path = Path(params_path) if params_path else RISK_MODEL_PARAMS_PATH
+        self.connection: Optional[duckdb.DuckDBPyConnection] = None
+        self.params: Optional[Dict] = None
+
+    def connect(self) -> duckdb.DuckDBPyConnection:
+        """Create and return DuckDB connection."""
+        if self.connection is None:
+            self.connection = duckdb.connect(self.database_path)
+            logger.info(f"✓ Connected to DuckDB database: {self.database_path}")
+        return self.connection
+
+    def load_params(self) -> Dict:
+        """
+        Load exported model parameters from JSON.
+
+        Raises:
+            ScoringError: If the parameter file is missing or malformed
+        """
+        if self.params is not None:
+            return self.params
+
+        if not self.params_path.exists():
+            raise ScoringError(
+                f"Model parameters not found: {self.params_path} "
+                "(run the export cell in notebooks/4_model_v2.ipynb)"
+            )
+
+        try:
+            with open(self.params_path, "r") as f:
+                params = json.load(f)
+            for key in ("intercept", "approval_threshold", "features"):
+                if key not in params:
+                    raise KeyError(key)
+        except (ValueError, KeyError) as e:
+            raise ScoringError(f"Invalid model parameters in {self.params_path}: {e}") from e
+
+        self.params = params
+        logger.info(f"✓ Loaded {params.get('model_version', 'risk model')}: "
+                    f"{len(params['features'])} features")
+        return params
+
+    def active_features(self) -> List[Dict]:
+        """Return features with a non-zero coefficient (LASSO drops the rest)."""
+        return [f for f in self.load_params()["features"] if f["coef"] != 0]
+
+    def feature_sql(self, feature: Dict, alias: str = "b") -> str:
+        """
+        Compile one encoded, imputed feature into a SQL expression.
+
+        One-hot columns become CASE expressions (NULL categories encode as all zeros,
+        matching ``pd.get_dummies``); numeric columns replace NULL/inf/NaN with the
+        training median, matching the notebook's ``SimpleImputer``.
+        """
+        column = f"{alias}.{_quote_identifier(feature['source'])}"
+
+        if feature["value"] is not None:
+            return f"(CASE WHEN {column} = {_quote_literal(feature['value'])} THEN 1.0 ELSE 0.0 END)"
+
+        value = f"CAST({column} AS DOUBLE)"
+        return f"(CASE WHEN isfinite({value}) THEN {value} ELSE {feature['median']!r} END)"
+
+    def compile_logit_sql(self, alias: str = "b") -> str:
+        """
+        Compile the full linear predictor into a single SQL expression.
+
+        Scaling is folded into the coefficients: coef * (x - mean) / scale becomes
+        weight * x with the mean terms absorbed into the intercept.
+        """
+        params = self.load_params()
+        intercept = params["intercept"]
+        terms = []
+
+        for feature in self.active_features():
+            weight = feature["coef"] / feature["scale"]
+            intercept -= weight * feature["mean"]
+            terms.append(f"{weight!r} * {self.feature_sql(feature, alias)}")
+
+        return " + ".join([repr(intercept)] + terms)
+
+    def compile_score_sql(self, source: str = "v_risk_model_base",
+                          where: Optional[str] = None) -> str:
+        """
+        Build a SELECT that scores every row of ``source`` in one vectorized pass.
+
+        Args:
+            source: Table or view exposing the model's raw feature columns
+            where: Optional SQL predicate applied to ``source`` (alias ``b``)
+
+        Returns:
+            SQL returning loan_id, user_id, prob_default, approval_flag, model_version
+        """
+        params = self.load_params()
+        threshold = params["approval_threshold"]
+        version = params.get("model_version", "unknown")
+        where_clause = f"WHERE {where}" if where else ""
+
+        return f"""
+        WITH scored AS (
+          SELECT
+            b.loan_id,
+            b.user_id,
+            1.0 / (1.0 + EXP(-({self.compile_logit_sql('b')}))) AS prob_default
+          FROM {source} b
+          {where_clause}
+        )
+        SELECT
+          loan_id,
+          user_id,
+          prob_default,
+          CASE WHEN prob_default < {threshold!r} THEN 1 ELSE 0 END AS approval_flag,
+          {_quote_literal(version)} AS model_version
+        FROM scored
+        """
+
+    def score_to_table(self, source: str = "v_risk_model_base",
+                       target: str = RISK_SCORES_TABLE) -> int:
+        """
+        Score ``source`` in place and (re)write the scores table.
+
+        Args:
+            source: Table or view exposing the model's raw feature columns
+            target: Destination table name
+
+        Returns:
+            Number of loans scored
+
+        Raises:
+            ScoringError: If scoring fails
+        """
+        conn = self.connect()
+
+        try:
+            conn.execute(f"""
+                CREATE OR REPLACE TABLE {target} AS
+                SELECT *, CURRENT_TIMESTAMP AS scored_at
+                FROM ({self.compile_score_sql(source)})
+            """)
+            result = conn.execute(f"SELECT COUNT(*) FROM {target}").fetchone()
+            row_count = result[0] if result else 0
+        except Exception as e:
+            error_msg = f"Failed to score {source} into {target}: {e}"
+            logger.error(error_msg)
+            raise ScoringError(error_msg) from e
+
+        logger.info(f"✓ Scored {row_count:,} loans from {source} into {target}")
+        return row_count
+
+    def export_scores_csv(self, output_path: Path, target: str = RISK_SCORES_TABLE) -> Path:
+        """Write scores in the notebook's ``risk_score.csv`` layout."""
+        conn = self.connect()
+        conn.execute(f"""
+            COPY (SELECT loan_id, prob_default, approval_flag FROM {target} ORDER BY loan_id)
+            TO {_quote_literal(str(output_path))} (HEADER, DELIMITER ',')
+        """)
+        logger.info(f"✓ Exported scores to {output_path}")
+        return Path(output_path)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def main():
+    """Score every approved loan in v_risk_model_base (or fct_risk_model_base) into fct_risk_scores."""
+    parser = argparse.ArgumentParser(description="Score loans with the exported risk model inside DuckDB")
+    parser.add_argument("--db", default="bree_case_study.db", help="DuckDB database path")
+    parser.add_argument("--source", default="v_risk_model_base",
+                        help=f"Risk base to score: v_risk_model_base or {RISK_BASE_TABLE} (built by risk_base_builder.py)")
+    args = parser.parse_args()
+
+    engine = RiskScoringEngine(args.db)
+
+    try:
+        row_count = engine.score_to_table(source=args.source)
+
+        summary = fetch_frame(engine.connect(), f"""
+            SELECT
+              COUNT(*) AS scored_loans,
+              ROUND(AVG(prob_default), 4) AS avg_prob_default,
+              ROUND(AVG(approval_flag) * 100, 2) AS approval_rate_pct
+            FROM {RISK_SCORES_TABLE}
+        """)
+        print(f"\nRisk scores written to {RISK_SCORES_TABLE} ({row_count:,} loans):")
+        print(summary.to_string(index=False))
+
+    except Exception as e:
+        logger.error(f"Risk scoring failed: {e}")
+        raise
+    finally:
+        engine.close()
+
+
+if __name__ == '__main__':
+    main()
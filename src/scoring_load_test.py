@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Scoring Service Load Test
+Replays historical advance requests against a local scoring service backed by a DuckDB file.
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import duckdb
+
+from scoring_service import LatencyTracker, ScoringService
+
+
+def sample_requests(database_path: str, num_requests: int, seed: float = 0.42) -> List[Dict]:
+    """Sample historical loan requests as (user_id, requested_at) payloads."""
+    conn = duckdb.connect(database_path, read_only=True)
+    try:
+        conn.execute(f"SELECT setseed({seed})")
+        rows = conn.execute("""
+            SELECT loan_id, user_id, strftime(requested_at, '%Y-%m-%dT%H:%M:%S')
+            FROM fct_loans
+            ORDER BY random()
+            LIMIT ?
+        """, [num_requests]).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        {"request_id": loan_id, "user_id": user_id, "requested_at": requested_at}
+        for loan_id, user_id, requested_at in rows
+    ]
+
+
+def post_json(url: str, payload: Dict, timeout: float = 30.0) -> Dict:
+    """POST a JSON payload and decode the JSON response."""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def get_json(url: str, timeout: float = 30.0) -> Dict:
+    """GET a JSON document."""
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_load_test(database_path: str = 'bree_case_study.db', num_requests: int = 500,
+                  concurrency: int = 32, max_batch_size: int = 64,
+                  max_wait_ms: float = 5.0) -> Dict:
+    """
+    Start an in-process scoring service and hammer it with concurrent requests.
+
+    Args:
+        database_path: DuckDB file with canonical views
+        num_requests: Number of requests to send
+        concurrency: Number of concurrent client threads
+        max_batch_size: Service micro-batch size limit
+        max_wait_ms: Service micro-batch collection window
+
+    Returns:
+        Client-side and server-side latency summary
+    """
+    payloads = sample_requests(database_path, num_requests)
+    service = ScoringService(database_path, port=0, max_batch_size=max_batch_size,
+                             max_wait_ms=max_wait_ms)
+    service.start()
+    host, port = service.address
+    base_url = f"http://{host}:{port}"
+
+    client_latency = LatencyTracker()
+
+    def fire(payload: Dict) -> None:
+        start = time.perf_counter()
+        try:
+            post_json(f"{base_url}/score", payload)
+            client_latency.record((time.perf_counter() - start) * 1000)
+        except Exception:
+            client_latency.record((time.perf_counter() - start) * 1000, error=True)
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(fire, payloads))
+        elapsed = time.perf_counter() - started
+
+        return {
+            "requests": len(payloads),
+            "concurrency": concurrency,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(payloads) / elapsed, 1) if elapsed > 0 else None,
+            "client": client_latency.snapshot(),
+            "server": get_json(f"{base_url}/metrics")
+        }
+    finally:
+        service.shutdown()
+
+
+def main():
+    """Run the load test and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default="bree_case_study.db", help="DuckDB database file")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Micro-batch size limit")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Micro-batch window (ms)")
+    args = parser.parse_args()
+
+    print("🚀 Scoring Service Load Test")
+    print(f"📅 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    summary = run_load_test(args.db, args.requests, args.concurrency,
+                            args.max_batch_size, args.max_wait_ms)
+
+    client, server = summary["client"], summary["server"]
+    print(f"\n{'='*80}")
+    print("📊 LOAD TEST RESULTS")
+    print(f"{'='*80}")
+    print(f"Requests:        {summary['requests']:,} @ concurrency {summary['concurrency']}")
+    print(f"Elapsed:         {summary['elapsed_s']:.2f}s ({summary['throughput_rps']} req/s)")
+    print(f"Client latency:  p50={client['p50_ms']}ms  p99={client['p99_ms']}ms  errors={client['errors']}")
+    print(f"Server latency:  p50={server['requests']['p50_ms']}ms  p99={server['requests']['p99_ms']}ms")
+    print(f"Batches:         {server['batches']['count']:,} (avg size {server['avg_batch_size']}, "
+          f"p50={server['batches']['p50_ms']}ms  p99={server['batches']['p99_ms']}ms)")
+    print(f"{'='*80}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+"""Local HTTP scoring service with micro-batched, point-in-time risk scoring."""
+
+import json
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import duckdb
+import pandas as pd
+
+from risk_scoring import RiskScoringEngine, ScoringError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+
+# Mirrors v_risk_model_base, but anchored on each request's as-of timestamp instead
+# of approved_at_utc so an unapproved advance request can be scored inline. The
+# literal user_id list lets DuckDB push the filter below the PARTITION BY user_id
+# windows in v_fct_transactions_for_risk (an IN-subquery forces a full recompute).
+POINT_IN_TIME_FEATURES_SQL = """
+WITH req AS (
+  SELECT request_id, user_id, CAST(as_of_ts AS TIMESTAMP) AT TIME ZONE 'UTC' AS as_of_ts
+  FROM {requests}
+),
+base AS (
+  SELECT
+    r.request_id,
+    r.user_id,
+    r.as_of_ts,
+    u.province,
+    u.device_os,
+    u.acquisition_channel,
+    u.baseline_risk_score,
+    u.payroll_frequency,
+    CASE WHEN EXISTS (
+      SELECT 1
+      FROM v_fct_loans_clean p
+      WHERE p.user_id = r.user_id
+        AND p.approved_at_utc < r.as_of_ts
+        AND p.is_default = 1
+    ) THEN 1 ELSE 0 END AS prior_loan_default_flag
+  FROM req r
+  JOIN v_dim_users_clean u USING (user_id)
+),
+user_loans AS (
+  SELECT * FROM v_fct_loans_clean
+  WHERE user_id IN ({user_ids})
+),
+prior_perf AS (
+  SELECT
+    b.request_id,
+    CASE WHEN COUNT(pa.loan_id) > 0 THEN 1 ELSE 0 END AS prior_loan_flag,
+    AVG(CASE WHEN pa.is_disbursed = 1 THEN pa.late_days END) AS prior_avg_days_late,
+    AVG(CASE WHEN pa.is_disbursed = 1 THEN pa.amount END)  AS prior_avg_amount,
+    AVG(CASE WHEN pa.is_disbursed = 1 AND pa.amount > 0
+             THEN (pa.revenue / pa.amount) END)            AS prior_avg_revenue_to_loan,
+    AVG(CASE WHEN pa.is_disbursed = 1
+             THEN CASE WHEN COALESCE(pa.tip_amount,0) > 0 THEN 1 ELSE 0 END
+        END)::DOUBLE                                       AS prior_tip_take_rate,
+    COUNT(pa.loan_id)                                      AS prior_approved_loans_count,
+    COUNT(pu.loan_id)                                      AS prior_unapproved_loans_count
+  FROM base b
+  LEFT JOIN user_loans pa
+    ON pa.user_id = b.user_id
+   AND pa.approved_at_utc < b.as_of_ts
+  LEFT JOIN user_loans pu
+    ON pu.user_id = b.user_id
+   AND pu.requested_at_utc < b.as_of_ts
+   AND COALESCE(pu.is_approved,0) = 0
+  GROUP BY b.request_id
+),
+user_txn AS (
+  SELECT * FROM v_fct_transactions_for_risk
+  WHERE user_id IN ({user_ids})
+),
+txn_snapshot AS (
+  SELECT * FROM (
+    SELECT
+      b.request_id,
+      r.*,
+      ROW_NUMBER() OVER (PARTITION BY b.request_id ORDER BY r.posted_date_utc DESC) AS rn
+    FROM base b
+    JOIN user_txn r
+      ON r.user_id = b.user_id
+     AND r.posted_date_utc < b.as_of_ts
+  ) s
+  WHERE rn = 1
+)
+SELECT
+  b.request_id AS loan_id,
+  b.user_id,
+  b.province, b.device_os, b.acquisition_channel,
+  b.baseline_risk_score, b.payroll_frequency,
+
+  -- prior performance
+  p.prior_loan_flag,
+  b.prior_loan_default_flag,
+  p.prior_avg_days_late,
+  p.prior_avg_amount,
+  p.prior_avg_revenue_to_loan,
+  p.prior_tip_take_rate,
+  p.prior_approved_loans_count,
+  p.prior_unapproved_loans_count,
+
+  -- flag for txn availability
+  CASE WHEN s.request_id IS NULL THEN 0 ELSE 1 END AS txn_info_found,
+
+  -- atomic txn features
+  s.inflow_sum_14d, s.spend_sum_14d, s.essentials_spend_sum_14d, s.rent_spend_sum_14d,
+  s.txn_count_14d,  s.neg_txn_count_14d, s.inflow_mean_14d, s.inflow_std_14d, s.bal_mean_14d, s.bal_std_14d,
+  s.inflow_sum_30d, s.spend_sum_30d, s.essentials_spend_sum_30d, s.rent_spend_sum_30d,
+  s.txn_count_30d,  s.neg_txn_count_30d, s.inflow_mean_30d, s.inflow_std_30d, s.bal_mean_30d, s.bal_std_30d,
+  s.days_since_last_payroll,
+
+  -- derived txn features
+  CASE WHEN s.spend_sum_14d<>0 THEN s.rent_spend_sum_14d       / NULLIF(s.spend_sum_14d,0) END AS rent_share_outflows_14d,
+  CASE WHEN s.spend_sum_14d<>0 THEN s.essentials_spend_sum_14d / NULLIF(s.spend_sum_14d,0) END AS essentials_share_14d,
+  CASE WHEN s.spend_sum_30d<>0 THEN s.rent_spend_sum_30d       / NULLIF(s.spend_sum_30d,0) END AS rent_share_outflows_30d,
+  CASE WHEN s.spend_sum_30d<>0 THEN s.essentials_spend_sum_30d / NULLIF(s.spend_sum_30d,0) END AS essentials_share_30d,
+  (s.inflow_sum_14d + s.spend_sum_14d) AS net_cashflow_14d,
+  (s.inflow_sum_30d + s.spend_sum_30d) AS net_cashflow_30d,
+  CASE WHEN ABS(s.inflow_sum_14d + s.spend_sum_14d) > 0
+       THEN s.inflow_std_14d / ABS(s.inflow_sum_14d + s.spend_sum_14d) END AS inflow_vol_to_netcashflow_14d,
+  CASE WHEN ABS(s.inflow_sum_14d + s.spend_sum_14d) > 0
+       THEN s.bal_std_14d   / ABS(s.inflow_sum_14d + s.spend_sum_14d) END AS bal_vol_to_netcashflow_14d,
+  CASE WHEN ABS(s.inflow_sum_30d + s.spend_sum_30d) > 0
+       THEN s.inflow_std_30d / ABS(s.inflow_sum_30d + s.spend_sum_30d) END AS inflow_vol_to_netcashflow_30d,
+  CASE WHEN ABS(s.inflow_sum_30d + s.spend_sum_30d) > 0
+       THEN s.bal_std_30d   / ABS(s.inflow_sum_30d + s.spend_sum_30d) END AS bal_vol_to_netcashflow_30d,
+  CASE WHEN s.spend_sum_14d<>0 THEN s.inflow_sum_14d / NULLIF(s.spend_sum_14d,0) END AS cashin_to_cashout_14d,
+  CASE WHEN s.spend_sum_30d<>0 THEN s.inflow_sum_30d / NULLIF(s.spend_sum_30d,0) END AS cashin_to_cashout_30d,
+  CASE WHEN s.txn_count_14d>0 THEN s.neg_txn_count_14d * 1.0 / NULLIF(s.txn_count_14d,0) END AS overdraft_txshare_14d,
+  CASE WHEN s.txn_count_30d>0 THEN s.neg_txn_count_30d * 1.0 / NULLIF(s.txn_count_30d,0) END AS overdraft_txshare_30d
+
+FROM base b
+LEFT JOIN prior_perf   p ON p.request_id = b.request_id
+LEFT JOIN txn_snapshot s ON s.request_id = b.request_id
+"""
+
+
+class _ScoringHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for bursty clients."""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class LatencyTracker:
+    """Thread-safe rolling latency window with p50/p99 counters."""
+
+    def __init__(self, window_size: int = 10000):
+        """
+        Initialize tracker.
+
+        Args:
+            window_size: Number of most recent samples kept for percentiles
+        """
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window_size)
+        self.count = 0
+        self.errors = 0
+
+    def record(self, latency_ms: float, error: bool = False) -> None:
+        """Record one observation."""
+        with self._lock:
+            self._samples.append(latency_ms)
+            self.count += 1
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> Dict:
+        """Return counts plus nearest-rank p50/p99 over the rolling window."""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, errors = self.count, self.errors
+
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            rank = max(0, math.ceil(p / 100 * len(samples)) - 1)
+            return round(samples[rank], 3)
+
+        return {
+            "count": count,
+            "errors": errors,
+            "p50_ms": percentile(50),
+            "p99_ms": percentile(99),
+            "max_ms": round(samples[-1], 3) if samples else None
+        }
+
+
+class MicroBatcher:
+    """Collects concurrent score requests and scores them in a single DuckDB query."""
+
+    def __init__(self, engine: RiskScoringEngine, max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0):
+        """
+        Initialize batcher.
+
+        Args:
+            engine: Scoring engine whose connection is owned by the batch worker
+            max_batch_size: Upper bound on requests folded into one query
+            max_wait_ms: How long the first request in a batch waits for company
+        """
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batch_latency = LatencyTracker()
+        self.batch_sizes = deque(maxlen=10000)
+        self._queue: "queue.Queue[Tuple[Dict, Future]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="scoring-batcher", daemon=True)
+        self._score_sql: Optional[str] = None
+
+    def start(self) -> None:
+        """Start the batch worker thread."""
+        self.engine.load_params()
+        self._worker.start()
+
+    def stop(self) -> None:
+        """Signal the worker to exit and wait for it."""
+        self._stop.set()
+        self._worker.join(timeout=5)
+
+    def submit(self, request: Dict) -> Future:
+        """Queue one request; the future resolves to its score dict."""
+        future: Future = Future()
+        self._queue.put((request, future))
+        return future
+
+    def _collect_batch(self) -> List[Tuple[Dict, Future]]:
+        """Block for the first request, then gather more until size or wait limit."""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        """Worker loop: one query per batch, fan results back out to futures."""
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            try:
+                scores = self.score_batch([request for request, _ in batch])
+                for position, (request, future) in enumerate(batch):
+                    result = scores.get(position)
+                    if result is None:
+                        future.set_exception(ScoringError(f"Unknown user_id: {request['user_id']}"))
+                    else:
+                        future.set_result(result)
+                error = False
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                error = True
+
+            self.batch_latency.record((time.perf_counter() - start) * 1000, error=error)
+            self.batch_sizes.append(len(batch))
+
+    def score_batch(self, requests: List[Dict]) -> Dict[int, Dict]:
+        """
+        Score a batch of requests against the live DuckDB file.
+
+        Rows are keyed by their position in the batch rather than by the
+        client-supplied request_id, which need not be unique across concurrent
+        clients; the client id is only echoed back in the result.
+
+        Args:
+            requests: Dicts with request_id, user_id and as_of_ts
+
+        Returns:
+            Mapping of batch position to score dict
+        """
+        conn = self.engine.connect()
+        frame = pd.DataFrame({
+            "request_id": range(len(requests)),
+            "user_id": [request["user_id"] for request in requests],
+            "as_of_ts": [request["as_of_ts"] for request in requests]
+        })
+        user_ids = ",".join(str(int(u)) for u in frame["user_id"].unique())
+
+        if self._score_sql is None:
+            features_sql = POINT_IN_TIME_FEATURES_SQL.replace("{requests}", "score_requests")
+            self._score_sql = self.engine.compile_score_sql(source=f"({features_sql})")
+
+        conn.register("score_requests", frame)
+        try:
+            rows = conn.execute(self._score_sql.replace("{user_ids}", user_ids)).fetchall()
+        finally:
+            conn.unregister("score_requests")
+
+        return {
+            position: {
+                "request_id": requests[position]["request_id"],
+                "user_id": user_id,
+                "prob_default": prob_default,
+                "approval_flag": approval_flag,
+                "model_version": model_version
+            }
+            for position, user_id, prob_default, approval_flag, model_version in rows
+        }
+
+    def stats(self) -> Dict:
+        """Batch-level counters."""
+        sizes = list(self.batch_sizes)
+        return {
+            "batches": self.batch_latency.snapshot(),
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else None,
+            "queue_depth": self._queue.qsize()
+        }
+
+
+class ScoringService:
+    """Owns the engine, batcher and HTTP server for inline advance-request scoring."""
+
+    def __init__(self, database_path: str = 'bree_case_study.db', host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 request_timeout_s: float = 10.0, params_path=None):
+        """
+        Initialize scoring service.
+
+        Args:
+            database_path: DuckDB file with canonical views (opened read-only)
+            host: Interface to bind
+            port: TCP port to bind (0 picks a free port)
+            max_batch_size: Upper bound on requests per scoring query
+            max_wait_ms: Micro-batch collection window
+            request_timeout_s: How long a handler waits for its batch result
+            params_path: Exported model parameters (defaults to RISK_MODEL_PARAMS_PATH)
+        """
+        self.engine = RiskScoringEngine(database_path, params_path=params_path)
+        self.engine.connection = duckdb.connect(database_path, read_only=True)
+        self.batcher = MicroBatcher(self.engine, max_batch_size, max_wait_ms)
+        self.request_latency = LatencyTracker()
+        self.request_timeout_s = request_timeout_s
+        self._request_counter = 0
+        self._counter_lock = threading.Lock()
+        self.server = _ScoringHTTPServer((host, port), self._make_handler())
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Bound (host, port)."""
+        return self.server.server_address[:2]
+
+    def _next_request_id(self) -> str:
+        with self._counter_lock:
+            self._request_counter += 1
+            return f"req-{self._request_counter}"
+
+    def score(self, payload: Dict) -> Dict:
+        """
+        Score one advance request synchronously through the batcher.
+
+        Args:
+            payload: {"user_id": int, "requested_at": ISO timestamp (optional, defaults
+                     to now), "request_id": str (optional)}
+        """
+        start = time.perf_counter()
+        error = True
+        try:
+            if "user_id" not in payload:
+                raise ValueError("user_id is required")
+            # Canonical views treat naive timestamps as UTC
+            as_of_ts = pd.Timestamp(payload.get("requested_at") or datetime.now(timezone.utc))
+            if as_of_ts.tzinfo is not None:
+                as_of_ts = as_of_ts.tz_convert("UTC").tz_localize(None)
+
+            request = {
+                "request_id": str(payload.get("request_id") or self._next_request_id()),
+                "user_id": int(payload["user_id"]),
+                "as_of_ts": as_of_ts
+            }
+            result = self.batcher.submit(request).result(timeout=self.request_timeout_s)
+            error = False
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.request_latency.record(latency_ms, error=error)
+
+        return {**result, "latency_ms": round(latency_ms, 3)}
+
+    def metrics(self) -> Dict:
+        """Request and batch latency counters."""
+        return {"requests": self.request_latency.snapshot(), **self.batcher.stats()}
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status: int, body: Dict) -> None:
+                data = json.dumps(body, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/metrics":
+                    self._send_json(200, service.metrics())
+                elif self.path == "/health":
+                    self._send_json(200, {"status": "ok"})
+                else:
+                    self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+            def do_POST(self):
+                if self.path != "/score":
+                    self._send_json(404, {"error": f"Unknown path: {self.path}"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                    self._send_json(200, service.score(payload))
+                except (ValueError, ScoringError) as e:
+                    self._send_json(400, {"error": str(e)})
+                except Exception as e:
+                    self._send_json(500, {"error": str(e)})
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> threading.Thread:
+        """Start batcher and serve HTTP on a background thread."""
+        self.batcher.start()
+        thread = threading.Thread(target=self.server.serve_forever, name="scoring-http", daemon=True)
+        thread.start()
+        host, port = self.address
+        logger.info(f"✓ Scoring service listening on http://{host}:{port}")
+        return thread
+
+    def shutdown(self) -> None:
+        """Stop HTTP server, batcher and close the database connection."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.batcher.stop()
+        self.engine.close()
+
+
+def main():
+    """Run the scoring service in the foreground."""
+    service = ScoringService()
+    try:
+        service.batcher.start()
+        host, port = service.address
+        logger.info(f"✓ Scoring service listening on http://{host}:{port} "
+                    "(POST /score, GET /metrics)")
+        service.server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down scoring service...")
+    finally:
+        service.server.server_close()
+        service.batcher.stop()
+        service.engine.close()
+
+
+if __name__ == '__main__':
+    main()